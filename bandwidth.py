@@ -0,0 +1,195 @@
+# MIT License
+# Copyright (c)  2024 Brahim El Hamdaoui
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# Process-wide bandwidth limits shared by every download and upload. Each
+# direction has a budget in bytes per second (0 means unlimited), optionally
+# replaced during time-of-day windows. Running transfers hold a lease whose
+# share of the budget follows their weight; the share is recomputed on every
+# call, so changing a budget takes effect on running jobs within a moment.
+import time
+import threading
+from typing import Callable, List, Optional, Tuple
+
+
+DOWNLOAD = 'download'
+UPLOAD = 'upload'
+DIRECTIONS = (DOWNLOAD, UPLOAD)
+
+# Longest single sleep, so cancellation and budget changes are noticed quickly
+_SLICE = 0.25
+
+
+def parse_schedule(text: str) -> List[Tuple[int, int, Optional[int], Optional[int]]]:
+    # One rule per line: "HH:MM-HH:MM DOWNLOAD UPLOAD" in KB/s, where 0 is
+    # unlimited and "-" keeps the normal budget. Windows may wrap past midnight.
+    rules = []
+    for n, line in enumerate((text or '').splitlines(), start=1):
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        parts = line.split()
+        try:
+            if len(parts) not in (2, 3):
+                raise ValueError(line)
+            start, end = (_minutes(t) for t in parts[0].split('-', 1))
+            rules.append((start, end, _kbps(parts[1]), _kbps(parts[2] if len(parts) == 3 else '-')))
+        except ValueError:
+            raise ValueError(f"line {n}: expected 'HH:MM-HH:MM DOWNLOAD UPLOAD', got {line!r}")
+    return rules
+
+
+def _minutes(text: str) -> int:
+    hours, minutes = text.strip().split(':')
+    value = int(hours) * 60 + int(minutes)
+    if not 0 <= value <= 24 * 60:
+        raise ValueError(text)
+    return value
+
+
+def _kbps(text: str) -> Optional[int]:
+    if text == '-':
+        return None
+    value = int(text)
+    if value < 0:
+        raise ValueError(text)
+    return value * 1024
+
+
+class TokenBucket:
+    # Bytes are taken as they are transferred; a transfer larger than the
+    # bucket runs into debt and the next call waits for it to be paid back.
+    # Several threads may share one bucket, so the arithmetic is locked and
+    # the waiting is done outside the lock.
+    def __init__(self, rate: float = 0):
+        self.rate = rate
+        self._tokens = 0.0
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, nbytes: int, rate: Callable[[], float], cancelled: Callable[[], bool] = None):
+        with self._lock:
+            self._tokens -= nbytes
+        while True:
+            current = rate()
+            with self._lock:
+                self.rate = current
+                now = time.monotonic()
+                if current <= 0:
+                    # Unlimited: forget any debt so a later cap starts fresh
+                    self._tokens = 0.0
+                    self._stamp = now
+                    return
+                burst = max(64 * 1024, current)
+                self._tokens = min(burst, self._tokens + (now - self._stamp) * current)
+                self._stamp = now
+                debt = -self._tokens
+            if debt <= 0 or (cancelled is not None and cancelled()):
+                return
+            time.sleep(min(_SLICE, debt / current))
+
+
+class Lease:
+    def __init__(self, limiter, direction: str, job_id, weight: float):
+        self.limiter = limiter
+        self.direction = direction
+        self.job_id = job_id
+        self.weight = weight
+        self._bucket = TokenBucket()
+
+    def rate(self) -> float:
+        # This job's current share in bytes per second; 0 means unlimited
+        return self.limiter.share(self)
+
+    def consume(self, nbytes: int, cancelled: Callable[[], bool] = None):
+        if nbytes > 0:
+            self._bucket.consume(nbytes, self.rate, cancelled)
+
+    def release(self):
+        self.limiter.release(self)
+
+
+class BandwidthLimiter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._limits = dict.fromkeys(DIRECTIONS, 0)
+        self._schedule = []
+        self._leases = {d: [] for d in DIRECTIONS}
+
+    def set_limit(self, direction: str, bytes_per_second: int):
+        with self._lock:
+            self._limits[direction] = max(0, int(bytes_per_second or 0))
+
+    def set_schedule(self, rules):
+        with self._lock:
+            self._schedule = list(rules or [])
+
+    def limit(self, direction: str, now: Optional[time.struct_time] = None) -> int:
+        with self._lock:
+            return self._limit(direction, now)
+
+    def acquire(self, direction: str, job_id=None, weight: float = 1.0) -> Lease:
+        lease = Lease(self, direction, job_id, max(0.01, float(weight)))
+        with self._lock:
+            self._leases[direction].append(lease)
+        return lease
+
+    def release(self, lease: Lease):
+        with self._lock:
+            if lease in self._leases[lease.direction]:
+                self._leases[lease.direction].remove(lease)
+
+    def share(self, lease: Lease) -> float:
+        with self._lock:
+            limit = self._limit(lease.direction)
+            if not limit:
+                return 0
+            total = sum(l.weight for l in self._leases[lease.direction]) or lease.weight
+            return limit * lease.weight / total
+
+    def _limit(self, direction: str, now: Optional[time.struct_time] = None) -> int:
+        now = now or time.localtime()
+        minute = now.tm_hour * 60 + now.tm_min
+        index = DIRECTIONS.index(direction)
+        for start, end, *limits in self._schedule:
+            inside = start <= minute < end if start <= end else (minute >= start or minute < end)
+            if inside and limits[index] is not None:
+                return limits[index]
+        return self._limits[direction]
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter() -> BandwidthLimiter:
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = BandwidthLimiter()
+        return _limiter
+
+
+def upload_chunk_size(rate: float, default: int = 5 * 1024 * 1024) -> int:
+    # About two seconds of the job's share, in the 256 KiB multiples resumable
+    # uploads require, so a capped upload is paced smoothly instead of in bursts
+    if not rate:
+        return default
+    step = 256 * 1024
+    return max(step, min(default, int(rate * 2) // step * step))
@@ -0,0 +1,269 @@
+# MIT License
+# Copyright (c)  2024 Brahim El Hamdaoui
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# Reproducible splitter benchmarks on synthetic media.
+#
+#   python benchmarks/bench_splitter.py --out results.json
+#   python benchmarks/bench_splitter.py --compare results.json   # flag regressions
+#
+# Inputs are generated locally with ffmpeg's lavfi testsrc2/sine sources, so
+# every machine benchmarks the same content. Each split runs in a fresh child
+# process: its wall time, throughput (source seconds per wall second), time
+# per segment and peak RSS (Python and its ffmpeg children) are written as JSON.
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+# Synthetic inputs: (duration seconds, GOP length in frames, resolution)
+PROFILES = {
+    'quick': {
+        'inputs': [(60, 50, '640x360'), (60, 250, '640x360')],
+        'modes': ['copy', 'accurate'],
+        'chapters': [2, 20, 200],
+    },
+    'full': {
+        'inputs': [(60, 50, '640x360'), (600, 50, '640x360'), (600, 250, '1280x720'), (1800, 250, '1280x720')],
+        'modes': ['copy', 'accurate'],
+        'chapters': [2, 20, 200],
+    },
+}
+FPS = 25
+
+# Relative change that counts as a regression in --compare
+DEFAULT_THRESHOLD = 0.15
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the splitter on synthetic media.')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='quick',
+                        help='input matrix to run (default: quick)')
+    parser.add_argument('--modes', help='comma separated cut modes (default: from the profile)')
+    parser.add_argument('--chapters', help='comma separated chapter counts (default: 2,20,200)')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per case; the median is kept (default: 3)')
+    parser.add_argument('--jobs', type=int, default=0, help='ffmpeg processes per split (default: core count)')
+    parser.add_argument('--workdir', default=os.path.join(tempfile.gettempdir(), 'video_manager_bench'),
+                        help='where generated inputs are kept between runs')
+    parser.add_argument('--out', help='write results as JSON to this file')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='compare with a stored result file and exit non-zero on regressions')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='relative slowdown or memory growth flagged as a regression (default: 0.15)')
+    parser.add_argument('--run-case', help=argparse.SUPPRESS)
+    opts = parser.parse_args(argv)
+
+    if opts.run_case:
+        return _run_case(json.loads(opts.run_case))
+    if shutil.which('ffmpeg') is None:
+        print('ffmpeg is required', file=sys.stderr)
+        return 2
+
+    profile = PROFILES[opts.profile]
+    modes = opts.modes.split(',') if opts.modes else profile['modes']
+    counts = [int(n) for n in opts.chapters.split(',')] if opts.chapters else profile['chapters']
+    os.makedirs(opts.workdir, exist_ok=True)
+
+    results = []
+    for duration, gop, size in profile['inputs']:
+        source = _generate(opts.workdir, duration, gop, size)
+        for mode in modes:
+            for count in counts:
+                case = {
+                    'id': f"{mode}/{duration}s-g{gop}-{size}/{count}ch",
+                    'video': source,
+                    'duration': duration,
+                    'gop': gop,
+                    'size': size,
+                    'mode': mode,
+                    'chapters': count,
+                    'jobs': opts.jobs,
+                }
+                runs = [_spawn_case(case) for _ in range(max(1, opts.repeat))]
+                result = _summarise(case, runs)
+                results.append(result)
+                print(f"{result['id']:<40} {result['wall']:8.3f}s  {result['throughput']:8.1f}x  "
+                      f"{result['seconds_per_segment'] * 1000:8.1f} ms/seg  {result['peak_rss_kb'] or 0:>8} KB",
+                      flush=True)
+
+    report = {'meta': _meta(opts), 'results': results, 'overhead': _overhead(results)}
+    if opts.out:
+        with open(opts.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if opts.compare:
+        with open(opts.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        return 1 if _compare(baseline, report, opts.threshold) else 0
+    return 0
+
+
+def _generate(workdir, duration, gop, size):
+    # Deterministic test pattern and tone; reused across runs
+    path = os.path.join(workdir, f"src_{duration}s_g{gop}_{size}.mp4")
+    if os.path.isfile(path):
+        return path
+    tmp = path + '.partial.mp4'
+    subprocess.run([
+        'ffmpeg', '-y', '-v', 'error',
+        '-f', 'lavfi', '-i', f"testsrc2=size={size}:rate={FPS}:duration={duration}",
+        '-f', 'lavfi', '-i', f"sine=frequency=440:sample_rate=48000:duration={duration}",
+        '-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p',
+        '-g', str(gop), '-keyint_min', str(gop), '-sc_threshold', '0',
+        '-c:a', 'aac', '-shortest', tmp,
+    ], check=True)
+    os.replace(tmp, path)
+    return path
+
+
+def _spawn_case(case):
+    # A fresh interpreter per run keeps peak RSS and caches independent
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--run-case', json.dumps(case)],
+        stdout=subprocess.PIPE, check=True, universal_newlines=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _run_case(case):
+    from split_engine import SplitEngine
+
+    duration = float(case['duration'])
+    count = int(case['chapters'])
+    chapters = [(round(i * duration / count, 3), f"Part {i + 1:03d}") for i in range(count)]
+    chapters.append((duration, 'End'))
+    dest = tempfile.mkdtemp(prefix='bench_split_')
+    try:
+        # The segment cache would turn repeats into file copies
+        engine = SplitEngine(case['video'], chapters, dest, mode=case['mode'],
+                             jobs=case.get('jobs') or None, use_cache=False)
+        started = time.perf_counter()
+        engine.run()
+        wall = time.perf_counter() - started
+    finally:
+        shutil.rmtree(dest, ignore_errors=True)
+    print(json.dumps({'wall': wall, 'peak_rss_kb': _peak_rss_kb()}))
+    return 0
+
+
+def _peak_rss_kb():
+    # Largest of this process and any ffmpeg child it waited for
+    try:
+        import resource
+    except ImportError:
+        return None
+    scale = 1024 if sys.platform == 'darwin' else 1  # bytes on macOS, KB elsewhere
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return int(max(own, children) / scale)
+
+
+def _summarise(case, runs):
+    wall = statistics.median(r['wall'] for r in runs)
+    rss = [r['peak_rss_kb'] for r in runs if r.get('peak_rss_kb') is not None]
+    return {
+        'id': case['id'],
+        'mode': case['mode'],
+        'input': {'duration': case['duration'], 'gop': case['gop'], 'size': case['size']},
+        'chapters': case['chapters'],
+        'runs': len(runs),
+        'wall': round(wall, 4),
+        'wall_min': round(min(r['wall'] for r in runs), 4),
+        'throughput': round(case['duration'] / max(wall, 1e-9), 2),
+        'seconds_per_segment': round(wall / case['chapters'], 5),
+        'peak_rss_kb': max(rss) if rss else None,
+    }
+
+
+def _overhead(results):
+    # Fixed cost of one more segment: slope of wall time between the smallest
+    # and largest chapter count of the same input and mode
+    groups = {}
+    for r in results:
+        key = f"{r['mode']}/{r['input']['duration']}s-g{r['input']['gop']}-{r['input']['size']}"
+        groups.setdefault(key, []).append(r)
+    overhead = {}
+    for key, rows in groups.items():
+        rows = sorted(rows, key=lambda r: r['chapters'])
+        if len(rows) >= 2 and rows[-1]['chapters'] > rows[0]['chapters']:
+            slope = (rows[-1]['wall'] - rows[0]['wall']) / (rows[-1]['chapters'] - rows[0]['chapters'])
+            overhead[key] = round(slope, 5)
+    return overhead
+
+
+def _compare(baseline, report, threshold) -> bool:
+    # Prints a comparison table; returns True when anything regressed
+    base = {r['id']: r for r in baseline.get('results', [])}
+    regressed = False
+    print(f"\n{'case':<40} {'throughput':>22} {'peak RSS (KB)':>24}")
+    for r in report['results']:
+        b = base.get(r['id'])
+        if b is None:
+            print(f"{r['id']:<40} {'(no baseline)':>22}")
+            continue
+        flags = []
+        tp_change = r['throughput'] / max(b['throughput'], 1e-9) - 1.0
+        if tp_change < -threshold:
+            flags.append('SLOWER')
+        rss_change = None
+        if r.get('peak_rss_kb') and b.get('peak_rss_kb'):
+            rss_change = r['peak_rss_kb'] / b['peak_rss_kb'] - 1.0
+            if rss_change > threshold:
+                flags.append('MORE MEMORY')
+        regressed = regressed or bool(flags)
+        rss_text = f"{b.get('peak_rss_kb')} -> {r.get('peak_rss_kb')}"
+        if rss_change is not None:
+            rss_text += f" ({rss_change:+.0%})"
+        print(f"{r['id']:<40} {b['throughput']:>8.1f} -> {r['throughput']:<6.1f} ({tp_change:+.0%}) "
+              f"{rss_text:>24}  {' '.join(flags)}")
+    if baseline.get('meta', {}).get('machine') != report['meta'].get('machine'):
+        print('\nNote: baseline was recorded on a different machine; compare with care.')
+    print('\nRegressions found.' if regressed else '\nNo regressions.')
+    return regressed
+
+
+def _meta(opts):
+    try:
+        version = subprocess.run(['ffmpeg', '-version'], stdout=subprocess.PIPE,
+                                 universal_newlines=True).stdout.splitlines()[0]
+    except Exception:
+        version = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'profile': opts.profile,
+        'repeat': opts.repeat,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': f"{platform.node()} {platform.machine()} {os.cpu_count()} cpus",
+        'ffmpeg': version,
+    }
+
+
+if __name__ == '__main__':
+    sys.exit(main())
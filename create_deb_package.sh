@@ -2,7 +2,7 @@
 
 # Set variables
 APP_NAME="video-manager"  # Changed to hyphen for debian package naming rules
-MAIN_FILE="video_manager.py"
+MAIN_FILE="video_manager_cli.py"  # dispatches to the GUI or a headless subcommand
 ICON_PATH="./icons/icon.png"
 CONFIG_DIR="config"  # Adjust based on your project structure.
 VERSION=$(grep -oP '(?<=__version__ = ")[^"]+' __version__.py)
@@ -30,9 +30,26 @@ pyinstaller --onefile --name "$OUTPUT_EXEC" \
             --add-data "icons:icons" \
             --add-data "styles:styles" \
             --add-data "youtube_downloader.py:." \
+            --add-data "download_queue.py:." \
+            --add-data "extraction_cache.py:." \
+            --add-data "download_archive.py:." \
+            --add-data "bandwidth.py:." \
+            --add-data "download_journal.py:." \
+            --add-data "range_downloader.py:." \
+            --add-data "upload_queue.py:." \
             --add-data "video_splitter.py:." \
+            --add-data "video_joiner.py:." \
+            --add-data "join_engine.py:." \
             --add-data "video_editor.py:." \
             --add-data "youtube_uploader.py:." \
+            --add-data "probe_cache.py:." \
+            --add-data "split_engine.py:." \
+            --add-data "split_points.py:." \
+            --add-data "segment_cache.py:." \
+            --add-data "pipeline.py:." \
+            --add-data "progress_bus.py:." \
+            --add-data "job_scheduler.py:." \
+            --add-data "video_manager.py:." \
             --hidden-import yt_dlp \
             --hidden-import moviepy \
             --hidden-import moviepy.video \
@@ -0,0 +1,201 @@
+# MIT License
+# Copyright (c)  2024 Brahim El Hamdaoui
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# Index of finished downloads, keyed by extractor + video id and by the
+# resolution cap they were fetched with, so a repeated ingest resolves to the
+# file already on disk instead of downloading it again. Kept in SQLite under
+# ~/.video_manager/ and shared by the GUI and the headless commands.
+import os
+import time
+import sqlite3
+import threading
+from typing import List, Optional, Tuple
+
+
+ARCHIVE_PATH = os.path.join(os.path.expanduser("~"), ".video_manager", "download_archive.sqlite3")
+
+# Extractors whose video id can be read from the URL without a request
+_URL_ID_EXTRACTORS = ('Youtube',)
+
+_COLUMNS = ('extractor', 'video_id', 'max_height', 'path', 'url', 'title', 'height', 'size', 'added')
+
+
+class DownloadArchive:
+    def __init__(self, path: str = ARCHIVE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        if not self._initialized:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS downloads ('
+                ' extractor TEXT NOT NULL,'
+                ' video_id TEXT NOT NULL,'
+                ' max_height TEXT NOT NULL,'
+                ' path TEXT NOT NULL,'
+                ' url TEXT,'
+                ' title TEXT,'
+                ' height INTEGER,'
+                ' size INTEGER,'
+                ' added REAL NOT NULL,'
+                ' PRIMARY KEY (extractor, video_id, max_height))'
+            )
+            # URLs seen for each video, so other sites resolve without extracting
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS urls ('
+                ' url TEXT PRIMARY KEY,'
+                ' extractor TEXT NOT NULL,'
+                ' video_id TEXT NOT NULL)'
+            )
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def lookup(self, extractor: str, video_id: str, max_height) -> Optional[dict]:
+        # The archived download, provided its file still exists
+        if not extractor or not video_id:
+            return None
+        row = self._query(
+            f"SELECT {', '.join(_COLUMNS)} FROM downloads WHERE extractor = ? AND video_id = ? AND max_height = ?",
+            (extractor, str(video_id), str(max_height)),
+        )
+        if not row:
+            return None
+        entry = dict(zip(_COLUMNS, row[0]))
+        if not os.path.isfile(entry['path']):
+            self.forget(extractor, video_id, max_height)
+            return None
+        return entry
+
+    def versions(self, extractor: str, video_id: str) -> List[dict]:
+        # Every archived resolution of a video whose file still exists
+        rows = self._query(
+            f"SELECT {', '.join(_COLUMNS)} FROM downloads WHERE extractor = ? AND video_id = ? ORDER BY max_height",
+            (extractor, str(video_id)),
+        )
+        return [e for e in (dict(zip(_COLUMNS, row)) for row in rows) if os.path.isfile(e['path'])]
+
+    def lookup_url(self, url: str, max_height) -> Optional[dict]:
+        # No network: the id comes from the URL itself or from an earlier download
+        key = self.key_for_url(url)
+        return self.lookup(*key, max_height) if key else None
+
+    def key_for_url(self, url: str) -> Optional[Tuple[str, str]]:
+        key = video_key(url)
+        if key:
+            return key
+        row = self._query('SELECT extractor, video_id FROM urls WHERE url = ?', (url,))
+        return tuple(row[0]) if row else None
+
+    def record(self, extractor: str, video_id: str, max_height, path: str, url: str = '',
+               title: str = '', height: Optional[int] = None):
+        if not extractor or not video_id or not path:
+            return
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        self._execute(
+            f"INSERT OR REPLACE INTO downloads ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+            (extractor, str(video_id), str(max_height), os.path.abspath(path), url, title, height, size, time.time()),
+        )
+        if url:
+            self.remember_url(url, extractor, video_id)
+
+    def remember_url(self, url: str, extractor: str, video_id: str):
+        if url and extractor and video_id:
+            self._execute('INSERT OR REPLACE INTO urls (url, extractor, video_id) VALUES (?, ?, ?)',
+                          (url, extractor, str(video_id)))
+
+    def forget(self, extractor: str, video_id: str, max_height=None) -> int:
+        if max_height is None:
+            return self._execute('DELETE FROM downloads WHERE extractor = ? AND video_id = ?',
+                                 (extractor, str(video_id)))
+        return self._execute('DELETE FROM downloads WHERE extractor = ? AND video_id = ? AND max_height = ?',
+                             (extractor, str(video_id), str(max_height)))
+
+    def entries(self, search: str = '') -> List[dict]:
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM downloads"
+        params = ()
+        if search:
+            sql += ' WHERE title LIKE ? OR video_id = ? OR url = ? OR path LIKE ?'
+            pattern = f"%{search}%"
+            params = (pattern, search, search, pattern)
+        return [dict(zip(_COLUMNS, row)) for row in self._query(sql + ' ORDER BY added', params)]
+
+    def prune(self) -> int:
+        # Drops entries whose file has been deleted or moved
+        stale = [e for e in self.entries() if not os.path.isfile(e['path'])]
+        for entry in stale:
+            self.forget(entry['extractor'], entry['video_id'], entry['max_height'])
+        return len(stale)
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            try:
+                conn = self._connect()
+                try:
+                    return conn.execute(sql, params).fetchall()
+                finally:
+                    conn.close()
+            except sqlite3.Error:
+                return []
+
+    def _execute(self, sql, params=()) -> int:
+        # The archive is an optimisation only; never fail the caller over it
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                conn = self._connect()
+                try:
+                    with conn:
+                        return conn.execute(sql, params).rowcount
+                finally:
+                    conn.close()
+            except (OSError, sqlite3.Error):
+                return 0
+
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def get_download_archive() -> DownloadArchive:
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = DownloadArchive()
+        return _archive
+
+
+def video_key(url: str) -> Optional[Tuple[str, str]]:
+    # (extractor, video id) read from the URL alone, for sites where that is reliable
+    try:
+        from yt_dlp.extractor import get_info_extractor
+        for key in _URL_ID_EXTRACTORS:
+            video_id = get_info_extractor(key).get_temp_id(url)
+            if video_id:
+                return key, video_id
+    except Exception:
+        pass
+    return None
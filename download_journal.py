@@ -0,0 +1,149 @@
+# MIT License
+# Copyright (c)  2024 Brahim El Hamdaoui
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# Journal of downloads in flight: URL, player client, chosen format ids,
+# .part files and the last known byte and fragment position. yt-dlp resumes
+# a .part file (and a fragmented download's .ytdl state) only when the same
+# formats produce the same file names, so a restarted download asks the
+# journal which ones it had picked. Entries still marked active when the app
+# starts were cut short by a crash or quit and are offered for resume.
+import os
+import json
+import time
+import threading
+from typing import List, Optional
+
+from range_downloader import fetched_bytes
+
+
+JOURNAL_PATH = os.path.join(os.path.expanduser("~"), ".video_manager", "inflight_downloads.json")
+
+# Progress-only updates are written at most this often
+_SAVE_INTERVAL = 5.0
+
+
+class DownloadJournal:
+    def __init__(self, path: str = JOURNAL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._saved_at = 0.0
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self._entries = {k: v for k, v in (json.load(f) or {}).items() if isinstance(v, dict)}
+        except (OSError, ValueError, AttributeError):
+            self._entries = {}
+        # Active before this process started means interrupted
+        self._interrupted = {k for k, v in self._entries.items() if v.get('active')}
+
+    def get(self, url: str, out_dir: str, max_height) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(_key(url, out_dir, max_height))
+            return dict(entry) if entry else None
+
+    def begin(self, url: str, out_dir: str, max_height):
+        key = _key(url, out_dir, max_height)
+        with self._lock:
+            entry = self._entries.setdefault(key, {
+                'url': url, 'out_dir': out_dir, 'max_height': str(max_height), 'parts': [], 'started': time.time(),
+            })
+            entry['active'] = True
+            self._interrupted.discard(key)
+            self._save()
+
+    def update(self, url: str, out_dir: str, max_height, part: Optional[str] = None, **fields):
+        # A new part file or format is saved at once; byte and fragment
+        # positions only every few seconds
+        key = _key(url, out_dir, max_height)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            structural = part is not None and part not in entry['parts']
+            if structural:
+                entry['parts'].append(part)
+            for name, value in fields.items():
+                if name in ('client', 'format_id') and entry.get(name) != value:
+                    structural = True
+                entry[name] = value
+            entry['updated'] = time.time()
+            if structural or time.monotonic() - self._saved_at >= _SAVE_INTERVAL:
+                self._save()
+
+    def end(self, url: str, out_dir: str, max_height, done: bool):
+        # Finished downloads are forgotten; stopped ones keep their hints
+        key = _key(url, out_dir, max_height)
+        with self._lock:
+            if done:
+                self._entries.pop(key, None)
+            elif key in self._entries:
+                self._entries[key]['active'] = False
+            self._save()
+
+    def discard(self, url: str, out_dir: str, max_height):
+        key = _key(url, out_dir, max_height)
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._save()
+
+    def interrupted(self) -> List[dict]:
+        with self._lock:
+            return [dict(self._entries[k]) for k in self._interrupted if k in self._entries]
+
+    def clear_interrupted(self):
+        with self._lock:
+            for key in self._interrupted:
+                if key in self._entries:
+                    self._entries[key]['active'] = False
+            self._interrupted.clear()
+            self._save()
+
+    def _save(self):
+        # Never fail a download over the journal
+        self._saved_at = time.monotonic()
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+
+def _key(url: str, out_dir: str, max_height) -> str:
+    return '\n'.join((url, os.path.abspath(out_dir or '.'), str(max_height)))
+
+
+def part_bytes(entry: dict) -> int:
+    # Bytes already on disk for an entry's unfinished files
+    return sum(fetched_bytes(path) for path in entry.get('parts') or [])
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_download_journal() -> DownloadJournal:
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = DownloadJournal()
+        return _journal
@@ -0,0 +1,287 @@
+# MIT License
+# Copyright (c)  2024 Brahim El Hamdaoui
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# Persistent download queue used by the YouTube downloader. Items are kept in
+# SQLite under ~/.video_manager/ so a list of thousands of URLs survives a
+# restart; progress figures live in memory only and are never written out.
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from typing import Iterable, List, Optional
+
+
+QUEUE_PATH = os.path.join(os.path.expanduser("~"), ".video_manager", "download_queue.sqlite3")
+
+QUEUED = 'queued'
+RUNNING = 'running'
+PAUSED = 'paused'
+DONE = 'done'
+FAILED = 'failed'
+
+# States that still need work; a URL already in one of them is not queued twice
+PENDING = (QUEUED, RUNNING, PAUSED)
+
+# Playlist, channel and channel-tab URLs; expanded into their videos before queueing.  A watch link that
+# merely carries a list= parameter is a single video: the user pastes the /playlist link to get the playlist.
+_COLLECTION_RE = re.compile(
+    r'/playlist\?(?:[^#]*&)?list=|/(?:channel|c|user)/[^/?#]+|/@[^/?#]+/?(?:$|[?#]|/(?:videos|shorts|streams|playlists|featured)\b)'
+)
+
+_PERSISTED = ('url', 'out_dir', 'max_height', 'priority', 'state', 'attempts', 'error', 'title', 'filepath', 'seq',
+              'sections')
+
+
+class QueueItem:
+    __slots__ = _PERSISTED + ('id', 'percent', 'downloaded', 'total', 'speed', 'eta', 'waiting', 'split',
+                              'split_percent', 'split_note')
+
+    def __init__(self, id, url, out_dir, max_height, priority=0, state=QUEUED, attempts=0,
+                 error='', title='', filepath='', seq=0, sections=''):
+        self.id = id
+        self.url = url
+        self.out_dir = out_dir
+        self.max_height = max_height
+        self.priority = priority
+        self.state = state
+        self.attempts = attempts
+        self.error = error
+        self.title = title
+        self.filepath = filepath
+        self.seq = seq
+        self.sections = sections  # encoded chapter selection; empty for the whole video
+        self.percent = 100 if state == DONE else 0
+        self.downloaded = 0
+        self.total = 0
+        self.speed = None
+        self.eta = None
+        self.waiting = False  # submitted but held back by the resource scheduler
+        # Chapter split after the download: '', 'waiting', 'running', 'done' or 'failed'
+        self.split = ''
+        self.split_percent = 0
+        self.split_note = ''  # part count when done, error when failed
+
+
+class DownloadQueue:
+    # Owned by the GUI thread; workers report back through signals rather than
+    # touching items directly.
+    def __init__(self, path: str = QUEUE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self.items: List[QueueItem] = []
+        self._by_id = {}
+        self.interrupted: List[QueueItem] = []  # running when the app last stopped
+        self._load()
+
+    def fresh(self, urls: Iterable[str], sections: str = '') -> List[str]:
+        # The URLs that add() would actually queue, in order; a chapter
+        # selection is a different download from the whole video
+        pending = {(item.url, item.sections) for item in self.items if item.state in PENDING}
+        result = []
+        for url in urls:
+            if (url, sections) not in pending:
+                pending.add((url, sections))
+                result.append(url)
+        return result
+
+    def add(self, urls: Iterable[str], out_dir: str, max_height: str, priority: int = 0,
+            titles: Optional[dict] = None, sections: str = '') -> List[QueueItem]:
+        # titles optionally maps a URL to the name shown until the download reports its own
+        seq = max((item.seq for item in self.items), default=0)
+        added = []
+        for url in self.fresh(urls, sections):
+            seq += 1
+            added.append(QueueItem(None, url, out_dir, str(max_height), priority=priority, seq=seq,
+                                   title=(titles or {}).get(url) or '', sections=sections))
+        if not added:
+            return []
+        with self._lock:
+            conn = self._connect()
+            if conn is not None:
+                try:
+                    with conn:
+                        for item in added:
+                            item.id = conn.execute(
+                                "INSERT INTO items (url, out_dir, max_height, priority, state, attempts, error,"
+                                " title, filepath, seq, sections, added) VALUES (?, ?, ?, ?, ?, 0, '', ?, '', ?, ?, ?)",
+                                (item.url, item.out_dir, item.max_height, item.priority, item.state,
+                                 item.title, item.seq, item.sections, time.time()),
+                            ).lastrowid
+                except sqlite3.Error:
+                    conn = None
+            if conn is None:
+                # Keep working in memory when the database is unavailable
+                base = max(self._by_id, default=0)
+                for n, item in enumerate(added, start=1):
+                    item.id = base + n
+        self.items.extend(added)
+        for item in added:
+            self._by_id[item.id] = item
+        return added
+
+    def get(self, item_id) -> Optional[QueueItem]:
+        return self._by_id.get(item_id)
+
+    def next_ready(self) -> Optional[QueueItem]:
+        # Highest priority first, then oldest
+        best = None
+        for item in self.items:
+            if item.state == QUEUED and (best is None or (item.priority, -item.seq) > (best.priority, -best.seq)):
+                best = item
+        return best
+
+    def update(self, item: QueueItem, **fields):
+        for name, value in fields.items():
+            setattr(item, name, value)
+        persisted = [name for name in fields if name in _PERSISTED]
+        if not persisted or item.id not in self._by_id:
+            return
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                with conn:
+                    conn.execute(
+                        f"UPDATE items SET {', '.join(f'{name} = ?' for name in persisted)} WHERE id = ?",
+                        [getattr(item, name) for name in persisted] + [item.id],
+                    )
+            except sqlite3.Error:
+                pass
+
+    def remove(self, items: Iterable[QueueItem]):
+        ids = {item.id for item in items}
+        if not ids:
+            return
+        self.items = [item for item in self.items if item.id not in ids]
+        for item_id in ids:
+            self._by_id.pop(item_id, None)
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                with conn:
+                    conn.executemany('DELETE FROM items WHERE id = ?', [(i,) for i in ids])
+            except sqlite3.Error:
+                pass
+
+    def counts(self) -> dict:
+        counts = dict.fromkeys((QUEUED, RUNNING, PAUSED, DONE, FAILED), 0)
+        for item in self.items:
+            counts[item.state] += 1
+        return counts
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS items ('
+                    ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+                    ' url TEXT NOT NULL,'
+                    ' out_dir TEXT NOT NULL,'
+                    ' max_height TEXT NOT NULL,'
+                    ' priority INTEGER NOT NULL DEFAULT 0,'
+                    ' state TEXT NOT NULL,'
+                    ' attempts INTEGER NOT NULL DEFAULT 0,'
+                    " error TEXT NOT NULL DEFAULT '',"
+                    " title TEXT NOT NULL DEFAULT '',"
+                    " filepath TEXT NOT NULL DEFAULT '',"
+                    ' seq INTEGER NOT NULL,'
+                    " sections TEXT NOT NULL DEFAULT '',"
+                    ' added REAL NOT NULL)'
+                )
+                columns = {row[1] for row in conn.execute('PRAGMA table_info(items)')}
+                if 'sections' not in columns:
+                    # Queues saved before chapter selections existed
+                    conn.execute("ALTER TABLE items ADD COLUMN sections TEXT NOT NULL DEFAULT ''")
+                conn.commit()
+                self._conn = conn
+            except sqlite3.Error:
+                return None
+        return self._conn
+
+    def _load(self):
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                rows = conn.execute(
+                    f"SELECT id, {', '.join(_PERSISTED)} FROM items ORDER BY seq"
+                ).fetchall()
+                # Downloads cut short by a quit or crash wait until the user
+                # chooses to resume them
+                with conn:
+                    conn.execute('UPDATE items SET state = ? WHERE state = ?', (PAUSED, RUNNING))
+            except sqlite3.Error:
+                return
+        for row in rows:
+            fields = dict(zip(('id',) + _PERSISTED, row))
+            interrupted = fields['state'] == RUNNING
+            if interrupted:
+                fields['state'] = PAUSED
+            item = QueueItem(**fields)
+            if interrupted:
+                self.interrupted.append(item)
+            self.items.append(item)
+            self._by_id[item.id] = item
+
+
+def parse_urls(text: str) -> List[str]:
+    # Pasted lists may be separated by newlines, spaces or commas
+    urls, seen = [], set()
+    for token in (text or '').replace(',', ' ').split():
+        token = token.strip('<>"\'')
+        if token.startswith(('http://', 'https://')) and token not in seen:
+            seen.add(token)
+            urls.append(token)
+    return urls
+
+
+def is_collection_url(url: str) -> bool:
+    return bool(_COLLECTION_RE.search(url or ''))
+
+
+def encode_sections(chapters, exact: bool = False) -> str:
+    # chapters: (start, end, title) in seconds, in the order they are fetched
+    return json.dumps({'chapters': [[float(start), float(end), title] for start, end, title in chapters],
+                       'exact': bool(exact)}, ensure_ascii=False)
+
+
+def decode_sections(text: str) -> Optional[dict]:
+    # {'chapters': [(start, end, title), ...], 'exact': bool}, or None for the whole video
+    try:
+        data = json.loads(text) if text else None
+        return {'chapters': [tuple(c) for c in data['chapters']], 'exact': bool(data.get('exact'))}
+    except (ValueError, KeyError, TypeError):
+        return None
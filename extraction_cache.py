@@ -0,0 +1,140 @@
+# MIT License
+# Copyright (c)  2024 Brahim El Hamdaoui
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# In-memory cache of yt-dlp extraction results, plus the player client that
+# last worked for each extractor. A cached info dict is downloaded with
+# process_ie_result, so retrying another format or resuming a queue item does
+# not fetch the page again. Entries expire well before the signed stream URLs
+# inside them; only the client preferences are written to ~/.video_manager/.
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Sequence
+
+
+CLIENTS_PATH = os.path.join(os.path.expanduser("~"), ".video_manager", "extractor_clients.json")
+
+DEFAULT_TTL = 20 * 60
+MAX_ENTRIES = 256
+
+
+class ExtractionCache:
+    def __init__(self, ttl: float = DEFAULT_TTL, max_entries: int = MAX_ENTRIES, clients_path: str = CLIENTS_PATH):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clients_path = clients_path
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (url, client) -> (stored_at, info)
+        self._clients = None  # extractor key -> client that worked last
+
+    def get(self, url: str, client: Optional[str] = None) -> Optional[dict]:
+        key = (url, client)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, url: str, client: Optional[str], info: dict):
+        with self._lock:
+            self._entries[(url, client)] = (time.monotonic(), info)
+            self._entries.move_to_end((url, client))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, url: str, client: Optional[str] = None):
+        with self._lock:
+            self._entries.pop((url, client), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def client_order(self, extractor: str, clients: Sequence[str]) -> List[str]:
+        # The client that worked last for this extractor goes first
+        with self._lock:
+            preferred = self._load_clients().get(extractor)
+        order = list(clients)
+        if preferred in order:
+            order.remove(preferred)
+            order.insert(0, preferred)
+        return order
+
+    def remember_client(self, extractor: str, client: Optional[str]):
+        if not extractor or not client:
+            return
+        with self._lock:
+            clients = self._load_clients()
+            if clients.get(extractor) == client:
+                return
+            clients[extractor] = client
+            # Preferences are an optimisation only; never fail the download over them
+            try:
+                os.makedirs(os.path.dirname(self.clients_path), exist_ok=True)
+                tmp = self.clients_path + '.tmp'
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(clients, f)
+                os.replace(tmp, self.clients_path)
+            except OSError:
+                pass
+
+    def _load_clients(self) -> dict:
+        if self._clients is None:
+            try:
+                with open(self.clients_path, 'r', encoding='utf-8') as f:
+                    self._clients = dict(json.load(f))
+            except (OSError, ValueError, TypeError):
+                self._clients = {}
+        return self._clients
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_extraction_cache() -> ExtractionCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ExtractionCache()
+        return _cache
+
+
+# Extractors whose player_client argument changes what an extraction returns
+CLIENT_EXTRACTORS = ('Youtube',)
+
+
+def client_extractor(url: str) -> Optional[str]:
+    # Key of the client-aware extractor that handles the URL, or None when
+    # trying several clients would only repeat the same extraction
+    try:
+        from yt_dlp.extractor import get_info_extractor
+        for key in CLIENT_EXTRACTORS:
+            if get_info_extractor(key).suitable(url):
+                return key
+    except Exception:
+        pass
+    return None
@@ -0,0 +1,202 @@
+# MIT License
+# Copyright (c)  2024 Brahim El Hamdaoui
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# Central, resource-aware job scheduler. Every tool submits its work here
+# instead of starting a QThread straight away; jobs declare how much CPU, disk
+# and network they need and are admitted while the per-resource budgets allow.
+# Network-bound downloads and uploads therefore keep the link busy while
+# encodes fill the remaining cores. Qt-free; the GUI calls it from its thread.
+import os
+import threading
+from typing import Callable, Optional
+
+
+CPU = 'cpu'
+DISK = 'disk'
+NETWORK = 'network'
+RESOURCES = (CPU, DISK, NETWORK)
+
+
+def default_budgets() -> dict:
+    return {CPU: os.cpu_count() or 1, DISK: 2, NETWORK: 4}
+
+
+def split_demands(mode: str, jobs: int) -> dict:
+    # Copy splits are disk-bound; re-encodes claim one core per ffmpeg process
+    demands = {DISK: 1} if mode == 'copy' else {CPU: max(1, int(jobs or 1))}
+    if mode == 'smart':
+        demands[DISK] = 1
+    return demands
+
+
+class _Job:
+    __slots__ = ('job_id', 'demands', 'start', 'label', 'pause', 'resume', 'renice', 'seq')
+
+    def __init__(self, job_id, demands, start, label, pause, resume, renice, seq):
+        self.job_id = job_id
+        self.demands = demands
+        self.start = start
+        self.label = label
+        self.pause = pause
+        self.resume = resume
+        self.renice = renice
+        self.seq = seq
+
+    @property
+    def kind(self):
+        # The resource a job is mostly bound by, used for pause/renice classes
+        return max(self.demands, key=lambda r: (self.demands[r], r == CPU)) if self.demands else ''
+
+
+class JobScheduler:
+    def __init__(self, budgets: Optional[dict] = None, on_change: Optional[Callable[[], None]] = None):
+        self.budgets = default_budgets()
+        self.budgets.update(budgets or {})
+        self.on_change = on_change
+        self._lock = threading.RLock()
+        self._queue = []
+        self._running = {}
+        self._used = {r: 0 for r in RESOURCES}
+        self._seq = 0
+        self._paused = set()  # resource classes whose running jobs are paused
+        self._niceness = {}  # resource class -> niceness applied to its jobs
+
+    def submit(self, job_id, demands: dict, start: Callable[[], None], label: str = '',
+               pause: Optional[Callable[[], None]] = None, resume: Optional[Callable[[], None]] = None,
+               renice: Optional[Callable[[int], None]] = None) -> bool:
+        # Returns True when the job was started immediately, False when queued.
+        # Demands above a budget are clamped so a big job can still run alone.
+        with self._lock:
+            clamped = {r: min(int(n), max(1, self.budgets.get(r, 1))) for r, n in (demands or {}).items() if n}
+            self._seq += 1
+            job = _Job(job_id, clamped, start, label, pause, resume, renice, self._seq)
+            self._queue.append(job)
+            self._admit()
+            started = job_id in self._running
+        self._changed()
+        return started
+
+    def finish(self, job_id):
+        # Release the job's resources (or drop it from the queue) and admit others
+        with self._lock:
+            job = self._running.pop(job_id, None)
+            if job is not None:
+                for r, n in job.demands.items():
+                    self._used[r] = max(0, self._used.get(r, 0) - n)
+            else:
+                self._queue = [j for j in self._queue if j.job_id != job_id]
+            self._admit()
+        self._changed()
+
+    def is_queued(self, job_id) -> bool:
+        with self._lock:
+            return any(j.job_id == job_id for j in self._queue)
+
+    def set_budget(self, resource: str, value: int):
+        with self._lock:
+            self.budgets[resource] = max(1, int(value))
+            self._admit()
+        self._changed()
+
+    def set_paused(self, resource: str, paused: bool):
+        # Pause (SIGSTOP) or resume the running jobs of one class, e.g. encodes
+        with self._lock:
+            if paused:
+                self._paused.add(resource)
+            else:
+                self._paused.discard(resource)
+            jobs = [j for j in self._running.values() if j.kind == resource]
+        for job in jobs:
+            hook = job.pause if paused else job.resume
+            if hook is not None:
+                _call_quietly(hook)
+        self._changed()
+
+    def set_niceness(self, resource: str, niceness: int):
+        # Lower the OS priority of a class so interactive and network work stays snappy
+        with self._lock:
+            self._niceness[resource] = niceness
+            jobs = [j for j in self._running.values() if j.kind == resource]
+        for job in jobs:
+            if job.renice is not None:
+                _call_quietly(job.renice, niceness)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'running': [(j.job_id, j.label, dict(j.demands)) for j in self._running.values()],
+                'queued': [(j.job_id, j.label, dict(j.demands)) for j in self._queue],
+                'used': dict(self._used),
+                'budgets': dict(self.budgets),
+                'paused': sorted(self._paused),
+            }
+
+    def _admit(self):
+        # FIFO per resource: once a job is blocked on a resource, later jobs
+        # needing that resource wait behind it (no starvation of big jobs),
+        # while jobs bound by other resources may still start.
+        blocked = set()
+        for job in list(self._queue):
+            if job not in self._queue:
+                # Admitted or finished by a re-entrant call from job.start()
+                continue
+            if any(r in blocked for r in job.demands):
+                blocked.update(job.demands)
+                continue
+            if all(self._used.get(r, 0) + n <= self.budgets.get(r, 1) for r, n in job.demands.items()):
+                self._queue.remove(job)
+                for r, n in job.demands.items():
+                    self._used[r] = self._used.get(r, 0) + n
+                self._running[job.job_id] = job
+                job.start()
+                niceness = self._niceness.get(job.kind)
+                if niceness and job.renice is not None:
+                    _call_quietly(job.renice, niceness)
+                if job.kind in self._paused and job.pause is not None:
+                    _call_quietly(job.pause)
+            else:
+                blocked.update(job.demands)
+
+    def _changed(self):
+        if self.on_change is not None:
+            _call_quietly(self.on_change)
+
+
+def _call_quietly(fn, *args):
+    try:
+        fn(*args)
+    except Exception:
+        pass
+
+
+def submit_job(main_window, job_id, demands: dict, start: Callable[[], None], **hooks) -> bool:
+    # Submit through the main window's scheduler, or start right away when the
+    # tool runs without one. Returns True when the job started immediately.
+    scheduler = getattr(main_window, 'scheduler', None)
+    if scheduler is None:
+        start()
+        return True
+    return scheduler.submit(job_id, demands, start, **hooks)
+
+
+def release_job(main_window, job_id):
+    scheduler = getattr(main_window, 'scheduler', None)
+    if scheduler is not None and job_id:
+        scheduler.finish(job_id)
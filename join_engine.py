@@ -0,0 +1,218 @@
+# MIT License
+# Copyright (c)  2024 Brahim El Hamdaoui
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# Lossless joining with ffmpeg's concat demuxer. Inputs whose codec parameters
+# match are stream-copied; only the odd ones out are re-encoded to match the
+# majority first, so joining recordings from the same source is pure I/O.
+# Qt-free, like split_engine, whose ffmpeg runner and progress parsing it shares.
+import os
+import shutil
+import tempfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Optional
+
+from probe_cache import get_probe_cache
+from split_engine import FFmpegRunner
+
+
+# Encoders able to reproduce a reference stream's codec
+_VIDEO_ENCODERS = {'h264': 'libx264', 'hevc': 'libx265', 'vp9': 'libvpx-vp9', 'mpeg4': 'mpeg4'}
+_AUDIO_ENCODERS = {'aac': 'aac', 'opus': 'libopus', 'mp3': 'libmp3lame', 'vorbis': 'libvorbis', 'ac3': 'ac3'}
+
+# Relative cost of stream-copying a second of media compared to encoding it
+_COPY_WEIGHT = 0.05
+
+
+def stream_signature(info: Optional[dict]):
+    # Parameters that must be identical for the concat demuxer to copy streams
+    streams = (info or {}).get('streams') or []
+    video = next((s for s in streams if s.get('codec_type') == 'video'), None)
+    audio = next((s for s in streams if s.get('codec_type') == 'audio'), None)
+    v = None
+    if video:
+        v = tuple(video.get(k) for k in ('codec_name', 'profile', 'pix_fmt', 'width', 'height', 'r_frame_rate'))
+    a = None
+    if audio:
+        a = tuple(audio.get(k) for k in ('codec_name', 'sample_rate', 'channels'))
+    return v, a
+
+
+class JoinEngine(FFmpegRunner):
+    def __init__(self, inputs, output_path: str, jobs: int = None,
+                 on_progress: Optional[Callable[[int, str], None]] = None):
+        super().__init__()
+        self.inputs = list(inputs)
+        self.output_path = output_path
+        # Number of mismatched inputs re-encoded at once
+        self.jobs = max(1, int(jobs or os.cpu_count() or 1))
+        # Called with (percent, current file name) from the worker threads
+        self.on_progress = on_progress
+        self.reencoded = []  # inputs that had to be conformed, once run() returns
+        self._done = {}
+        self._total = 0.0
+        self._last_percent = -1
+
+    def plan(self):
+        # Returns (reference probe, [(input, probe, matches reference)])
+        cache = get_probe_cache()
+        probes = []
+        for path in self.inputs:
+            info = cache.probe(path)
+            if not info or not info.get('streams'):
+                raise Exception(f"Cannot read media information for {os.path.basename(path)} (is ffprobe installed?)")
+            probes.append((path, info))
+        # The majority layout (by duration) is kept, the rest is converted to it
+        weights = Counter()
+        for path, info in probes:
+            weights[stream_signature(info)] += float(info.get('duration') or 1.0)
+        reference_sig = max(weights, key=lambda sig: (weights[sig], -_first_index(probes, sig)))
+        reference = next(info for _, info in probes if stream_signature(info) == reference_sig)
+        if reference_sig[0] is not None and reference_sig[0][0] not in _VIDEO_ENCODERS \
+                or reference_sig[1] is not None and reference_sig[1][0] not in _AUDIO_ENCODERS:
+            # Cannot reproduce the majority codec; copy only if everything matches
+            if len(weights) > 1:
+                reference = _h264_reference(reference)
+        return reference, [(path, info, stream_signature(info) == stream_signature(reference)) for path, info in probes]
+
+    def run(self):
+        # Blocks until the output is written; raises on failure or cancel
+        if len(self.inputs) < 2:
+            raise Exception('Select at least two files to join.')
+        reference, entries = self.plan()
+        durations = [float(info.get('duration') or 0.0) for _, info, _ in entries]
+        total_duration = sum(durations)
+        self._done = {}
+        self._total = max(1e-6, sum(d for d, (_, _, ok) in zip(durations, entries) if not ok)
+                          + _COPY_WEIGHT * total_duration)
+        self._last_percent = -1
+        self._emit(0, os.path.basename(self.inputs[0]))
+
+        out_dir = os.path.dirname(os.path.abspath(self.output_path))
+        tmp_dir = tempfile.mkdtemp(prefix='.join_', dir=out_dir)
+        try:
+            parts = [path for path, _, _ in entries]
+            mismatched = [(i, path, info) for i, (path, info, ok) in enumerate(entries) if not ok]
+            self.reencoded = [path for _, path, _ in mismatched]
+            if mismatched:
+                workers = min(self.jobs, len(mismatched))
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    futures = {
+                        pool.submit(self._conform, path, info, reference,
+                                    os.path.join(tmp_dir, f"{i:04d}.mp4"), durations[i]): i
+                        for i, path, info in mismatched
+                    }
+                    try:
+                        for fut in as_completed(futures):
+                            parts[futures[fut]] = fut.result()
+                    except Exception:
+                        self.cancel()
+                        raise
+
+            list_path = os.path.join(tmp_dir, 'inputs.txt')
+            with open(list_path, 'w', encoding='utf-8') as f:
+                for path in parts:
+                    f.write("file '" + os.path.abspath(path).replace("'", "'\\''") + "'\n")
+            partial = os.path.join(tmp_dir, 'joined' + (os.path.splitext(self.output_path)[1] or '.mp4'))
+            cmd = [
+                'ffmpeg', '-y', '-v', 'error',
+                '-f', 'concat', '-safe', '0', '-i', list_path,
+                '-map', '0:v?', '-map', '0:a?', '-c', 'copy',
+                '-progress', 'pipe:1', '-nostats', partial,
+            ]
+            self._run_ffmpeg(cmd, lambda out_s: self._report('concat', _COPY_WEIGHT * min(total_duration, out_s),
+                                                             os.path.basename(self.output_path)))
+            os.replace(partial, self.output_path)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        self._emit(100, '')
+
+    def _conform(self, path, info, reference, target, duration):
+        # Re-encode one input to the reference's codecs, size, rate and layout
+        cmd = ['ffmpeg', '-y', '-v', 'error', '-i', path]
+        ref_v, ref_a = stream_signature(reference)
+        has_audio = stream_signature(info)[1] is not None
+        if ref_a is not None and not has_audio:
+            # Silent track so every part has the same streams
+            layout = 'stereo' if (ref_a[2] or 2) >= 2 else 'mono'
+            cmd += ['-f', 'lavfi', '-i', f"anullsrc=r={ref_a[1] or 48000}:cl={layout}"]
+        if ref_v is not None:
+            codec, profile, pix_fmt, width, height, rate = ref_v
+            filters = []
+            if width and height:
+                filters.append(f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                               f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1")
+            if rate and rate != '0/0':
+                filters.append(f"fps={rate}")
+            cmd += ['-map', '0:v:0', '-c:v', _VIDEO_ENCODERS.get(codec, 'libx264')]
+            if filters:
+                cmd += ['-vf', ','.join(filters)]
+            if pix_fmt:
+                cmd += ['-pix_fmt', pix_fmt]
+            if codec == 'h264':
+                cmd += ['-preset', 'faster', '-crf', '18']
+                if profile and profile.lower() in ('baseline', 'main', 'high'):
+                    cmd += ['-profile:v', profile.lower()]
+        if ref_a is not None:
+            codec, sample_rate, channels = ref_a
+            cmd += ['-map', '1:a:0' if not has_audio else '0:a:0', '-c:a', _AUDIO_ENCODERS.get(codec, 'aac')]
+            if sample_rate:
+                cmd += ['-ar', str(sample_rate)]
+            if channels:
+                cmd += ['-ac', str(channels)]
+            if not has_audio:
+                cmd += ['-shortest']
+        else:
+            cmd += ['-an']
+        cmd += ['-sn', '-dn', '-progress', 'pipe:1', '-nostats', target]
+        name = os.path.basename(path)
+        self._run_ffmpeg(cmd, lambda out_s: self._report(path, min(duration, out_s), name))
+        self._report(path, duration, name)
+        return target
+
+    def _report(self, key, seconds, name):
+        with self._lock:
+            self._done[key] = seconds
+            percent = int(sum(self._done.values()) * 100 / self._total)
+            if percent == self._last_percent:
+                return
+            self._last_percent = percent
+        self._emit(min(99, percent), name)
+
+    def _emit(self, percent, name):
+        if self.on_progress is not None:
+            self.on_progress(percent, name)
+
+
+def _first_index(probes, sig):
+    return next(i for i, (_, info) in enumerate(probes) if stream_signature(info) == sig)
+
+
+def _h264_reference(reference: dict) -> dict:
+    # Same geometry as the reference, in codecs every part can be encoded to
+    streams = []
+    for s in reference.get('streams') or []:
+        s = dict(s)
+        if s.get('codec_type') == 'video':
+            s.update(codec_name='h264', profile='High', pix_fmt='yuv420p')
+        elif s.get('codec_type') == 'audio':
+            s.update(codec_name='aac')
+        streams.append(s)
+    return dict(reference, streams=streams)
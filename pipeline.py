@@ -0,0 +1,580 @@
+# MIT License
+# Copyright (c)  2024 Brahim El Hamdaoui
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# Download -> split -> upload pipeline. Each URL flows through the existing
+# workers as stages; a part is queued for upload as soon as the splitter has
+# written it, so the stages overlap and a multi-part republish takes about as
+# long as its slowest stage. Every stage has its own concurrency limit, and
+# jobs still go through the main window's resource scheduler.
+import os
+import json
+
+from PyQt5.QtWidgets import (
+    QWidget,
+    QVBoxLayout,
+    QHBoxLayout,
+    QFormLayout,
+    QLabel,
+    QLineEdit,
+    QPlainTextEdit,
+    QPushButton,
+    QProgressBar,
+    QFileDialog,
+    QComboBox,
+    QCheckBox,
+    QSpinBox,
+    QMessageBox,
+    QTreeWidget,
+    QTreeWidgetItem,
+    QHeaderView,
+)
+from PyQt5.QtGui import QFont
+from PyQt5.QtCore import Qt, QThread, QSettings
+
+from progress_bus import ensure_qt_pump, get_bus
+from job_scheduler import NETWORK, release_job, split_demands, submit_job
+from split_engine import find_info_json, safe_filename
+from youtube_downloader import _YTDLPWorker
+from video_splitter import _SplitWorker
+from youtube_uploader import _YouTubeUploadWorker
+from upload_queue import fill_template
+
+
+STAGES = ('download', 'split', 'upload')
+
+
+class _Task:
+    # One unit of work in a stage: a download, a split or a single part's upload
+    def __init__(self, stage, video, item, **payload):
+        self.stage = stage
+        self.video = video
+        self.item = item
+        self.payload = payload
+        self.worker = None
+        self.thread = None
+        self.job_id = None
+        self.percent = 0
+        self.failed = False
+
+
+class _Video:
+    # Per-URL state shared by its tasks
+    def __init__(self, url, item):
+        self.url = url
+        self.item = item
+        self.title = ''
+        self.tasks = []
+
+
+class PipelineWindow(QWidget):
+    def __init__(self, main_window):
+        super().__init__()
+        self.main_window = main_window
+        self.initUI()
+
+    def initUI(self):
+        self.setWindowTitle("Pipeline")
+        self.setGeometry(100, 100, 640, 520)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(16, 16, 16, 16)
+        layout.setSpacing(8)
+
+        form = QFormLayout()
+        form.setLabelAlignment(Qt.AlignRight)
+        form.setFormAlignment(Qt.AlignTop)
+        form.setHorizontalSpacing(10)
+        form.setVerticalSpacing(8)
+        form.setFieldGrowthPolicy(QFormLayout.AllNonFixedFieldsGrow)
+
+        font = QFont("Arial", 11)
+
+        self.urls_edit = QPlainTextEdit(self)
+        self.urls_edit.setFont(font)
+        self.urls_edit.setPlaceholderText('One YouTube URL per line')
+        self.urls_edit.setFixedHeight(70)
+        form.addRow(QLabel('URLs:'), self.urls_edit)
+
+        row_dir = QHBoxLayout()
+        self.out_dir_input = QLineEdit(self)
+        self.out_dir_input.setReadOnly(True)
+        self.out_dir_input.setPlaceholderText('No folder selected')
+        self.out_dir_input.setFont(font)
+        row_dir.addWidget(self.out_dir_input, 1)
+        self.out_dir_button = QPushButton('Browse', self)
+        self.out_dir_button.setFont(font)
+        self.out_dir_button.clicked.connect(self._select_out_dir)
+        row_dir.addWidget(self.out_dir_button)
+        form.addRow(QLabel('Work folder:'), row_dir)
+
+        self.resolution_combo = QComboBox(self)
+        self.resolution_combo.setFont(font)
+        self.resolution_combo.addItems(["144", "240", "360", "480", "720", "1080"])
+        form.addRow(QLabel('Resolution:'), self.resolution_combo)
+
+        row_split = QHBoxLayout()
+        self.split_checkbox = QCheckBox('Split on chapters', self)
+        self.split_checkbox.setFont(font)
+        row_split.addWidget(self.split_checkbox)
+        self.mode_combo = QComboBox(self)
+        self.mode_combo.setFont(font)
+        self.mode_combo.addItem('Copy', 'copy')
+        self.mode_combo.addItem('Smart cut', 'smart')
+        self.mode_combo.addItem('Accurate', 'accurate')
+        row_split.addWidget(self.mode_combo, 1)
+        form.addRow(QLabel('Split:'), row_split)
+
+        row_up = QHBoxLayout()
+        self.upload_checkbox = QCheckBox('Upload every part as', self)
+        self.upload_checkbox.setFont(font)
+        row_up.addWidget(self.upload_checkbox)
+        self.privacy_combo = QComboBox(self)
+        self.privacy_combo.setFont(font)
+        self.privacy_combo.addItems(["unlisted", "private", "public"])
+        row_up.addWidget(self.privacy_combo, 1)
+        form.addRow(QLabel('Upload:'), row_up)
+
+        self.title_template_input = QLineEdit(self)
+        self.title_template_input.setFont(font)
+        self.title_template_input.setToolTip('Placeholders: {title}, {part}, {index}, {count}')
+        form.addRow(QLabel('Title template:'), self.title_template_input)
+        self.description_input = QLineEdit(self)
+        self.description_input.setFont(font)
+        self.description_input.setToolTip('Placeholders: {title}, {part}, {index}, {count}, {url}')
+        form.addRow(QLabel('Description:'), self.description_input)
+        self.tags_input = QLineEdit(self)
+        self.tags_input.setFont(font)
+        self.tags_input.setPlaceholderText('Comma separated')
+        form.addRow(QLabel('Tags:'), self.tags_input)
+
+        row_creds = QHBoxLayout()
+        self.creds_input = QLineEdit(self)
+        self.creds_input.setFont(font)
+        self.creds_input.setPlaceholderText('Google OAuth client credentials.json')
+        row_creds.addWidget(self.creds_input, 1)
+        self.creds_button = QPushButton('Browse', self)
+        self.creds_button.setFont(font)
+        self.creds_button.clicked.connect(self._select_creds)
+        row_creds.addWidget(self.creds_button)
+        form.addRow(QLabel('Credentials:'), row_creds)
+
+        # How many tasks of each stage may run at once
+        row_limits = QHBoxLayout()
+        self.limit_spins = {}
+        for stage, label in (('download', 'Downloads'), ('split', 'Splits'), ('upload', 'Uploads')):
+            spin = QSpinBox(self)
+            spin.setFont(font)
+            spin.setRange(1, 16)
+            spin.valueChanged.connect(lambda _: self._pump())
+            row_limits.addWidget(QLabel(label))
+            row_limits.addWidget(spin)
+            self.limit_spins[stage] = spin
+        row_limits.addStretch(1)
+        form.addRow(QLabel('At once:'), row_limits)
+        layout.addLayout(form)
+
+        # Consolidated view: one row per URL, one child per task
+        self.tree = QTreeWidget(self)
+        self.tree.setHeaderLabels(['Task', 'Status', 'Progress'])
+        self.tree.header().setSectionResizeMode(0, QHeaderView.Stretch)
+        layout.addWidget(self.tree, 1)
+
+        self.progress = QProgressBar(self)
+        self.progress.setValue(0)
+        layout.addWidget(self.progress)
+
+        controls = QHBoxLayout()
+        self.start_button = QPushButton('Run Pipeline', self)
+        self.start_button.setFont(font)
+        self.start_button.clicked.connect(self.start_pipeline)
+        controls.addWidget(self.start_button)
+        self.cancel_button = QPushButton('Cancel', self)
+        self.cancel_button.setFont(font)
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_pipeline)
+        controls.addWidget(self.cancel_button)
+        layout.addLayout(controls)
+        self.setLayout(layout)
+
+        # Internal state
+        self._videos = []
+        self._queues = {stage: [] for stage in STAGES}
+        self._running = {stage: [] for stage in STAGES}
+        self._by_job = {}
+        self._threads = set()  # kept alive until each thread has exited
+        self._active = False
+        self._cancelled = False
+        self._closing = False
+        ensure_qt_pump()
+
+        self.settings = QSettings()
+        self.out_dir_input.setText(self.settings.value('pipeline/out_dir', ''))
+        idx = self.resolution_combo.findText(str(self.settings.value('pipeline/resolution', '720')))
+        if idx >= 0:
+            self.resolution_combo.setCurrentIndex(idx)
+        self.split_checkbox.setChecked(self.settings.value('pipeline/split', True, type=bool))
+        idx = self.mode_combo.findData(self.settings.value('pipeline/mode', 'copy'))
+        if idx >= 0:
+            self.mode_combo.setCurrentIndex(idx)
+        self.upload_checkbox.setChecked(self.settings.value('pipeline/upload', True, type=bool))
+        idx = self.privacy_combo.findText(self.settings.value('pipeline/privacy', 'unlisted'))
+        if idx >= 0:
+            self.privacy_combo.setCurrentIndex(idx)
+        self.title_template_input.setText(self.settings.value('pipeline/title_template', '{title} - {part}'))
+        self.description_input.setText(self.settings.value('pipeline/description', 'Part {index} of {count}: {title}'))
+        self.tags_input.setText(self.settings.value('pipeline/tags', ''))
+        self.creds_input.setText(self.settings.value('uploader/creds_path', ''))
+        defaults = {'download': 2, 'split': 1, 'upload': 2}
+        for stage, spin in self.limit_spins.items():
+            spin.setValue(self.settings.value(f'pipeline/limit_{stage}', defaults[stage], type=int))
+
+    def closeEvent(self, event):
+        if self._active and any(self._running[s] for s in STAGES):
+            answer = QMessageBox.question(
+                self, "Pipeline Running",
+                "Stop the running downloads, splits and uploads and close?",
+            )
+            if answer != QMessageBox.Yes:
+                event.ignore()
+                return
+        self._shutdown()
+        event.accept()
+
+    def _shutdown(self):
+        # Stop every task and wait for its thread, so none outlives the window
+        self._closing = True
+        self._cancelled = True
+        for stage in STAGES:
+            self._queues[stage] = []
+        scheduler = getattr(self.main_window, 'scheduler', None)
+        for stage in STAGES:
+            for task in self._running[stage]:
+                get_bus().unsubscribe(task.job_id, self._on_bus_progress)
+                get_bus().discard(task.job_id)
+                if scheduler is not None and scheduler.is_queued(task.job_id):
+                    scheduler.finish(task.job_id)
+                else:
+                    release_job(self.main_window, task.job_id)
+                try:
+                    task.worker.cancel()
+                    task.thread.wait(10000)
+                except RuntimeError:
+                    pass
+            self._running[stage] = []
+        self._active = False
+
+    def _select_out_dir(self):
+        path = QFileDialog.getExistingDirectory(self, 'Select Work Folder')
+        if path:
+            self.out_dir_input.setText(path)
+
+    def _select_creds(self):
+        path, _ = QFileDialog.getOpenFileName(self, 'Select credentials.json', '', 'JSON (*.json)')
+        if path:
+            self.creds_input.setText(path)
+
+    def _save_settings(self):
+        s = self.settings
+        s.setValue('pipeline/out_dir', self.out_dir_input.text())
+        s.setValue('pipeline/resolution', self.resolution_combo.currentText())
+        s.setValue('pipeline/split', self.split_checkbox.isChecked())
+        s.setValue('pipeline/mode', self.mode_combo.currentData())
+        s.setValue('pipeline/upload', self.upload_checkbox.isChecked())
+        s.setValue('pipeline/privacy', self.privacy_combo.currentText())
+        s.setValue('pipeline/title_template', self.title_template_input.text())
+        s.setValue('pipeline/description', self.description_input.text())
+        s.setValue('pipeline/tags', self.tags_input.text())
+        if self.creds_input.text().strip():
+            s.setValue('uploader/creds_path', self.creds_input.text().strip())
+        for stage, spin in self.limit_spins.items():
+            s.setValue(f'pipeline/limit_{stage}', spin.value())
+
+    def start_pipeline(self):
+        urls = [u.strip() for u in self.urls_edit.toPlainText().splitlines() if u.strip()]
+        out_dir = self.out_dir_input.text().strip()
+        if not urls:
+            QMessageBox.warning(self, "Missing URLs", "Please enter at least one URL.")
+            return
+        if not out_dir:
+            QMessageBox.warning(self, "Select Folder", "Please choose a work folder.")
+            return
+        if self.upload_checkbox.isChecked() and not os.path.isfile(self.creds_input.text().strip()):
+            QMessageBox.warning(self, "Missing Credentials", "Please select a valid credentials.json to upload.")
+            return
+        self._save_settings()
+
+        self.tree.clear()
+        self._videos = []
+        self._queues = {stage: [] for stage in STAGES}
+        self._by_job = {}
+        self._cancelled = False
+        self._active = True
+        for url in urls:
+            item = QTreeWidgetItem([url, 'Waiting', ''])
+            self.tree.addTopLevelItem(item)
+            item.setExpanded(True)
+            video = _Video(url, item)
+            self._videos.append(video)
+            self._enqueue(_Task('download', video, self._child(video, 'Download')))
+        self.progress.setValue(0)
+        self.start_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self._pump()
+
+    def cancel_pipeline(self):
+        self._cancelled = True
+        for stage in STAGES:
+            for task in self._queues[stage]:
+                task.item.setText(1, 'Cancelled')
+            self._queues[stage] = []
+        scheduler = getattr(self.main_window, 'scheduler', None)
+        for stage in STAGES:
+            for task in list(self._running[stage]):
+                task.worker.cancel()
+                if scheduler is not None and scheduler.is_queued(task.job_id):
+                    # Never admitted: drop it and let the worker finish through the usual path
+                    scheduler.finish(task.job_id)
+                    task.thread.start()
+        self._check_done()
+
+    def _child(self, video, label):
+        item = QTreeWidgetItem([label, 'Queued', ''])
+        video.item.addChild(item)
+        return item
+
+    def _enqueue(self, task):
+        task.video.tasks.append(task)
+        self._queues[task.stage].append(task)
+
+    def _pump(self):
+        # Later stages first, so finished parts leave the pipeline early
+        if not self._active:
+            return
+        if self._cancelled:
+            # Nothing new starts; the run ends once the last running task has finished
+            self._check_done()
+            return
+        progressed = True
+        while progressed:
+            # A task may finish synchronously and queue work for a later stage
+            progressed = False
+            for stage in reversed(STAGES):
+                limit = self.limit_spins[stage].value()
+                while self._queues[stage] and len(self._running[stage]) < limit:
+                    task = self._queues[stage].pop(0)
+                    progressed = True
+                    try:
+                        self._start_task(task)
+                    except Exception as e:
+                        self._fail(task, str(e))
+        self._check_done()
+
+    def _start_task(self, task):
+        if task.stage == 'download':
+            worker = _YTDLPWorker(task.video.url, self.out_dir_input.text().strip(),
+                                  self.resolution_combo.currentText())
+            worker.result.connect(lambda path, t=task: self._on_downloaded(t, path))
+            demands, label = {NETWORK: 1}, f"Download {task.video.url}"
+        elif task.stage == 'split':
+            worker = self._make_split_worker(task)
+            worker.segment_ready.connect(lambda index, path, t=task: self._on_segment(t, index, path))
+            demands = split_demands(worker.engine.mode, worker.engine.jobs)
+            label = f"Split {os.path.basename(task.payload['path'])}"
+        else:
+            worker = self._make_upload_worker(task)
+            demands, label = {NETWORK: 1}, f"Upload {os.path.basename(task.payload['path'])}"
+
+        thread = QThread()
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.error.connect(lambda msg, t=task: self._fail(t, msg))
+        worker.finished.connect(lambda t=task: self._on_task_finished(t))
+        # Quit from the worker's thread, so _shutdown can wait for it
+        worker.finished.connect(thread.quit, Qt.DirectConnection)
+        worker.finished.connect(worker.deleteLater)
+        thread.finished.connect(lambda th=thread: self._threads.discard(th))
+        thread.finished.connect(thread.deleteLater)
+        self._threads.add(thread)
+
+        task.worker, task.thread, task.job_id = worker, thread, worker.job_id
+        self._by_job[task.job_id] = task
+        get_bus().subscribe(task.job_id, self._on_bus_progress)
+        self._running[task.stage].append(task)
+        started = submit_job(self.main_window, task.job_id, demands, thread.start, label=label,
+                             **self._scheduler_hooks(worker))
+        task.item.setText(1, 'Running' if started else 'Queued (resources)')
+        if task.video.item.text(1) == 'Waiting':
+            task.video.item.setText(1, 'Running')
+
+    def _scheduler_hooks(self, worker):
+        engine = getattr(worker, 'engine', None)
+        if engine is None:
+            return {}
+        return {'pause': engine.pause, 'resume': engine.resume, 'renice': engine.renice}
+
+    def _make_split_worker(self, task):
+        # The chapters are read by the worker, so a large file does not stall the window
+        path = task.payload['path']
+        dest = os.path.join(os.path.dirname(path), safe_filename(os.path.splitext(os.path.basename(path))[0]))
+        worker = _SplitWorker(path, None, dest, mode=self.mode_combo.currentData(), jobs=os.cpu_count())
+        worker.chapters_found.connect(lambda chapters, t=task: self._on_chapters(t, chapters))
+        return worker
+
+    def _on_chapters(self, task, chapters):
+        if self._cancelled:
+            return
+        path = task.payload['path']
+        if len(chapters) < 2:
+            # Nothing to split on: the whole video becomes the only part
+            task.item.setText(1, 'No chapters, using whole video')
+            self._queue_upload(task.video, path, task.video.title, 1, 1)
+            self._pump()
+            return
+        task.payload['count'] = len(chapters) - 1
+        task.payload['titles'] = [title for _, title in chapters[:-1]]
+
+    def _make_upload_worker(self, task):
+        fields = {
+            'title': task.video.title,
+            'part': task.payload['part'],
+            'index': task.payload['index'],
+            'count': task.payload['count'],
+            'url': task.video.url,
+        }
+        title = fill_template(self.title_template_input.text(), fields) or task.payload['part']
+        description = fill_template(self.description_input.text(), fields)
+        tags = [t.strip() for t in self.tags_input.text().split(',') if t.strip()]
+        category = int(self.settings.value('uploader/category', 27))
+        worker = _YouTubeUploadWorker(
+            task.payload['path'], title[:100], description, tags, category,
+            self.privacy_combo.currentText(), self.creds_input.text().strip(),
+        )
+        worker.result.connect(lambda video_id, t=task: self._on_uploaded(t, video_id))
+        return worker
+
+    def _on_uploaded(self, task, video_id):
+        if self._closing:
+            return
+        task.item.setText(1, f"Uploaded: https://youtu.be/{video_id}")
+
+    def _on_downloaded(self, task, path):
+        if self._closing:
+            return
+        video = task.video
+        video.title = _video_title(path)
+        video.item.setText(0, video.title or video.url)
+        if self._cancelled:
+            return
+        if self.split_checkbox.isChecked():
+            self._enqueue(_Task('split', video, self._child(video, 'Split'), path=path))
+        else:
+            self._queue_upload(video, path, video.title, 1, 1)
+
+    def _on_segment(self, task, index, path):
+        if self._cancelled:
+            return
+        titles = task.payload.get('titles') or []
+        part = titles[index] if index < len(titles) else os.path.splitext(os.path.basename(path))[0]
+        self._queue_upload(task.video, path, part, index + 1, task.payload.get('count', 1))
+        self._pump()
+
+    def _queue_upload(self, video, path, part, index, count):
+        if not self.upload_checkbox.isChecked():
+            return
+        item = self._child(video, f"Upload {index}/{count}: {part}")
+        self._enqueue(_Task('upload', video, item, path=path, part=part, index=index, count=count))
+
+    def _fail(self, task, msg):
+        if self._cancelled:
+            return
+        task.failed = True
+        task.item.setText(1, 'Failed')
+        task.item.setToolTip(1, msg)
+        task.video.item.setText(1, 'Failed')
+
+    def _on_bus_progress(self, job_id, fields: dict):
+        task = self._by_job.get(job_id)
+        if task is None or 'percent' not in fields:
+            return
+        task.percent = int(fields['percent'])
+        task.item.setText(2, f"{task.percent}%")
+        self._update_overall()
+
+    def _on_task_finished(self, task):
+        if self._closing:
+            return
+        get_bus().unsubscribe(task.job_id, self._on_bus_progress)
+        get_bus().discard(task.job_id)
+        release_job(self.main_window, task.job_id)
+        if task in self._running[task.stage]:
+            self._running[task.stage].remove(task)
+        if not task.failed:
+            if self._cancelled:
+                task.item.setText(1, 'Cancelled')
+            else:
+                task.percent = 100
+                task.item.setText(2, '100%')
+                if task.item.text(1) in ('Running', 'Queued (resources)'):
+                    task.item.setText(1, 'Done')
+        self._update_overall()
+        self._pump()
+
+    def _update_overall(self):
+        # Each URL weighs the same; within it every enabled stage counts equally
+        if not self._videos:
+            return
+        stages = ['download'] + (['split'] if self.split_checkbox.isChecked() else []) \
+            + (['upload'] if self.upload_checkbox.isChecked() else [])
+        total = 0.0
+        for video in self._videos:
+            per_stage = []
+            for stage in stages:
+                tasks = [t for t in video.tasks if t.stage == stage]
+                per_stage.append(sum(t.percent for t in tasks) / len(tasks) if tasks else 0.0)
+            total += sum(per_stage) / len(stages)
+        self.progress.setValue(int(total / len(self._videos)))
+
+    def _check_done(self):
+        if not self._active:
+            return
+        if any(self._queues[s] for s in STAGES) or any(self._running[s] for s in STAGES):
+            return
+        self._active = False
+        for video in self._videos:
+            if video.item.text(1) != 'Failed':
+                video.item.setText(1, 'Cancelled' if self._cancelled else 'Done')
+        if not self._cancelled:
+            self._update_overall()
+        self.start_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+
+
+def _video_title(path: str) -> str:
+    # Title from the downloader's .info.json, else the file name
+    info_path = find_info_json(path)
+    if info_path:
+        try:
+            with open(info_path, 'r', encoding='utf-8') as f:
+                title = (json.load(f) or {}).get('title')
+            if title:
+                return title
+        except (OSError, ValueError):
+            pass
+    return os.path.splitext(os.path.basename(path))[0]
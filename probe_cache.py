@@ -0,0 +1,271 @@
+# MIT License
+# Copyright (c)  2024 Brahim El Hamdaoui
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# Persistent media probe cache shared by the splitter, editor and uploader.
+# Results are keyed by (path, size, mtime) so an edited or replaced file is
+# probed again, and kept in SQLite under ~/.video_manager/.
+import os
+import json
+import shutil
+import sqlite3
+import subprocess
+import threading
+from typing import Optional
+
+
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".video_manager", "probe_cache.sqlite3")
+
+# Stream fields worth keeping from ffprobe's output
+_STREAM_FIELDS = (
+    'index', 'codec_type', 'codec_name', 'profile', 'pix_fmt', 'width', 'height',
+    'r_frame_rate', 'sample_rate', 'channels', 'channel_layout', 'bit_rate',
+)
+
+
+class ProbeCache:
+    def __init__(self, path: str = CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        if not self._initialized:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS probes ('
+                ' path TEXT PRIMARY KEY,'
+                ' size INTEGER NOT NULL,'
+                ' mtime_ns INTEGER NOT NULL,'
+                ' data TEXT NOT NULL,'
+                ' keyframes TEXT)'
+            )
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def probe(self, video_file: str, keyframes: bool = False) -> Optional[dict]:
+        # Returns duration, format, streams, chapters and (when asked) the
+        # sorted keyframe times of the first video stream, or None.
+        key = _file_key(video_file)
+        if key is None:
+            return None
+        path, size, mtime_ns = key
+        with self._lock:
+            row = self._get(path, size, mtime_ns)
+        info = None
+        kf = None
+        if row is not None:
+            info = json.loads(row[0])
+            kf = json.loads(row[1]) if row[1] else None
+            # Records made without ffprobe only know the duration
+            if not info.get('complete') and shutil.which('ffprobe') is not None:
+                info = None
+        dirty = False
+        if info is None:
+            info = _run_ffprobe(video_file)
+            if info is None:
+                return None
+            kf = None
+            dirty = True
+        if keyframes and kf is None:
+            kf = _run_keyframes(video_file)
+            dirty = dirty or kf is not None
+        if dirty:
+            with self._lock:
+                self._put(path, size, mtime_ns, info, kf)
+        result = dict(info)
+        if kf is not None:
+            result['keyframes'] = kf
+        return result
+
+    def duration(self, video_file: str) -> Optional[float]:
+        info = self.probe(video_file)
+        if info and info.get('duration'):
+            return float(info['duration'])
+        # Fallback to moviepy when ffprobe is unavailable; remember the result too
+        key = _file_key(video_file)
+        if key is None:
+            return None
+        try:
+            from moviepy.editor import VideoFileClip
+            with VideoFileClip(video_file) as clip:
+                duration = float(clip.duration)
+        except Exception:
+            return None
+        with self._lock:
+            self._put(*key, {'complete': False, 'duration': duration, 'streams': [], 'chapters': []}, None)
+        return duration
+
+    def video_stream(self, video_file: str, keyframes: bool = False) -> dict:
+        # First video stream of the file, with 'keyframes' when requested
+        info = self.probe(video_file, keyframes=keyframes) or {}
+        for stream in info.get('streams') or []:
+            if stream.get('codec_type') == 'video':
+                result = dict(stream)
+                if 'keyframes' in info:
+                    result['keyframes'] = info['keyframes']
+                return result
+        return {}
+
+    def clear(self):
+        with self._lock:
+            try:
+                conn = self._connect()
+                with conn:
+                    conn.execute('DELETE FROM probes')
+                conn.close()
+            except Exception:
+                pass
+
+    def _get(self, path, size, mtime_ns):
+        try:
+            conn = self._connect()
+            try:
+                return conn.execute(
+                    'SELECT data, keyframes FROM probes WHERE path = ? AND size = ? AND mtime_ns = ?',
+                    (path, size, mtime_ns),
+                ).fetchone()
+            finally:
+                conn.close()
+        except Exception:
+            return None
+
+    def _put(self, path, size, mtime_ns, info, keyframes):
+        # The cache is an optimisation only; never fail the caller over it
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute(
+                        'INSERT OR REPLACE INTO probes (path, size, mtime_ns, data, keyframes) VALUES (?, ?, ?, ?, ?)',
+                        (path, size, mtime_ns, json.dumps(info),
+                         json.dumps(keyframes) if keyframes is not None else None),
+                    )
+            finally:
+                conn.close()
+        except Exception:
+            pass
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_probe_cache() -> ProbeCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ProbeCache()
+        return _cache
+
+
+def format_summary(info: Optional[dict]) -> str:
+    # Short human-readable description, e.g. "1920x1080 h264, aac · 01:02:03"
+    if not info:
+        return ''
+    parts = []
+    video = next((s for s in info.get('streams') or [] if s.get('codec_type') == 'video'), None)
+    audio = next((s for s in info.get('streams') or [] if s.get('codec_type') == 'audio'), None)
+    codecs = []
+    if video:
+        size = f"{video.get('width')}x{video.get('height')} " if video.get('width') else ''
+        codecs.append(f"{size}{video.get('codec_name') or ''}".strip())
+    if audio:
+        codecs.append(audio.get('codec_name') or '')
+    if codecs:
+        parts.append(', '.join(c for c in codecs if c))
+    duration = info.get('duration')
+    if duration:
+        m, s = divmod(int(duration), 60)
+        h, m = divmod(m, 60)
+        parts.append(f"{h:02d}:{m:02d}:{s:02d}")
+    if info.get('chapters'):
+        parts.append(f"{len(info['chapters'])} chapters")
+    return ' · '.join(parts)
+
+
+def _file_key(video_file: str):
+    try:
+        st = os.stat(video_file)
+    except OSError:
+        return None
+    return os.path.abspath(video_file), st.st_size, st.st_mtime_ns
+
+
+def _run_ffprobe(video_file: str) -> Optional[dict]:
+    if shutil.which('ffprobe') is None:
+        return None
+    try:
+        out = subprocess.check_output([
+            'ffprobe', '-v', 'error',
+            '-show_entries', 'format=duration,format_name,bit_rate:stream:chapter',
+            '-of', 'json', video_file,
+        ])
+        data = json.loads(out.decode('utf-8', errors='ignore'))
+    except Exception:
+        return None
+    fmt = data.get('format') or {}
+    try:
+        duration = float(fmt.get('duration')) if fmt.get('duration') else None
+    except ValueError:
+        duration = None
+    streams = [
+        {k: s[k] for k in _STREAM_FIELDS if k in s}
+        for s in data.get('streams') or []
+    ]
+    chapters = []
+    for ch in data.get('chapters') or []:
+        try:
+            chapters.append({
+                'start': float(ch.get('start_time')),
+                'end': float(ch.get('end_time')),
+                'title': (ch.get('tags') or {}).get('title') or '',
+            })
+        except (TypeError, ValueError):
+            continue
+    return {
+        'complete': True,
+        'duration': duration,
+        'format_name': fmt.get('format_name'),
+        'streams': streams,
+        'chapters': chapters,
+    }
+
+
+def _run_keyframes(video_file: str):
+    # Packet flags only need demuxing, no decoding
+    try:
+        out = subprocess.check_output([
+            'ffprobe', '-v', 'error', '-select_streams', 'v:0',
+            '-show_entries', 'packet=pts_time,flags', '-of', 'csv=p=0', video_file,
+        ])
+    except Exception:
+        return None
+    keyframes = []
+    for line in out.decode('utf-8', errors='ignore').splitlines():
+        parts = line.strip().split(',')
+        if len(parts) >= 2 and 'K' in parts[1]:
+            try:
+                keyframes.append(float(parts[0]))
+            except ValueError:
+                continue
+    return sorted(keyframes)
@@ -0,0 +1,109 @@
+# MIT License
+# Copyright (c)  2024 Brahim El Hamdaoui
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# Coalescing progress bus shared by all workers. Workers publish from any
+# thread at whatever rate their backend reports; only the latest fields per
+# job are kept, and subscribers receive them when the bus is pumped (10 Hz in
+# the GUI), so UI cost stays flat however many jobs run or how chatty they are.
+import itertools
+import threading
+from typing import Callable
+
+
+class ProgressBus:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}  # job_id -> latest fields
+        self._subscribers = {}  # job_id (None = every job) -> [callback]
+
+    def publish(self, job_id, **fields):
+        # Cheap: one dict update under a lock, no cross-thread signal
+        with self._lock:
+            current = self._pending.get(job_id)
+            if current is None:
+                self._pending[job_id] = fields
+            else:
+                current.update(fields)
+
+    def discard(self, job_id):
+        # Drop undelivered updates, e.g. once the job has finished
+        with self._lock:
+            self._pending.pop(job_id, None)
+
+    def subscribe(self, job_id, callback: Callable[[object, dict], None]):
+        # callback(job_id, fields); job_id None receives every job
+        with self._lock:
+            self._subscribers.setdefault(job_id, []).append(callback)
+
+    def unsubscribe(self, job_id, callback=None):
+        with self._lock:
+            if callback is None:
+                self._subscribers.pop(job_id, None)
+                return
+            callbacks = self._subscribers.get(job_id) or []
+            if callback in callbacks:
+                callbacks.remove(callback)
+            if not callbacks:
+                self._subscribers.pop(job_id, None)
+
+    def pump(self):
+        # Deliver the coalesced updates; call from the thread that owns the subscribers
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            subscribers = {k: list(v) for k, v in self._subscribers.items()}
+        catch_all = subscribers.get(None, [])
+        for job_id, fields in pending.items():
+            for callback in subscribers.get(job_id, []) + catch_all:
+                try:
+                    callback(job_id, fields)
+                except Exception:
+                    # A closed window must not stop delivery to the others
+                    pass
+
+
+_bus = ProgressBus()
+_job_ids = itertools.count(1)
+_qt_timer = None
+
+
+def get_bus() -> ProgressBus:
+    return _bus
+
+
+def new_job_id(prefix: str = 'job') -> str:
+    return f"{prefix}-{next(_job_ids)}"
+
+
+def ensure_qt_pump(interval_ms: int = 100):
+    # Pump the bus from the Qt event loop at a fixed frame rate (idempotent).
+    # Must be called from the GUI thread once a QApplication exists.
+    global _qt_timer
+    if _qt_timer is not None:
+        return
+    from PyQt5.QtCore import QCoreApplication, QTimer
+    app = QCoreApplication.instance()
+    if app is None:
+        return
+    _qt_timer = QTimer(app)
+    _qt_timer.setInterval(interval_ms)
+    _qt_timer.timeout.connect(_bus.pump)
+    _qt_timer.start()
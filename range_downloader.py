@@ -0,0 +1,534 @@
+# MIT License
+# Copyright (c)  2024 Brahim El Hamdaoui
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# Segmented HTTP downloader for single-file (progressive) formats. The content
+# length is split into byte ranges that several keep-alive connections fetch
+# at once, each writing at its offset into a preallocated .part file, so a
+# server that throttles every connection still fills the link. It starts with
+# two connections and adds one at a time while each addition still raises
+# throughput; a connection that runs out of ranges takes half of the largest
+# one still in flight. Progress is kept in a .ranges file beside the .part
+# file, so an interrupted download continues where it stopped. Used by the
+# `fetch` command and registered with yt-dlp as the external downloader NAME.
+import os
+import json
+import time
+import threading
+import http.client
+from collections import deque
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urljoin, urlsplit
+
+from bandwidth import TokenBucket
+
+
+NAME = 'rangedl'
+DEFAULT_CONNECTIONS = 4
+
+MIN_PIECE = 512 * 1024
+MAX_PIECE = 8 * 1024 * 1024
+_BLOCK = 64 * 1024
+
+# Throughput is measured this long before deciding on another connection,
+# which has to raise it by _GAIN to keep the ramp going
+_SAMPLE = 1.0
+_GAIN = 1.1
+_RETRIES = 5
+_REDIRECTS = 5
+_SAVE_INTERVAL = 2.0
+_REPORT_INTERVAL = 0.1
+_STATE_SUFFIX = '.ranges'
+
+# Statuses that mean the server wants fewer connections
+_BUSY = (429, 503)
+
+
+class ConnectionPool:
+    # Idle keep-alive connections per scheme, host and port
+    def __init__(self, timeout: float = 20.0):
+        self.timeout = timeout
+        self._idle: Dict[tuple, List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str, fresh: bool = False):
+        # Returns (connection, reused)
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        if not fresh:
+            with self._lock:
+                idle = self._idle.get(key)
+                if idle:
+                    return idle.pop(), True
+        cls = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        conn = cls(parts.hostname, parts.port, timeout=self.timeout)
+        conn.pool_key = key
+        return conn, False
+
+    def put(self, conn):
+        with self._lock:
+            self._idle.setdefault(conn.pool_key, []).append(conn)
+
+    def close(self):
+        with self._lock:
+            conns = [c for idle in self._idle.values() for c in idle]
+            self._idle.clear()
+        for conn in conns:
+            conn.close()
+
+
+class RangeDownloader:
+    # on_progress(downloaded, total, speed, eta) is called from the fetching
+    # threads, at most every _REPORT_INTERVAL; an exception raised by it
+    # aborts the download. rate() caps the combined speed in bytes per second
+    # (0 is unlimited).
+    def __init__(self, url: str, path: str, connections: int = DEFAULT_CONNECTIONS, headers: dict = None,
+                 max_piece: int = MAX_PIECE, on_progress: Callable = None, rate: Callable[[], float] = None,
+                 timeout: float = 20.0):
+        self.url = url
+        self.path = path
+        self.connections = max(1, int(connections))
+        self.headers = {'User-Agent': 'Mozilla/5.0', 'Accept': '*/*'}
+        self.headers.update(headers or {})
+        self.headers['Accept-Encoding'] = 'identity'
+        self.max_piece = max(MIN_PIECE, int(max_piece))
+        self.on_progress = on_progress
+        self.rate = rate
+        self.total = None
+        self.downloaded = 0
+        self.peak_connections = 0
+        self._pool = ConnectionPool(timeout)
+        self._lock = threading.Lock()
+        self._report_lock = threading.Lock()
+        self._bucket = TokenBucket()
+        self._pending = deque()
+        self._active = []
+        self._limit = self.connections
+        self._samples = deque()
+        self._reported = 0.0
+        self._error = None
+        self._stop = threading.Event()
+        self._cancel = False
+
+    def cancel(self):
+        self._cancel = True
+        self._stop.set()
+
+    def run(self) -> int:
+        # Returns the size of the finished file
+        try:
+            total, ranged = self._probe()
+            self.total = total
+            if ranged and total:
+                self._segmented()
+            else:
+                self._single()
+        finally:
+            self._pool.close()
+        return self.downloaded
+
+    def _probe(self):
+        # Size and range support from a one-byte request on a connection
+        # that is then kept for the first range
+        conn, resp = self._request(0, 0)
+        if resp.status == 206:
+            total = _range_total(resp.getheader('Content-Range'))
+            resp.read()
+            self._pool.put(conn)
+            return total, total is not None
+        conn.close()
+        if resp.status == 200:
+            length = resp.getheader('Content-Length') or ''
+            return (int(length) if length.isdigit() else None), False
+        raise Exception(f"HTTP Error {resp.status}: {resp.reason}")
+
+    def _single(self):
+        # Servers without ranges: one connection, written in order
+        self.peak_connections = 1
+        conn, resp = self._request(0, None)
+        try:
+            if resp.status not in (200, 206):
+                raise Exception(f"HTTP Error {resp.status}: {resp.reason}")
+            with open(self.path, 'wb', buffering=0) as f:
+                while True:
+                    if self._stop.is_set():
+                        raise Exception('Cancelled by user')
+                    data = resp.read(_BLOCK)
+                    if not data:
+                        break
+                    f.write(data)
+                    with self._lock:
+                        self.downloaded += len(data)
+                    self._report(len(data))
+        finally:
+            conn.close()
+        if self.total and self.downloaded < self.total:
+            raise Exception(f"Connection closed after {self.downloaded} of {self.total} bytes")
+        self._report(0, final=True)
+
+    def _segmented(self):
+        pieces = self._load_state()
+        if pieces is None:
+            # A shorter .part file without state was written in order, e.g. by yt-dlp itself
+            done = os.path.getsize(self.path) if os.path.isfile(self.path) else 0
+            pieces = self._split(done if done < self.total else 0, self.total - 1)
+        self._pending = deque(pieces)
+        self.downloaded = self.total - sum(end - pos + 1 for pos, end in pieces)
+        with open(self.path, 'r+b' if os.path.isfile(self.path) else 'wb') as f:
+            _preallocate(f, self.total)
+        self._save_state()
+
+        threads = []
+        target = min(2, self._limit)
+        baseline = None
+        ramping = True
+        window = (time.monotonic(), self.downloaded)
+        saved = time.monotonic()
+        try:
+            while True:
+                threads = [t for t in threads if t.is_alive()]
+                with self._lock:
+                    target = min(target, self._limit)
+                    waiting = len(self._pending) + self._stealable()
+                    remaining = bool(self._pending or self._active)
+                if self._error is not None or self._stop.is_set() or not (remaining or threads):
+                    break
+                for _ in range(min(target - len(threads), waiting)):
+                    thread = threading.Thread(target=self._worker, daemon=True)
+                    thread.start()
+                    threads.append(thread)
+                self.peak_connections = max(self.peak_connections, len(threads))
+                self._stop.wait(0.1)
+                now = time.monotonic()
+                if now - saved >= _SAVE_INTERVAL:
+                    self._save_state()
+                    saved = now
+                if ramping and now - window[0] >= _SAMPLE:
+                    speed = (self.downloaded - window[1]) / (now - window[0])
+                    window = (now, self.downloaded)
+                    if baseline is None or speed > baseline * _GAIN:
+                        baseline = speed
+                        if target < self._limit:
+                            target += 1
+                        else:
+                            ramping = False
+                    else:
+                        # The last connection did not pay off; stay at this count
+                        ramping = False
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            # Kept on any way out, KeyboardInterrupt included, so the next attempt resumes
+            self._save_state()
+        if self._error is not None or self._cancel:
+            raise self._error if self._error is not None else Exception('Cancelled by user')
+        self._report(0, final=True)
+        try:
+            os.remove(self.path + _STATE_SUFFIX)
+        except OSError:
+            pass
+
+    def _split(self, start: int, end: int):
+        # Enough pieces for every connection to take several, so the tail
+        # is shared out instead of left to one slow range
+        count = max(1, self.connections * 4)
+        size = min(self.max_piece, max(MIN_PIECE, (end - start + 1) // count))
+        return [[pos, min(end, pos + size - 1)] for pos in range(start, end + 1, size)]
+
+    def _stealable(self) -> int:
+        return int(any(end - pos + 1 >= 2 * MIN_PIECE for pos, end in self._active))
+
+    def _next_piece(self):
+        with self._lock:
+            if self._pending:
+                piece = self._pending.popleft()
+            else:
+                # Take the second half of the largest range still being fetched
+                largest = max(self._active, key=lambda p: p[1] - p[0], default=None)
+                if largest is None or largest[1] - largest[0] + 1 < 2 * MIN_PIECE:
+                    return None
+                mid = largest[0] + (largest[1] - largest[0] + 1) // 2
+                piece = [mid, largest[1]]
+                largest[1] = mid - 1
+            self._active.append(piece)
+            return piece
+
+    def _worker(self):
+        try:
+            with open(self.path, 'r+b', buffering=0) as f:
+                while not self._stop.is_set():
+                    piece = self._next_piece()
+                    if piece is None:
+                        return
+                    if not self._fetch(piece, f):
+                        return
+        except BaseException as e:
+            # A progress hook may raise anything; the download must still stop
+            with self._lock:
+                self._error = self._error or e
+            self._stop.set()
+
+    def _fetch(self, piece, f) -> bool:
+        # Fetches the piece, retrying from where it stopped; False when this
+        # connection should be given up because the server is busy
+        failures = 0
+        while True:
+            with self._lock:
+                pos, end = piece
+                if pos > end:
+                    self._active.remove(piece)
+                    return True
+            conn = None
+            try:
+                conn, resp = self._request(pos, end)
+                if resp.status in _BUSY:
+                    conn.close()
+                    with self._lock:
+                        if self._limit > 1:
+                            # Hand the range back and run with one connection fewer
+                            self._limit -= 1
+                            self._active.remove(piece)
+                            self._pending.appendleft(piece)
+                            return False
+                    raise Exception(f"HTTP Error {resp.status}: {resp.reason}")
+                if resp.status != 206 or _range_start(resp.getheader('Content-Range')) != pos:
+                    conn.close()
+                    raise _Fatal(f"HTTP Error {resp.status}: {resp.reason}")
+                f.seek(pos)
+                while True:
+                    if self._stop.is_set():
+                        conn.close()
+                        return False
+                    data = resp.read(min(_BLOCK, end - pos + 1))
+                    if not data:
+                        break
+                    with self._lock:
+                        keep = max(0, min(len(data), piece[1] - pos + 1))
+                    f.write(data[:keep])
+                    with self._lock:
+                        piece[0] = pos = pos + keep
+                        self.downloaded += keep
+                        done = pos > piece[1]
+                    failures = 0
+                    self._report(keep)
+                    if done:
+                        break
+                if pos > end or (pos > piece[1] and resp.isclosed()):
+                    self._pool.put(conn)
+                else:
+                    # Cut short by a steal or by the server; the rest of the body is unread
+                    conn.close()
+                    if pos <= piece[1]:
+                        raise Exception(f"Connection closed at byte {pos}")
+            except _Fatal:
+                raise
+            except Exception as e:
+                if conn is not None:
+                    conn.close()
+                if self._stop.is_set():
+                    return False
+                failures += 1
+                if failures > _RETRIES:
+                    raise e
+                self._stop.wait(min(8.0, 0.5 * 2 ** (failures - 1)))
+
+    def _request(self, start: int, end: Optional[int]):
+        # Returns (connection, response) for bytes start..end, following
+        # redirects; the final URL is kept for the following requests
+        url = self.url
+        for _ in range(_REDIRECTS + 1):
+            parts = urlsplit(url)
+            target = (parts.path or '/') + ('?' + parts.query if parts.query else '')
+            headers = dict(self.headers, Range=f"bytes={start}-{'' if end is None else end}")
+            conn, reused = self._pool.get(url)
+            try:
+                conn.request('GET', target, headers=headers)
+                resp = conn.getresponse()
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                if not reused:
+                    raise
+                # The server dropped the idle connection; one fresh attempt
+                conn, _ = self._pool.get(url, fresh=True)
+                conn.request('GET', target, headers=headers)
+                resp = conn.getresponse()
+            location = resp.getheader('Location')
+            if resp.status in (301, 302, 303, 307, 308) and location:
+                resp.read()
+                self._pool.put(conn)
+                url = self.url = urljoin(url, location)
+                continue
+            return conn, resp
+        raise _Fatal('Too many redirects')
+
+    def _report(self, nbytes: int, final: bool = False):
+        # Serialised so the rate cap and progress see one ordered byte count
+        with self._report_lock:
+            if self.rate is not None and nbytes:
+                self._bucket.consume(nbytes, self.rate, self._stop.is_set)
+            now = time.monotonic()
+            downloaded = self.downloaded
+            self._samples.append((now, downloaded))
+            while len(self._samples) > 2 and now - self._samples[0][0] > 3.0:
+                self._samples.popleft()
+            if self.on_progress is None or (not final and now - self._reported < _REPORT_INTERVAL):
+                return
+            self._reported = now
+            first_time, first_bytes = self._samples[0]
+            speed = (downloaded - first_bytes) / (now - first_time) if now > first_time else None
+            eta = int((self.total - downloaded) / speed) if speed and self.total else None
+            try:
+                self.on_progress(downloaded, self.total, speed, eta)
+            except BaseException as e:
+                with self._lock:
+                    self._error = self._error or e
+                self._stop.set()
+                raise
+
+    def _load_state(self):
+        # Remaining ranges of an earlier attempt at the same file, or None
+        try:
+            with open(self.path + _STATE_SUFFIX, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('total') != self.total or os.path.getsize(self.path) != self.total:
+                return None
+            return [[int(pos), int(end)] for pos, end in state['remaining'] if pos <= end]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _save_state(self):
+        # Data is synced first, so the state never claims bytes the file lacks
+        with self._lock:
+            remaining = [list(p) for p in self._active] + [list(p) for p in self._pending]
+        try:
+            with open(self.path, 'r+b') as f:
+                os.fsync(f.fileno())
+            tmp = self.path + _STATE_SUFFIX + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'total': self.total, 'remaining': sorted(remaining)}, f)
+            os.replace(tmp, self.path + _STATE_SUFFIX)
+        except OSError:
+            pass
+
+
+class _Fatal(Exception):
+    # Errors a retry cannot fix, such as an expired URL
+    pass
+
+
+def _range_total(value: Optional[str]) -> Optional[int]:
+    # "bytes 0-0/12345" -> 12345; None when the size is unknown ("*")
+    total = (value or '').rpartition('/')[2].strip()
+    return int(total) if total.isdigit() else None
+
+
+def _range_start(value: Optional[str]) -> Optional[int]:
+    start = (value or '').partition(' ')[2].partition('-')[0].strip()
+    return int(start) if start.isdigit() else None
+
+
+def fetched_bytes(path: str) -> int:
+    # Bytes actually written to a .part file; a segmented one has its full
+    # size from the start, so its state file is consulted
+    try:
+        with open(path + _STATE_SUFFIX, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        return state['total'] - sum(end - pos + 1 for pos, end in state['remaining'] if pos <= end)
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _preallocate(f, size: int):
+    f.truncate(size)
+    if hasattr(os, 'posix_fallocate'):
+        try:
+            os.posix_fallocate(f.fileno(), 0, size)
+        except OSError:
+            pass
+
+
+def register() -> str:
+    # Adds the downloader to yt-dlp's external downloaders and returns its
+    # name for the external_downloader option. yt-dlp is imported here so the
+    # fetch command does not pay for it.
+    from yt_dlp.downloader import external
+    if NAME not in external._BY_NAME:
+        external._BY_NAME[NAME] = _yt_dlp_downloader(external.ExternalFD)
+    return NAME
+
+
+def _yt_dlp_downloader(base):
+    class RangeFD(base):
+        # Runs in-process; the connection count comes from the range_connections
+        # option and yt-dlp's ratelimit caps the combined speed
+        SUPPORTED_PROTOCOLS = ('http', 'https')
+
+        @classmethod
+        def get_basename(cls):
+            return NAME
+
+        @classmethod
+        def available(cls, path=None):
+            return True
+
+        @classmethod
+        def supports(cls, info_dict):
+            return 'fragments' not in info_dict and super().supports(info_dict)
+
+        def _call_downloader(self, tmpfilename, info_dict):
+            url = info_dict['url']
+            headers = dict(info_dict.get('http_headers') or {})
+            cookies = self.ydl.cookiejar.get_cookie_header(url)
+            if cookies:
+                headers['Cookie'] = cookies
+            # Sites like YouTube throttle requests larger than their chunk size
+            chunk = (info_dict.get('downloader_options') or {}).get('http_chunk_size') \
+                or self.params.get('http_chunk_size') or MAX_PIECE
+            filename = self.undo_temp_name(tmpfilename)
+            started = time.time()
+
+            def progress(downloaded, total, speed, eta):
+                self._hook_progress({
+                    'status': 'downloading',
+                    'filename': filename,
+                    'tmpfilename': tmpfilename,
+                    'downloaded_bytes': downloaded,
+                    'total_bytes': total,
+                    'speed': speed,
+                    'eta': eta,
+                    'elapsed': time.time() - started,
+                }, info_dict)
+
+            RangeDownloader(
+                url, tmpfilename,
+                connections=self.params.get('range_connections', DEFAULT_CONNECTIONS),
+                headers=headers,
+                max_piece=min(MAX_PIECE, chunk),
+                on_progress=progress,
+                rate=lambda: self.params.get('ratelimit') or 0,
+                timeout=self.params.get('socket_timeout') or 20.0,
+            ).run()
+            return 0
+
+    return RangeFD
@@ -0,0 +1,249 @@
+# MIT License
+# Copyright (c)  2024 Brahim El Hamdaoui
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# Content-addressed cache of split segments. A segment is identified by the
+# input's fingerprint, its time range and the encode parameters, so re-running
+# a split after editing one chapter only encodes the segments that changed.
+# Entries live under ~/.video_manager/segments and are reflinked into the
+# destination when the filesystem allows it, copied otherwise. Never hardlinked:
+# an output edited in place (tags, re-mux) must not change the cached segment.
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: plain copies only
+    fcntl = None
+
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".video_manager", "segments")
+MAX_BYTES = 20 * 1024 ** 3
+
+# Written next to the outputs so an interrupted split resumes where it stopped
+MANIFEST_NAME = '.video_manager_split.json'
+
+_SAMPLE = 1024 * 1024
+
+# Linux ioctl that makes dst share src's extents copy-on-write (Btrfs, XFS, ...)
+_FICLONE = 0x40049409
+
+
+def fingerprint(video_file: str) -> str:
+    # Size plus hashes of the head, middle and tail: cheap for multi-GB files and
+    # unaffected by copies or touched mtimes. Memoised per (path, size, mtime).
+    st = os.stat(video_file)
+    memo_key = (os.path.abspath(video_file), st.st_size, st.st_mtime_ns)
+    with _memo_lock:
+        cached = _memo.get(memo_key)
+    if cached:
+        return cached
+    h = hashlib.sha1(str(st.st_size).encode())
+    with open(video_file, 'rb') as f:
+        for offset in (0, max(0, st.st_size // 2 - _SAMPLE // 2), max(0, st.st_size - _SAMPLE)):
+            f.seek(offset)
+            h.update(f.read(_SAMPLE))
+    digest = h.hexdigest()
+    with _memo_lock:
+        _memo[memo_key] = digest
+    return digest
+
+
+def segment_key(video_fingerprint: str, start: float, end: float, params: dict) -> str:
+    data = json.dumps([video_fingerprint, round(float(start), 3), round(float(end), 3), params], sort_keys=True)
+    return hashlib.sha1(data.encode()).hexdigest()
+
+
+class SegmentCache:
+    def __init__(self, path: str = CACHE_DIR, max_bytes: int = MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+
+    def fetch(self, key: str, output_path: str) -> bool:
+        # Place the cached segment at output_path; False on a miss
+        entry = self._entry(key)
+        try:
+            if os.path.getsize(entry) <= 0:
+                return False
+        except OSError:
+            return False
+        try:
+            _place(entry, output_path)
+            # mtime doubles as the last-use time for pruning
+            os.utime(entry)
+        except OSError:
+            return False
+        return True
+
+    def store(self, key: str, output_path: str):
+        # The cache is an optimisation only; never fail the split over it
+        entry = self._entry(key)
+        try:
+            os.makedirs(os.path.dirname(entry), exist_ok=True)
+            _place(output_path, entry)
+        except OSError:
+            pass
+
+    def prune(self, max_bytes: Optional[int] = None):
+        # Drop least recently used entries until the cache fits the budget
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = []
+        for root, _, files in os.walk(self.path):
+            for name in files:
+                p = os.path.join(root, name)
+                try:
+                    st = os.stat(p)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, p))
+        total = sum(size for _, size, _ in entries)
+        for _, size, p in sorted(entries):
+            if total <= limit:
+                break
+            try:
+                os.remove(p)
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], key + '.mp4')
+
+
+class SplitManifest:
+    # Output name -> (segment key, size, mtime) for the segments already written
+    # to one destination folder. Saved atomically after every segment.
+    def __init__(self, dest_dir: str):
+        self.path = os.path.join(dest_dir, MANIFEST_NAME)
+        self._lock = threading.Lock()
+        self._segments = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == 1:
+                self._segments = dict(data.get('segments') or {})
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    def is_done(self, key: str, output_path: str) -> bool:
+        # The output is still the one we wrote for this key
+        with self._lock:
+            entry = self._segments.get(os.path.basename(output_path))
+        if not entry or entry.get('key') != key:
+            return False
+        try:
+            st = os.stat(output_path)
+        except OSError:
+            return False
+        return st.st_size == entry.get('size') and st.st_mtime_ns == entry.get('mtime_ns')
+
+    def record(self, key: str, output_path: str):
+        try:
+            st = os.stat(output_path)
+        except OSError:
+            return
+        with self._lock:
+            self._segments[os.path.basename(output_path)] = {
+                'key': key, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns,
+            }
+            self._save()
+
+    def retain(self, output_paths):
+        # Forget outputs that are no longer part of the split
+        names = {os.path.basename(p) for p in output_paths}
+        with self._lock:
+            self._segments = {k: v for k, v in self._segments.items() if k in names}
+
+    def _save(self):
+        try:
+            fd, tmp = tempfile.mkstemp(prefix='.manifest_', dir=os.path.dirname(self.path))
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': 1, 'segments': self._segments}, f, indent=1)
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+
+_memo = {}
+_memo_lock = threading.Lock()
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_segment_cache() -> SegmentCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SegmentCache()
+        return _cache
+
+
+def partial_path(output_path: str) -> str:
+    # Hidden sibling the segment is written to before being moved into place;
+    # keeps the extension so ffmpeg picks the muxer
+    folder, name = os.path.split(output_path)
+    stem, ext = os.path.splitext(name)
+    return os.path.join(folder, f".{stem}.partial{ext or '.mp4'}")
+
+
+def _place(src: str, dst: str):
+    # Clone (or copy) src to a temp name next to dst, then rename over dst.
+    # This also breaks up an output and entry hardlinked by earlier versions.
+    tmp = partial_path(dst) + '.tmp'
+    try:
+        os.remove(tmp)
+    except OSError:
+        pass
+    try:
+        _clone(src, tmp)
+    except OSError:
+        shutil.copy2(src, tmp)
+    try:
+        os.replace(tmp, dst)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _clone(src: str, dst: str):
+    # Reflink: instant and no extra space, yet the two files stay independent
+    if fcntl is None:
+        raise OSError('reflinks are not supported here')
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+        shutil.copystat(src, dst)
+    except OSError:
+        try:
+            os.remove(dst)
+        except OSError:
+            pass
+        raise
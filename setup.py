@@ -43,10 +43,28 @@ setup(
         "video_splitter",
         "video_editor",
         "youtube_uploader",
+        "probe_cache",
+        "download_queue",
+        "extraction_cache",
+        "download_archive",
+        "bandwidth",
+        "download_journal",
+        "range_downloader",
+        "upload_queue",
+        "split_engine",
+        "join_engine",
+        "video_joiner",
+        "split_points",
+        "segment_cache",
+        "pipeline",
+        "video_manager_cli",
+        "progress_bus",
+        "job_scheduler",
     ],
     install_requires=[
         "yt-dlp",
         "moviepy",
+        "numpy",
         "PyQt5",
         "PyQtWebEngine",
         "google-api-python-client",
@@ -55,7 +73,7 @@ setup(
     ],
     entry_points={
         "console_scripts": [
-            "video_manager=video_manager:main",
+            "video_manager=video_manager_cli:main",
         ]
     },
 )
@@ -0,0 +1,666 @@
+# MIT License
+# Copyright (c)  2024 Brahim El Hamdaoui
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# Qt-free splitting engine. The splitter window wraps it in a QThread worker;
+# the headless `video_manager split` command drives it directly, so this module
+# must not import PyQt5 or moviepy at import time.
+import os
+import re
+import csv
+import json
+import bisect
+import shutil
+import signal
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Optional
+
+from probe_cache import get_probe_cache
+from segment_cache import SplitManifest, fingerprint, get_segment_cache, partial_path, segment_key
+
+
+# Encoder settings; part of every segment's cache key, so changing them here
+# invalidates the cached segments
+_ACCURATE_ARGS = ['-c:v', 'libx264', '-preset', 'faster', '-crf', '22', '-c:a', 'aac', '-movflags', '+faststart']
+_SMART_EDGE_ARGS = ['-c:v', 'libx264', '-preset', 'faster', '-crf', '18']
+_SMART_AUDIO_ARGS = ['-c:a', 'aac']
+
+
+def convert_time_to_seconds(time_str):
+    parts = time_str.split(':')
+    parts = [0] * (3 - len(parts)) + parts
+    h, m, s = map(int, parts)
+    return h * 3600 + m * 60 + s
+
+
+def safe_filename(name: str) -> str:
+    # Remove illegal filename characters and trim
+    name = re.sub(r"[\\/:*?\"<>|]", " ", name)
+    name = re.sub(r"\s+", " ", name).strip()
+    return name[:200]
+
+
+def parse_chapters_file(chapters_file: str):
+    # Lines of "HH:MM:SS Title" (or MM:SS) -> (list of (start_seconds, title),
+    # list of (line_number, text) that could not be used)
+    with open(chapters_file, 'r', encoding='utf-8') as file:
+        return parse_chapters_text(file.read())
+
+
+def parse_chapters_text(text: str):
+    chapters = []
+    malformed = []
+    for lineno, line in enumerate(text.splitlines(), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        m = re.match(r"^(\d{1,3}(:\d{2}){1,2})\s+(.+)$", line)
+        if not m:
+            malformed.append((lineno, line))
+            continue
+        start = convert_time_to_seconds(m.group(1))
+        # Timestamps must increase or the segments would be empty
+        if chapters and start <= chapters[-1][0]:
+            malformed.append((lineno, line))
+            continue
+        chapters.append((start, m.group(3)))
+    return chapters, malformed
+
+
+def chapters_from_info(info: dict):
+    # yt-dlp info dict (or .info.json) -> chapters with a final end marker
+    entries = []
+    for ch in (info or {}).get('chapters') or []:
+        try:
+            entries.append({
+                'start': float(ch.get('start_time')),
+                'end': float(ch['end_time']) if ch.get('end_time') is not None else None,
+                'title': ch.get('title') or '',
+            })
+        except (TypeError, ValueError):
+            continue
+    return _chapters_from_entries(entries, (info or {}).get('duration'))
+
+
+def chapters_from_container(video_file: str):
+    # Chapters embedded in the MP4/MKV container, read by ffprobe (no decoding)
+    info = get_probe_cache().probe(video_file) or {}
+    return _chapters_from_entries(info.get('chapters') or [], info.get('duration'))
+
+
+def find_info_json(video_file: str) -> Optional[str]:
+    # Sidecar written by the downloader: "<name>.info.json" next to "<name>.<ext>"
+    path = os.path.splitext(video_file)[0] + '.info.json'
+    return path if os.path.isfile(path) else None
+
+
+def load_chapters(video_file: str, chapters_file: Optional[str] = None):
+    # Returns (chapters, source, malformed). Without a chapters file the
+    # downloader's .info.json is preferred, then the container's chapters.
+    if chapters_file:
+        chapters, malformed = parse_chapters_file(chapters_file)
+        return chapters, 'file', malformed
+    info_json = find_info_json(video_file)
+    if info_json:
+        try:
+            with open(info_json, 'r', encoding='utf-8') as f:
+                chapters = chapters_from_info(json.load(f))
+            if chapters:
+                return chapters, 'info.json', []
+        except (OSError, ValueError):
+            pass
+    chapters = chapters_from_container(video_file)
+    return chapters, ('container' if chapters else None), []
+
+
+def _chapters_from_entries(entries, duration=None):
+    # entries: dicts with start, end and title -> [(start, title), ..., (end, 'End')]
+    entries = sorted(entries, key=lambda e: e['start'])
+    chapters = []
+    for n, e in enumerate(entries, start=1):
+        if chapters and e['start'] <= chapters[-1][0]:
+            continue
+        chapters.append((e['start'], e['title'].strip() or f"Chapter {n}"))
+    if not chapters:
+        return []
+    end = entries[-1].get('end') or duration
+    if end and float(end) > chapters[-1][0]:
+        chapters.append((float(end), 'End'))
+    return chapters
+
+
+def ensure_final_segment(chapters, duration):
+    # chapters: list of (start_seconds, title); appends an end marker at duration
+    if len(chapters) < 1 or not duration:
+        return chapters
+    last_start, last_title = chapters[-1]
+    if last_start < int(duration) and (len(chapters) == 1 or chapters[-1][0] != int(duration)):
+        # Append synthetic end marker title
+        chapters = chapters + [(int(duration), f"End")]  # title not used for end
+    return chapters
+
+
+class FFmpegRunner:
+    # Runs ffmpeg children that report through `-progress pipe:1`, and lets the
+    # scheduler cancel, pause (SIGSTOP) or renice all of them at once
+    def __init__(self):
+        self._cancel = False
+        self._resumed = threading.Event()  # cleared while paused by the scheduler
+        self._resumed.set()
+        self._niceness = 0
+        self._procs = set()
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        self._cancel = True
+        self._resumed.set()
+        with self._lock:
+            procs = list(self._procs)
+        for proc in procs:
+            if proc.poll() is None:
+                try:
+                    proc.terminate()
+                except Exception:
+                    pass
+                # A stopped child only sees SIGTERM once continued
+                _send_signal(proc, getattr(signal, 'SIGCONT', None))
+
+    def pause(self):
+        # Stop the running ffmpeg children (POSIX) and hold back new ones
+        self._resumed.clear()
+        with self._lock:
+            procs = list(self._procs)
+        for proc in procs:
+            _send_signal(proc, getattr(signal, 'SIGSTOP', None))
+
+    def resume(self):
+        self._resumed.set()
+        with self._lock:
+            procs = list(self._procs)
+        for proc in procs:
+            _send_signal(proc, getattr(signal, 'SIGCONT', None))
+
+    def renice(self, niceness: int):
+        # Lower the OS priority of running and future ffmpeg children
+        self._niceness = niceness
+        with self._lock:
+            procs = list(self._procs)
+        for proc in procs:
+            _set_niceness(proc, niceness)
+
+    def _run_ffmpeg(self, cmd, on_time=None):
+        # Run one ffmpeg child, feeding its `-progress` position (seconds) to on_time
+        self._resumed.wait()
+        if self._cancel:
+            raise Exception('Cancelled by user')
+        proc = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=1,
+            universal_newlines=True,
+        )
+        with self._lock:
+            self._procs.add(proc)
+        if self._niceness:
+            _set_niceness(proc, self._niceness)
+        if not self._resumed.is_set():
+            _send_signal(proc, getattr(signal, 'SIGSTOP', None))
+        try:
+            # cancel() may have run before the process was registered
+            if self._cancel:
+                proc.terminate()
+            # Parse progress lines
+            if proc.stdout:
+                for line in proc.stdout:
+                    out_s = parse_progress_line(line)
+                    if out_s is not None and on_time is not None:
+                        on_time(out_s)
+            _, err = proc.communicate()
+        finally:
+            with self._lock:
+                self._procs.discard(proc)
+        if self._cancel:
+            raise Exception('Cancelled by user')
+        if proc.returncode != 0:
+            raise Exception(err or 'FFmpeg failed')
+
+
+def parse_progress_line(line: str):
+    # Returns the output position in seconds for `-progress` time lines
+    line = line.strip()
+    if not line or '=' not in line:
+        return None
+    key, val = line.split('=', 1)
+    try:
+        if key in ('out_time_us', 'out_time_ms'):
+            # Both keys are reported in microseconds by ffmpeg
+            return float(val) / 1_000_000.0
+        if key == 'out_time':
+            # Format HH:MM:SS.microseconds
+            h, m, s = val.split(':')
+            return float(h) * 3600 + float(m) * 60 + float(s)
+    except Exception:
+        return None
+    return None
+
+
+class SplitEngine(FFmpegRunner):
+    def __init__(self, video_file: str, chapters, dest_dir: str, mode: str = 'copy', jobs: int = None,
+                 single_pass: bool = True, on_progress: Optional[Callable[[int, str], None]] = None,
+                 use_cache: bool = True, on_segment: Optional[Callable[[int, str], None]] = None):
+        super().__init__()
+        self.video_file = video_file
+        self.chapters = chapters  # list of (start_seconds, title) plus final end marker
+        self.dest_dir = dest_dir
+        # 'copy', 'smart' (re-encode GOP edges, copy the rest) or 'accurate'
+        self.mode = mode
+        # Number of ffmpeg processes running at once; defaults to the core count
+        self.jobs = max(1, int(jobs or os.cpu_count() or 1))
+        # Copy mode: read the input once with the segment muxer
+        self.single_pass = single_pass
+        # Called with (percent, current title) from the extraction threads
+        self.on_progress = on_progress
+        # Reuse unchanged segments from the content-addressed cache
+        self.use_cache = use_cache
+        # Called with (index, output path) as soon as each segment is in place,
+        # so later stages can start on it while the rest is still being cut
+        self.on_segment = on_segment
+        self.outputs = []  # output paths, in chapter order, once run() returns
+        self._done = []  # seconds processed per segment
+        self._total = 0.0
+        self._last_percent = -1
+        self._source = None  # keyframes and video stream layout for smart cut
+        self._source_lock = threading.Lock()
+        self._keys = {}  # segment index -> cache key
+        self._manifest = None
+        self.reused = 0  # segments taken from the cache or a previous run
+
+    def run(self):
+        # Blocks until every segment is written; raises on failure or cancel
+        segments = []
+        for i in range(max(0, len(self.chapters) - 1)):
+            start_time, title = self.chapters[i]
+            end_time, _ = self.chapters[i + 1]
+            safe_title = safe_filename(title) or f"part_{i+1:02d}"
+            output_path = os.path.join(self.dest_dir, f"{safe_title}.mp4")
+            segments.append((i, start_time, end_time, title, output_path))
+
+        self._done = [0.0] * len(segments)
+        self._total = sum(max(1e-6, float(end - start)) for _, start, end, _, _ in segments)
+        self._last_percent = -1
+        if segments:
+            self._emit(0, segments[0][3])
+
+        todo = self._reuse_segments(segments)
+        use_single_pass = self.single_pass and self.mode == 'copy' and len(todo) == len(segments) > 1
+        if todo and not (use_single_pass and self._split_single_pass(todo)):
+            for index, start, end, _, _ in todo:
+                self._done[index] = 0.0
+            self._split_per_segment(todo)
+        self.outputs = [seg[4] for seg in segments]
+        if self.use_cache:
+            get_segment_cache().prune()
+        self._emit(100, '')
+
+    def _reuse_segments(self, segments):
+        # Skip segments finished by an interrupted run or found in the cache;
+        # returns the ones that still have to be cut
+        self._manifest = SplitManifest(self.dest_dir)
+        self._manifest.retain(seg[4] for seg in segments)
+        video_fp = fingerprint(self.video_file)
+        params = self._encode_params()
+        cache = get_segment_cache() if self.use_cache else None
+        todo = []
+        for seg in segments:
+            index, start, end, title, output_path = seg
+            key = segment_key(video_fp, start, end, params)
+            self._keys[index] = key
+            if self._manifest.is_done(key, output_path):
+                if cache is not None:
+                    cache.store(key, output_path)
+            elif cache is not None and cache.fetch(key, output_path):
+                self._manifest.record(key, output_path)
+            else:
+                todo.append(seg)
+                continue
+            self.reused += 1
+            self._report(index, max(1e-6, float(end - start)), title)
+            self._segment_ready(index, output_path)
+        return todo
+
+    def _encode_params(self) -> dict:
+        # Everything besides the input and the range that shapes a segment.
+        # Both copy paths cut the same range on keyframes, so single pass is not part of it.
+        if self.mode == 'accurate':
+            return {'mode': self.mode, 'args': _ACCURATE_ARGS}
+        if self.mode == 'smart':
+            # Segments without a usable GOP are fully re-encoded
+            return {'mode': self.mode, 'args': _SMART_EDGE_ARGS + _SMART_AUDIO_ARGS, 'fallback': _ACCURATE_ARGS}
+        return {'mode': self.mode}
+
+    def _segment_written(self, index, output_path):
+        # Record a finished segment for resume and share it through the cache
+        key = self._keys.get(index)
+        if key is not None:
+            self._manifest.record(key, output_path)
+            if self.use_cache:
+                get_segment_cache().store(key, output_path)
+        self._segment_ready(index, output_path)
+
+    def _segment_ready(self, index, output_path):
+        if self.on_segment is not None:
+            self.on_segment(index, output_path)
+
+    def _emit(self, percent, title):
+        if self.on_progress is not None:
+            self.on_progress(percent, title)
+
+    def _split_per_segment(self, segments):
+        workers = min(self.jobs, len(segments)) or 1
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(self._extract_segment, *seg) for seg in segments]
+            try:
+                for fut in as_completed(futures):
+                    fut.result()
+            except Exception:
+                # Stop the remaining segments before reporting the first failure
+                self.cancel()
+                raise
+
+    def _split_single_pass(self, segments) -> bool:
+        # One ffmpeg reads the input once and the segment muxer writes every chapter.
+        # Returns False when the keyframe layout did not allow one file per chapter,
+        # in which case the caller falls back to per-segment extraction.
+        first = float(segments[0][1])
+        last = float(segments[-1][2])
+        cut_times = [float(seg[1]) - first for seg in segments[1:]]
+        tmp_dir = tempfile.mkdtemp(prefix='.split_', dir=self.dest_dir)
+        list_path = os.path.join(tmp_dir, 'segments.csv')
+        try:
+            cmd = [
+                'ffmpeg', '-y', '-v', 'error',
+                '-ss', str(first), '-t', str(last - first), '-i', self.video_file,
+                '-c', 'copy',
+                '-f', 'segment',
+                '-segment_times', ','.join(f"{t:.3f}" for t in cut_times),
+                '-reset_timestamps', '1',
+                '-segment_list', list_path, '-segment_list_type', 'csv',
+                '-progress', 'pipe:1', '-nostats',
+                os.path.join(tmp_dir, '%05d.mp4'),
+            ]
+
+            def on_time(out_s):
+                # Progress is reported against the whole span being split
+                for index, start, end, title, _ in segments:
+                    rel_start = float(start) - first
+                    rel_end = float(end) - first
+                    self._done[index] = max(0.0, min(out_s, rel_end) - rel_start)
+                current = bisect.bisect_right(cut_times, out_s)
+                self._report(current, self._done[current], segments[current][3])
+
+            self._run_ffmpeg(cmd, on_time)
+            # Cuts snap to the next keyframe; a chapter without a keyframe of its own
+            # shifts every later file, so the titles would no longer match.
+            produced = []
+            with open(list_path, 'r', encoding='utf-8') as f:
+                for row in csv.reader(f):
+                    if len(row) >= 2:
+                        produced.append((row[0], float(row[1])))
+            if len(produced) != len(segments):
+                return False
+            for i, (_, actual_start) in enumerate(produced[1:], start=1):
+                next_cut = cut_times[i] if i < len(cut_times) else last - first
+                if actual_start >= next_cut:
+                    return False
+            for (name, _), (index, _, _, _, output_path) in zip(produced, segments):
+                os.replace(os.path.join(tmp_dir, name), output_path)
+                self._segment_written(index, output_path)
+            return True
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def _extract_segment(self, index, start_time, end_time, title, output_path):
+        seg_duration = max(1e-6, float(end_time - start_time))
+        # Write next to the output and move it into place only once complete,
+        # so an interrupted run never leaves a truncated segment behind
+        partial = partial_path(output_path)
+        try:
+            if not (self.mode == 'smart' and self._smart_cut_segment(index, start_time, end_time, title, partial)):
+                cmd = self._build_ffmpeg_cmd(start_time, end_time, partial)
+                self._run_ffmpeg(cmd, lambda out_s: self._report(index, min(seg_duration, out_s), title))
+            os.replace(partial, output_path)
+        except BaseException:
+            try:
+                os.remove(partial)
+            except OSError:
+                pass
+            raise
+        self._segment_written(index, output_path)
+        self._report(index, seg_duration, title)
+
+    def _smart_cut_segment(self, index, start_time, end_time, title, output_path) -> bool:
+        # Re-encode from the cut to the first keyframe and from the last keyframe to
+        # the end, stream-copy the GOPs in between and join the pieces with the
+        # concat demuxer. Returns False when the segment must be fully re-encoded.
+        source = self._smart_cut_source()
+        keyframes = source.get('keyframes') or []
+        if source.get('codec_name') != 'h264' or not keyframes:
+            return False
+        start = float(start_time)
+        end = float(end_time)
+        eps = 1e-3
+        i = bisect.bisect_left(keyframes, start - eps)
+        j = bisect.bisect_right(keyframes, end + eps) - 1
+        if i >= len(keyframes) or j < i:
+            return False
+        k1 = keyframes[i]  # first keyframe inside the segment
+        k2 = keyframes[j]  # last keyframe inside the segment
+        if k2 - k1 < eps:
+            # No complete GOP to copy
+            return False
+
+        seg_duration = max(1e-6, end - start)
+        tmp_dir = tempfile.mkdtemp(prefix='.smartcut_', dir=self.dest_dir)
+        try:
+            pieces = []
+            # (offset in segment, ffmpeg args producing an MPEG-TS video piece)
+            if k1 - start > eps:
+                pieces.append((0.0, self._smart_cut_encode_args(start, k1 - start, source)))
+            pieces.append((k1 - start, [
+                '-ss', str(k1), '-i', self.video_file, '-t', str(k2 - k1),
+                '-map', '0:v:0', '-an', '-sn', '-dn', '-c:v', 'copy',
+            ]))
+            if end - k2 > eps:
+                pieces.append((k2 - start, self._smart_cut_encode_args(k2, end - k2, source)))
+
+            list_path = os.path.join(tmp_dir, 'pieces.txt')
+            with open(list_path, 'w', encoding='utf-8') as f:
+                for n, (offset, args) in enumerate(pieces):
+                    piece_path = os.path.join(tmp_dir, f"{n:02d}.ts")
+                    cmd = ['ffmpeg', '-y', '-v', 'error'] + args + [
+                        '-f', 'mpegts', '-progress', 'pipe:1', '-nostats', piece_path,
+                    ]
+                    # Pieces account for 80% of the segment, the final mux for the rest
+                    self._run_ffmpeg(cmd, lambda out_s, o=offset: self._report(
+                        index, 0.8 * min(seg_duration, o + out_s), title))
+                    f.write("file '" + piece_path.replace("'", "'\\''") + "'\n")
+
+            # Join the video pieces losslessly; audio is re-encoded for the exact range
+            cmd = [
+                'ffmpeg', '-y', '-v', 'error',
+                '-f', 'concat', '-safe', '0', '-i', list_path,
+                '-ss', str(start), '-t', str(end - start), '-i', self.video_file,
+                '-map', '0:v:0', '-map', '1:a?',
+                '-c:v', 'copy',
+            ] + _SMART_AUDIO_ARGS + [
+                '-shortest', '-movflags', '+faststart',
+                '-progress', 'pipe:1', '-nostats', output_path,
+            ]
+            self._run_ffmpeg(cmd, lambda out_s: self._report(
+                index, 0.8 * seg_duration + 0.2 * min(seg_duration, out_s), title))
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        self._report(index, seg_duration, title)
+        return True
+
+    def _smart_cut_encode_args(self, start, duration, source):
+        args = [
+            '-ss', str(start), '-i', self.video_file, '-t', str(duration),
+            '-map', '0:v:0', '-an', '-sn', '-dn',
+        ] + _SMART_EDGE_ARGS
+        # Match the source layout so the decoder accepts the joined stream
+        if source.get('pix_fmt'):
+            args += ['-pix_fmt', source['pix_fmt']]
+        if source.get('profile'):
+            args += ['-profile:v', source['profile']]
+        if self.jobs > 1:
+            args += ['-threads', str(max(1, (os.cpu_count() or 1) // self.jobs))]
+        return args
+
+    def _smart_cut_source(self) -> dict:
+        # Probed once per run and shared by all segments
+        with self._source_lock:
+            if self._source is None:
+                self._source = _probe_smart_cut_source(self.video_file)
+            return self._source
+
+    def _report(self, index, seconds, title):
+        # Merge per-segment progress into one overall percentage
+        with self._lock:
+            self._done[index] = seconds
+            percent = int(sum(self._done) * 100 / max(1e-6, self._total))
+            if percent == self._last_percent:
+                return
+            self._last_percent = percent
+        self._emit(min(100, percent), title)
+
+    def _build_ffmpeg_cmd(self, start_time, end_time, output_path):
+        base = ['ffmpeg', '-y', '-v', 'error']
+        if self.mode in ('accurate', 'smart'):
+            cmd = base + [
+                '-ss', str(start_time), '-to', str(end_time), '-i', self.video_file,
+            ] + _ACCURATE_ARGS
+            if self.jobs > 1:
+                # Share the cores between the concurrent encoders instead of oversubscribing
+                cmd += ['-threads', str(max(1, (os.cpu_count() or 1) // self.jobs))]
+        else:
+            cmd = base + [
+                '-i', self.video_file,
+                '-ss', str(start_time), '-to', str(end_time),
+                '-c', 'copy',
+            ]
+        # Add progress reporting
+        cmd += ['-progress', 'pipe:1', '-nostats', output_path]
+        return cmd
+
+
+class SectionExtractor(FFmpegRunner):
+    # Cuts time ranges straight out of one or more inputs, such as the video
+    # and audio stream URLs of a download, into one file per range. Each input
+    # is opened with -ss/-t, so ffmpeg reads a remote source with range
+    # requests and only the kept parts are fetched. Copy mode starts each file
+    # at the keyframe before the cut; exact mode re-encodes.
+    def __init__(self, inputs, sections, dest_dir: str, exact: bool = False, headers: Optional[dict] = None,
+                 on_progress: Optional[Callable[[int, str], None]] = None):
+        super().__init__()
+        self.inputs = list(inputs)
+        self.sections = [(float(start), float(end), title) for start, end, title in sections]
+        self.dest_dir = dest_dir
+        self.exact = exact
+        self.headers = headers or {}
+        self.on_progress = on_progress
+        self.outputs = []
+
+    def run(self):
+        os.makedirs(self.dest_dir, exist_ok=True)
+        total = max(1e-6, sum(end - start for start, end, _title in self.sections))
+        done = 0.0
+        for number, (start, end, title) in enumerate(self.sections, start=1):
+            name = safe_filename(f"{number:02d} - {title}") or f"{number:02d}"
+            output_path = os.path.join(self.dest_dir, f"{name}.mp4")
+            partial = partial_path(output_path)
+            duration = end - start
+            try:
+                self._run_ffmpeg(
+                    self._build_cmd(start, duration, partial),
+                    lambda out_s, base=done, d=duration, t=title: self._emit((base + min(d, out_s)) / total, t))
+                os.replace(partial, output_path)
+            except BaseException:
+                try:
+                    os.remove(partial)
+                except OSError:
+                    pass
+                raise
+            done += duration
+            self.outputs.append(output_path)
+            self._emit(done / total, title)
+        return self.outputs
+
+    def _build_cmd(self, start, duration, output_path):
+        cmd = ['ffmpeg', '-y', '-v', 'error']
+        header_text = ''.join(f"{k}: {v}\r\n" for k, v in self.headers.items())
+        for source in self.inputs:
+            if header_text and re.match(r'https?://', source):
+                cmd += ['-headers', header_text]
+            cmd += ['-ss', f"{start:.3f}", '-t', f"{duration:.3f}", '-i', source]
+        for index in range(len(self.inputs)):
+            cmd += ['-map', f"{index}:v?", '-map', f"{index}:a?"]
+        if self.exact:
+            cmd += _ACCURATE_ARGS
+        else:
+            cmd += ['-c', 'copy', '-avoid_negative_ts', 'make_zero']
+        cmd += ['-progress', 'pipe:1', '-nostats', output_path]
+        return cmd
+
+    def _emit(self, fraction, title):
+        if self.on_progress is not None:
+            self.on_progress(min(100, int(fraction * 100)), title)
+
+
+def _probe_smart_cut_source(video_file: str) -> dict:
+    # Codec layout of the first video stream plus its keyframe times (sorted seconds)
+    source = get_probe_cache().video_stream(video_file, keyframes=True)
+    if not source:
+        return {}
+    # x264 spells profiles in lower case ("High" -> "high")
+    profile = (source.get('profile') or '').lower()
+    source['profile'] = profile if profile in ('baseline', 'main', 'high', 'high10', 'high422', 'high444') else ''
+    return source
+
+
+def _send_signal(proc, sig):
+    if sig is None or proc.poll() is not None:
+        return
+    try:
+        proc.send_signal(sig)
+    except Exception:
+        pass
+
+
+def _set_niceness(proc, niceness: int):
+    if not hasattr(os, 'setpriority'):
+        return
+    try:
+        os.setpriority(os.PRIO_PROCESS, proc.pid, niceness)
+    except Exception:
+        pass
@@ -0,0 +1,229 @@
+# MIT License
+# Copyright (c)  2024 Brahim El Hamdaoui
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# Automatic split points for recordings without a chapter list. ffmpeg decodes
+# the input into a small, low-rate raw stream on a pipe and the scores are
+# computed with NumPy one block of frames at a time, so memory stays bounded
+# however long the file is. Qt-free; results use the splitter's chapter format:
+# [(start_seconds, title), ..., (duration, 'End')].
+import subprocess
+from typing import Callable, Optional
+
+from probe_cache import get_probe_cache
+
+
+class _PipeAnalyzer:
+    # Common plumbing: run ffmpeg, read fixed-size blocks from its stdout,
+    # report progress against the duration and stop on cancel()
+    block_seconds = 30.0
+
+    def __init__(self, video_file: str, on_progress: Optional[Callable[[int], None]] = None):
+        self.video_file = video_file
+        # Called with the analysed percentage from the worker thread
+        self.on_progress = on_progress
+        self._cancel = False
+        self._proc = None
+        self._last_percent = -1
+
+    def cancel(self):
+        self._cancel = True
+        proc = self._proc
+        if proc is not None and proc.poll() is None:
+            try:
+                proc.kill()
+            except Exception:
+                pass
+
+    def _blocks(self, cmd, block_bytes: int):
+        # Yields raw byte blocks (the last one may be short)
+        if self._cancel:
+            raise Exception('Cancelled by user')
+        self._proc = proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            while True:
+                data = proc.stdout.read(block_bytes)
+                if self._cancel:
+                    raise Exception('Cancelled by user')
+                if not data:
+                    break
+                yield data
+            err = proc.stderr.read().decode('utf-8', errors='ignore')
+            proc.wait()
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            self._proc = None
+        if self._cancel:
+            raise Exception('Cancelled by user')
+        if proc.returncode != 0:
+            raise Exception(err or 'FFmpeg failed')
+
+    def _report(self, seconds: float, duration: Optional[float]):
+        if self.on_progress is None or not duration:
+            return
+        percent = max(0, min(100, int(seconds * 100 / duration)))
+        if percent != self._last_percent:
+            self._last_percent = percent
+            self.on_progress(percent)
+
+
+class SceneDetector(_PipeAnalyzer):
+    def __init__(self, video_file: str, threshold: float = 0.3, fps: float = 2.0, width: int = 64,
+                 height: int = 36, min_scene: float = 2.0,
+                 on_progress: Optional[Callable[[int], None]] = None):
+        super().__init__(video_file, on_progress)
+        # Score in [0, 1] above which a frame starts a new scene
+        self.threshold = threshold
+        self.fps = fps
+        self.width = width
+        self.height = height
+        # Scenes shorter than this are merged into the previous one
+        self.min_scene = min_scene
+
+    def run(self):
+        import numpy as np
+
+        duration = get_probe_cache().duration(self.video_file)
+        pixels = self.width * self.height
+        frames_per_block = max(2, int(self.block_seconds * self.fps))
+        cmd = [
+            'ffmpeg', '-v', 'error', '-nostdin', '-i', self.video_file, '-an', '-sn',
+            '-vf', f"fps={self.fps},scale={self.width}:{self.height},format=gray",
+            '-f', 'rawvideo', '-pix_fmt', 'gray', 'pipe:1',
+        ]
+        cuts = []
+        last_cut = 0.0
+        prev = None  # last frame and histogram of the previous block
+        index = 0  # frame number of the block's first frame
+        for data in self._blocks(cmd, frames_per_block * pixels):
+            n = len(data) // pixels
+            if n == 0:
+                break
+            frames = np.frombuffer(data, dtype=np.uint8, count=n * pixels).reshape(n, pixels)
+            hists = _histograms(np, frames)
+            if prev is not None:
+                frames = np.concatenate((prev[0], frames))
+                hists = np.concatenate((prev[1], hists))
+                first = index
+            else:
+                first = index + 1
+            if len(frames) > 1:
+                scores = _scene_scores(np, frames, hists)
+                for i in np.flatnonzero(scores > self.threshold):
+                    t = (first + int(i)) / self.fps
+                    if t - last_cut >= self.min_scene:
+                        cuts.append(round(t, 3))
+                        last_cut = t
+            prev = (frames[-1:], hists[-1:])
+            index += n
+            self._report(index / self.fps, duration)
+
+        end = duration or index / self.fps
+        chapters = [(0.0, 'Scene 1')]
+        for t in cuts:
+            if end - t >= self.min_scene:
+                chapters.append((t, f"Scene {len(chapters) + 1}"))
+        chapters.append((end, 'End'))
+        return chapters
+
+
+class SilenceDetector(_PipeAnalyzer):
+    def __init__(self, video_file: str, min_gap: float = 1.5, threshold_db: float = -40.0,
+                 rate: int = 8000, window: float = 0.05,
+                 on_progress: Optional[Callable[[int], None]] = None):
+        super().__init__(video_file, on_progress)
+        # Pauses at least this long (seconds) become cut points
+        self.min_gap = min_gap
+        # Windows quieter than this RMS level (dBFS) count as silence
+        self.threshold_db = threshold_db
+        self.rate = rate
+        self.window = window
+
+    def run(self):
+        import numpy as np
+
+        duration = get_probe_cache().duration(self.video_file)
+        win = max(1, int(self.rate * self.window))
+        step = win / float(self.rate)  # seconds per RMS window
+        samples_per_block = max(win, int(self.block_seconds * self.rate) // win * win)
+        level = (10 ** (self.threshold_db / 20.0)) * 32768.0
+        cmd = [
+            'ffmpeg', '-v', 'error', '-nostdin', '-i', self.video_file, '-vn', '-sn',
+            '-ac', '1', '-ar', str(self.rate), '-f', 's16le', 'pipe:1',
+        ]
+        cuts = []
+        carry = np.zeros(0, dtype=np.int16)  # samples short of a full window
+        windows = 0  # RMS windows analysed so far
+        silence_start = None  # window index where the current pause began
+        for data in self._blocks(cmd, samples_per_block * 2):
+            samples = np.frombuffer(data, dtype='<i2', count=len(data) // 2)
+            if len(carry):
+                samples = np.concatenate((carry, samples))
+            n = len(samples) // win
+            carry = samples[n * win:].copy()
+            if n == 0:
+                continue
+            frames = samples[:n * win].astype(np.float32).reshape(n, win)
+            rms = np.sqrt(np.mean(frames * frames, axis=1))
+            silent = (rms < level).astype(np.int8)
+            # Run boundaries: +1 where a pause starts, -1 where it ends
+            edges = np.diff(np.concatenate(([1 if silence_start is not None else 0], silent)))
+            starts = np.flatnonzero(edges == 1)
+            ends = np.flatnonzero(edges == -1)
+            if silence_start is not None:
+                starts = np.concatenate(([silence_start - windows], starts))
+            for a, b in zip(starts, ends):
+                self._add_cut(cuts, windows + int(a), windows + int(b), step)
+            silence_start = windows + int(starts[-1]) if len(starts) > len(ends) else None
+            windows += n
+            self._report(windows * step, duration)
+
+        # A pause running into the end of the file is not a cut
+        end = duration or windows * step
+        chapters = [(0.0, 'Part 1')]
+        for t in cuts:
+            if 0 < t < end:
+                chapters.append((t, f"Part {len(chapters) + 1}"))
+        chapters.append((end, 'End'))
+        return chapters
+
+    def _add_cut(self, cuts, first, stop, step):
+        # Cut in the middle of a long enough pause (windows first..stop-1)
+        if (stop - first) * step >= self.min_gap:
+            cuts.append(round((first + stop) * step / 2.0, 3))
+
+
+def _histograms(np, frames, bins: int = 32):
+    # Normalised per-frame histograms for all frames at once: offset each
+    # frame's bin indices so one bincount covers the whole block
+    n, pixels = frames.shape
+    idx = (frames >> (8 - (bins - 1).bit_length())).astype(np.int64)
+    idx += (np.arange(n, dtype=np.int64) * bins)[:, None]
+    counts = np.bincount(idx.ravel(), minlength=n * bins).reshape(n, bins)
+    return counts / float(pixels)
+
+
+def _scene_scores(np, frames, hists):
+    # Score of frame i+1 against frame i: mean absolute pixel change blended
+    # with the histogram's total variation distance, both in [0, 1]
+    pixel = np.abs(np.diff(frames.astype(np.int16), axis=0)).mean(axis=1) / 255.0
+    hist = np.abs(np.diff(hists, axis=0)).sum(axis=1) * 0.5
+    return (pixel + hist) * 0.5
@@ -0,0 +1,394 @@
+# MIT License
+# Copyright (c)  2024 Brahim El Hamdaoui
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# Batch upload queue for the YouTube uploader, and the ledger of YouTube Data
+# API quota units it is scheduled against. Items are kept in SQLite under
+# ~/.video_manager/ because a large batch can take several quota days; the
+# ledger is a small JSON file shared by every upload in the app.
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional
+
+from download_queue import DONE, FAILED, PAUSED, QUEUED, RUNNING
+
+
+QUEUE_PATH = os.path.join(os.path.expanduser("~"), ".video_manager", "upload_queue.sqlite3")
+QUOTA_PATH = os.path.join(os.path.expanduser("~"), ".video_manager", "youtube_quota.json")
+
+# Units charged per call by the YouTube Data API v3; failed calls cost the same
+QUOTA_COSTS = {
+    'videos.insert': 1600,
+    'thumbnails.set': 50,
+    'playlistItems.insert': 50,
+}
+# Default daily allowance of a Google Cloud project
+DAILY_QUOTA = 10000
+
+_PERSISTED = ('path', 'title', 'description', 'tags', 'playlist', 'privacy', 'category', 'state', 'attempts',
+              'error', 'video_id', 'session', 'seq')
+
+
+try:
+    from zoneinfo import ZoneInfo
+    _PACIFIC = ZoneInfo('America/Los_Angeles')
+except Exception:
+    # No tz database (e.g. Windows without tzdata): standard time is close enough
+    _PACIFIC = timezone(timedelta(hours=-8))
+
+
+def quota_day(now: Optional[float] = None) -> str:
+    # Quota days start at midnight Pacific time
+    return datetime.fromtimestamp(time.time() if now is None else now, _PACIFIC).strftime('%Y-%m-%d')
+
+
+def next_reset(now: Optional[float] = None) -> float:
+    # Epoch seconds of the next Pacific midnight
+    local = datetime.fromtimestamp(time.time() if now is None else now, _PACIFIC)
+    midnight = datetime.combine(local.date() + timedelta(days=1), datetime.min.time(), tzinfo=_PACIFIC)
+    return midnight.timestamp()
+
+
+def upload_cost(resumed: bool = False, playlist: bool = False, thumbnail: bool = False) -> int:
+    # A resumed session was paid for when it was opened
+    cost = 0 if resumed else QUOTA_COSTS['videos.insert']
+    if playlist:
+        cost += QUOTA_COSTS['playlistItems.insert']
+    if thumbnail:
+        cost += QUOTA_COSTS['thumbnails.set']
+    return cost
+
+
+class QuotaLedger:
+    # Units spent today, as charged by the upload workers. Units reserved for
+    # uploads that are running are held in memory, so uploads started at the
+    # same time cannot overdraw the day between them.
+    def __init__(self, path: str = QUOTA_PATH, daily: int = DAILY_QUOTA):
+        self.path = path
+        self.daily = daily
+        self._lock = threading.Lock()
+        self._day = quota_day()
+        self._used = 0
+        self._reserved = 0
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f) or {}
+            if data.get('day') == self._day:
+                self._used = int(data.get('used') or 0)
+        except (OSError, ValueError, TypeError, AttributeError):
+            pass
+
+    def used(self) -> int:
+        with self._lock:
+            self._roll()
+            return self._used
+
+    def remaining(self) -> int:
+        with self._lock:
+            self._roll()
+            return max(0, self.daily - self._used - self._reserved)
+
+    def reserve(self, units: int) -> bool:
+        with self._lock:
+            self._roll()
+            if self._used + self._reserved + units > self.daily:
+                return False
+            self._reserved += units
+            return True
+
+    def release(self, units: int):
+        with self._lock:
+            self._reserved = max(0, self._reserved - units)
+
+    def charge(self, call: str, count: int = 1, reserved: int = 0) -> int:
+        # A call made by an upload that holds a reservation is paid out of it,
+        # so the units are not counted as both reserved and used. Returns the
+        # units taken from the reservation.
+        units = QUOTA_COSTS.get(call, 1) * count
+        with self._lock:
+            self._roll()
+            drawn = max(0, min(units, reserved, self._reserved))
+            self._reserved -= drawn
+            self._used += units
+            self._save()
+            return drawn
+
+    def exhaust(self):
+        # The API refused a call for quota: nothing more goes out until the reset
+        with self._lock:
+            self._roll()
+            self._used = max(self._used, self.daily)
+            self._save()
+
+    def _roll(self):
+        day = quota_day()
+        if day != self._day:
+            self._day, self._used = day, 0
+
+    def _save(self):
+        # Never fail an upload over the ledger
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'day': self._day, 'used': self._used}, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+
+def get_quota_ledger() -> QuotaLedger:
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = QuotaLedger()
+        return _ledger
+
+
+class UploadItem:
+    __slots__ = _PERSISTED + ('id', 'percent', 'waiting')
+
+    def __init__(self, id, path, title, description='', tags='', playlist='', privacy='unlisted', category=27,
+                 state=QUEUED, attempts=0, error='', video_id='', session='', seq=0):
+        self.id = id
+        self.path = path
+        self.title = title
+        self.description = description
+        self.tags = tags  # comma-separated
+        self.playlist = playlist  # playlist id, empty for none
+        self.privacy = privacy
+        self.category = category
+        self.state = state
+        self.attempts = attempts
+        self.error = error
+        self.video_id = video_id
+        self.session = session  # resumable upload URI; continued instead of paying for a new insert
+        self.seq = seq
+        self.percent = 100 if state == DONE else 0
+        self.waiting = False  # submitted but held back by the resource scheduler
+
+    @property
+    def cost(self) -> int:
+        return upload_cost(resumed=bool(self.session), playlist=bool(self.playlist))
+
+
+class UploadQueue:
+    # Owned by the GUI thread, like the download queue
+    def __init__(self, path: str = QUEUE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self.items: List[UploadItem] = []
+        self._by_id = {}
+        self._load()
+
+    def add(self, entries: Iterable[dict]) -> List[UploadItem]:
+        # entries: dicts of UploadItem fields, at least path and title
+        seq = max((item.seq for item in self.items), default=0)
+        added = []
+        for fields in entries:
+            seq += 1
+            added.append(UploadItem(None, **dict(fields, seq=seq)))
+        if not added:
+            return []
+        columns = [name for name in _PERSISTED]
+        with self._lock:
+            conn = self._connect()
+            if conn is not None:
+                try:
+                    with conn:
+                        for item in added:
+                            item.id = conn.execute(
+                                f"INSERT INTO items ({', '.join(columns)}, added)"
+                                f" VALUES ({', '.join('?' * len(columns))}, ?)",
+                                [getattr(item, name) for name in columns] + [time.time()],
+                            ).lastrowid
+                except sqlite3.Error:
+                    conn = None
+            if conn is None:
+                # Keep working in memory when the database is unavailable
+                base = max(self._by_id, default=0)
+                for n, item in enumerate(added, start=1):
+                    item.id = base + n
+        self.items.extend(added)
+        for item in added:
+            self._by_id[item.id] = item
+        return added
+
+    def get(self, item_id) -> Optional[UploadItem]:
+        return self._by_id.get(item_id)
+
+    def next_ready(self) -> Optional[UploadItem]:
+        # Oldest first; the batch keeps the order its files were added in
+        for item in self.items:
+            if item.state == QUEUED:
+                return item
+        return None
+
+    def update(self, item: UploadItem, **fields):
+        for name, value in fields.items():
+            setattr(item, name, value)
+        persisted = [name for name in fields if name in _PERSISTED]
+        if not persisted or item.id not in self._by_id:
+            return
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                with conn:
+                    conn.execute(
+                        f"UPDATE items SET {', '.join(f'{name} = ?' for name in persisted)} WHERE id = ?",
+                        [getattr(item, name) for name in persisted] + [item.id],
+                    )
+            except sqlite3.Error:
+                pass
+
+    def remove(self, items: Iterable[UploadItem]):
+        ids = {item.id for item in items}
+        if not ids:
+            return
+        self.items = [item for item in self.items if item.id not in ids]
+        for item_id in ids:
+            self._by_id.pop(item_id, None)
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                with conn:
+                    conn.executemany('DELETE FROM items WHERE id = ?', [(i,) for i in ids])
+            except sqlite3.Error:
+                pass
+
+    def counts(self) -> dict:
+        counts = dict.fromkeys((QUEUED, RUNNING, PAUSED, DONE, FAILED), 0)
+        for item in self.items:
+            counts[item.state] += 1
+        return counts
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS items ('
+                    ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+                    ' path TEXT NOT NULL,'
+                    ' title TEXT NOT NULL,'
+                    " description TEXT NOT NULL DEFAULT '',"
+                    " tags TEXT NOT NULL DEFAULT '',"
+                    " playlist TEXT NOT NULL DEFAULT '',"
+                    " privacy TEXT NOT NULL DEFAULT 'unlisted',"
+                    ' category INTEGER NOT NULL DEFAULT 27,'
+                    ' state TEXT NOT NULL,'
+                    ' attempts INTEGER NOT NULL DEFAULT 0,'
+                    " error TEXT NOT NULL DEFAULT '',"
+                    " video_id TEXT NOT NULL DEFAULT '',"
+                    " session TEXT NOT NULL DEFAULT '',"
+                    ' seq INTEGER NOT NULL,'
+                    ' added REAL NOT NULL)'
+                )
+                conn.commit()
+                self._conn = conn
+            except sqlite3.Error:
+                return None
+        return self._conn
+
+    def _load(self):
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                rows = conn.execute(
+                    f"SELECT id, {', '.join(_PERSISTED)} FROM items ORDER BY seq"
+                ).fetchall()
+                # Uploads cut short by a quit or crash continue their session next time
+                with conn:
+                    conn.execute('UPDATE items SET state = ? WHERE state = ?', (QUEUED, RUNNING))
+            except sqlite3.Error:
+                return
+        for row in rows:
+            fields = dict(zip(('id',) + _PERSISTED, row))
+            if fields['state'] == RUNNING:
+                fields['state'] = QUEUED
+            item = UploadItem(**fields)
+            self.items.append(item)
+            self._by_id[item.id] = item
+
+
+def fill_template(template: str, fields: dict) -> str:
+    # Unknown placeholders are left as typed instead of failing the upload
+    try:
+        return template.format(**fields).strip()
+    except (AttributeError, KeyError, IndexError, TypeError, ValueError):
+        return template.strip()
+
+
+def batch_entries(paths: Iterable[str], title: str, description: str, tags: str, playlist: str, privacy: str,
+                  category: int) -> List[dict]:
+    # One item per file in natural name order, so "Part 10" follows "Part 9".
+    # Templates accept {name} (file name without extension), {folder} (name
+    # of the file's folder, the video title for split parts), {index} and
+    # {count}.
+    paths = sorted(paths, key=lambda p: [int(t) if t.isdigit() else t.lower() for t in re.split(r'(\d+)', p)])
+    entries = []
+    for index, path in enumerate(paths, start=1):
+        fields = {
+            'name': os.path.splitext(os.path.basename(path))[0],
+            'folder': os.path.basename(os.path.dirname(os.path.abspath(path))),
+            'index': index,
+            'count': len(paths),
+        }
+        entries.append({
+            'path': path,
+            # YouTube rejects titles over 100 characters
+            'title': (fill_template(title, fields) or fields['name'])[:100],
+            'description': fill_template(description, fields),
+            'tags': ', '.join(t for t in (fill_template(t, fields) for t in tags.split(',')) if t),
+            'playlist': playlist_id(playlist),
+            'privacy': privacy,
+            'category': int(category),
+        })
+    return entries
+
+
+def playlist_id(text: str) -> str:
+    # A playlist id, or the id taken from a playlist URL
+    text = (text or '').strip()
+    m = re.search(r'[?&]list=([\w-]+)', text)
+    return m.group(1) if m else text
@@ -8,11 +8,14 @@ from PyQt5.QtWebEngineWidgets import QWebEngineView
 from PyQt5.QtWidgets import QLineEdit
 from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
 from PyQt5.QtMultimediaWidgets import QVideoWidget
+from probe_cache import get_probe_cache, format_summary
 
 class VideoEditorWindow(QWidget):
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
+        self._probes = set()  # (worker, thread) probing the loaded file
+        self._probed_path = None  # the file whose media info the label should show
         self.initUI()
 
     def initUI(self):
@@ -40,6 +43,8 @@ class VideoEditorWindow(QWidget):
         self.browse_btn.clicked.connect(self.browse_file)
         top.addWidget(self.browse_btn)
         form.addRow(QLabel("Source:"), top)
+        self.info_label = QLabel("")
+        form.addRow(QLabel(""), self.info_label)
         layout.addLayout(form)
 
         # Load Video Button
@@ -71,8 +76,11 @@ class VideoEditorWindow(QWidget):
         # If local mp4 path
         if self.is_local_mp4(text):
             url = QUrl.fromLocalFile(os.path.abspath(text))
+            self._show_media_info(text)
             self._play_mp4(url)
             return
+        self._probed_path = None
+        self.info_label.clear()
         # If MP4 over HTTP(S)
         if re.match(r"^https?://", text) and text.lower().endswith(".mp4"):
             self._play_mp4(QUrl(text))
@@ -90,6 +98,7 @@ class VideoEditorWindow(QWidget):
         path, _ = QFileDialog.getOpenFileName(self, "Select MP4 File", filter="MP4 files (*.mp4)")
         if path:
             self.url_input.setText(path)
+            self._show_media_info(path)
             self._play_mp4(QUrl.fromLocalFile(path))
 
     def extract_video_id(self, url):
@@ -106,6 +115,27 @@ class VideoEditorWindow(QWidget):
         except Exception:
             return False
 
+    def _show_media_info(self, path: str):
+        # Probed off the GUI thread so playback starts at once; cached, so
+        # re-opening the same file costs no ffprobe run
+        self._probed_path = path
+        self.info_label.clear()
+        thread = QThread()
+        worker = _ProbeWorker(path)
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.result.connect(self._on_media_info)
+        worker.finished.connect(thread.quit, QtCore.Qt.DirectConnection)
+        worker.finished.connect(worker.deleteLater)
+        thread.finished.connect(lambda pair=(worker, thread): self._probes.discard(pair))
+        thread.finished.connect(thread.deleteLater)
+        self._probes.add((worker, thread))
+        thread.start()
+
+    def _on_media_info(self, path: str, info):
+        if path == self._probed_path:
+            self.info_label.setText(format_summary(info))
+
     def _play_mp4(self, url: QUrl):
         try:
             self.browser.hide()
@@ -164,6 +194,12 @@ class VideoEditorWindow(QWidget):
 
     def closeEvent(self, event):
         # self.main_window.show()  # Show the main window again when this window is closed
+        self._probed_path = None
+        for _worker, thread in list(self._probes):
+            try:
+                thread.wait()
+            except RuntimeError:
+                pass
         event.accept()  # Accept the close event
 
     # Friendly guidance when multimedia backends/codecs are missing
@@ -187,6 +223,23 @@ class VideoEditorWindow(QWidget):
         QMessageBox.warning(self, "Missing Codecs", msg)
 
 
+class _ProbeWorker(QObject):
+    result = pyqtSignal(str, object)  # (path, probe or None)
+    finished = pyqtSignal()
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+
+    def run(self):
+        try:
+            info = get_probe_cache().probe(self.path)
+        except Exception:
+            info = None
+        self.result.emit(self.path, info)
+        self.finished.emit()
+
+
 class _YTDLWorker(QObject):
     result = pyqtSignal(str, str)  # (direct_url, error)
     finished = pyqtSignal()
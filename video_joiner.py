@@ -0,0 +1,353 @@
+# MIT License
+# Copyright (c)  2024 Brahim El Hamdaoui
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+from PyQt5.QtWidgets import (
+    QWidget,
+    QVBoxLayout,
+    QHBoxLayout,
+    QFormLayout,
+    QLabel,
+    QPushButton,
+    QFileDialog,
+    QLineEdit,
+    QListWidget,
+    QAbstractItemView,
+    QMessageBox,
+    QProgressBar,
+)
+from PyQt5.QtGui import QFont
+from PyQt5.QtCore import Qt, QObject, pyqtSignal, QThread, QSettings
+import os
+import shutil
+from progress_bus import ensure_qt_pump, get_bus, new_job_id
+from job_scheduler import CPU, DISK, release_job, submit_job
+from join_engine import JoinEngine
+from probe_cache import get_probe_cache
+
+
+class VideoJoinerWindow(QWidget):
+    def __init__(self, main_window):
+        super().__init__()
+        self.main_window = main_window
+        self.initUI()
+
+    def initUI(self):
+        self.setWindowTitle("Video Joiner")
+        self.setGeometry(100, 100, 500, 400)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(16, 16, 16, 16)
+        layout.setSpacing(8)
+
+        font = QFont("Arial", 11)
+
+        # Inputs in join order
+        self.inputs_list = QListWidget(self)
+        self.inputs_list.setFont(font)
+        self.inputs_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.inputs_list.setDragDropMode(QAbstractItemView.InternalMove)
+        self.inputs_list.model().rowsMoved.connect(lambda *_: self._update_plan())
+        layout.addWidget(self.inputs_list, 1)
+
+        row_list = QHBoxLayout()
+        for text, handler in (('Add…', self.add_files), ('Remove', self.remove_selected),
+                              ('Up', lambda: self.move_selected(-1)), ('Down', lambda: self.move_selected(1))):
+            btn = QPushButton(text, self)
+            btn.setFont(font)
+            btn.clicked.connect(handler)
+            row_list.addWidget(btn)
+        layout.addLayout(row_list)
+
+        form = QFormLayout()
+        form.setLabelAlignment(Qt.AlignRight)
+        form.setFieldGrowthPolicy(QFormLayout.AllNonFixedFieldsGrow)
+        row_out = QHBoxLayout()
+        self.output_path = QLineEdit(self)
+        self.output_path.setFont(font)
+        row_out.addWidget(self.output_path, 1)
+        self.output_button = QPushButton('Browse', self)
+        self.output_button.setFont(font)
+        self.output_button.clicked.connect(self.select_output)
+        row_out.addWidget(self.output_button)
+        form.addRow(QLabel('Output file:'), row_out)
+        layout.addLayout(form)
+
+        # Which inputs can be copied and which need re-encoding
+        self.plan_label = QLabel('', self)
+        self.plan_label.setFont(font)
+        self.plan_label.setWordWrap(True)
+        layout.addWidget(self.plan_label)
+
+        self.progress = QProgressBar(self)
+        self.progress.setValue(0)
+        layout.addWidget(self.progress)
+
+        controls = QHBoxLayout()
+        self.join_button = QPushButton('Join Videos', self)
+        self.join_button.setFont(font)
+        self.join_button.clicked.connect(self.join_videos)
+        controls.addWidget(self.join_button)
+        self.cancel_button = QPushButton('Cancel', self)
+        self.cancel_button.setFont(font)
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_join)
+        controls.addWidget(self.cancel_button)
+        layout.addLayout(controls)
+
+        self.setLayout(layout)
+
+        self._job_id = None
+        self._plan = None
+        self._planner = None  # (worker, thread) reading the inputs' media information
+        self._threads = set()  # kept referenced until they have finished
+        ensure_qt_pump()
+        self.settings = QSettings()
+        saved_output = self.settings.value('joiner/output_path', '')
+        if saved_output:
+            self.output_path.setText(saved_output)
+
+    def add_files(self):
+        start_dir = self.settings.value('joiner/last_dir', '')
+        files, _ = QFileDialog.getOpenFileNames(self, 'Select Videos to Join', start_dir)
+        if not files:
+            return
+        self.settings.setValue('joiner/last_dir', os.path.dirname(files[0]))
+        self.inputs_list.addItems(files)
+        self._update_plan()
+
+    def remove_selected(self):
+        for item in self.inputs_list.selectedItems():
+            self.inputs_list.takeItem(self.inputs_list.row(item))
+        self._update_plan()
+
+    def move_selected(self, step: int):
+        row = self.inputs_list.currentRow()
+        target = row + step
+        if row < 0 or not 0 <= target < self.inputs_list.count():
+            return
+        item = self.inputs_list.takeItem(row)
+        self.inputs_list.insertItem(target, item)
+        self.inputs_list.setCurrentRow(target)
+        self._update_plan()
+
+    def select_output(self):
+        path, _ = QFileDialog.getSaveFileName(self, 'Save Joined Video', self.output_path.text(), 'MP4 (*.mp4);;All files (*)')
+        if path:
+            self.output_path.setText(path)
+            self.settings.setValue('joiner/output_path', path)
+
+    def _inputs(self):
+        return [self.inputs_list.item(i).text() for i in range(self.inputs_list.count())]
+
+    def closeEvent(self, event):
+        if self._planner is not None:
+            worker, thread = self._planner
+            try:
+                worker.cancel()
+                thread.wait()
+            except RuntimeError:
+                pass
+            self._planner = None
+        event.accept()
+
+    def _update_plan(self):
+        # Probing runs in the background; one plan at a time, and a list that
+        # changed meanwhile is planned again once it finishes. Probes are
+        # cached, so reordering or a re-plan only reads new files.
+        self._plan = None
+        inputs = self._inputs()
+        if len(inputs) < 2:
+            self.plan_label.setText('')
+            return
+        self.plan_label.setText('Reading media information…')
+        if self._planner is not None:
+            return
+        thread = QThread()
+        worker = _PlanWorker(inputs)
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.result.connect(lambda entries, w=worker: self._on_plan(w.inputs, entries))
+        worker.error.connect(lambda msg, w=worker: self._on_plan_error(w.inputs, msg))
+        worker.finished.connect(lambda w=worker: self._on_plan_finished(w))
+        # Quit from the worker's thread, so closeEvent can wait for it
+        worker.finished.connect(thread.quit, Qt.DirectConnection)
+        worker.finished.connect(worker.deleteLater)
+        thread.finished.connect(lambda th=thread: self._threads.discard(th))
+        thread.finished.connect(thread.deleteLater)
+        self._threads.add(thread)
+        self._planner = (worker, thread)
+        thread.start()
+
+    def _on_plan_finished(self, worker):
+        if self._planner is None or self._planner[0] is not worker:
+            return
+        self._planner = None
+        if worker.inputs != self._inputs():
+            self._update_plan()
+
+    def _on_plan_error(self, inputs, msg: str):
+        if inputs == self._inputs():
+            self.plan_label.setText(msg)
+
+    def _on_plan(self, inputs, entries):
+        if inputs != self._inputs():
+            return
+        self._plan = entries
+        mismatched = [os.path.basename(path) for path, _, ok in entries if not ok]
+        if not mismatched:
+            self.plan_label.setText(f"All {len(entries)} files share codec parameters and will be joined without re-encoding.")
+        else:
+            self.plan_label.setText(
+                f"{len(entries) - len(mismatched)} of {len(entries)} files will be copied; "
+                f"re-encoding to match: {', '.join(mismatched)}")
+
+    def join_videos(self):
+        inputs = self._inputs()
+        output = self.output_path.text().strip()
+        if len(inputs) < 2:
+            QMessageBox.warning(self, "Missing Videos", "Please add at least two videos to join.")
+            return
+        if not output:
+            QMessageBox.warning(self, "Missing Output", "Please choose an output file.")
+            return
+        if os.path.abspath(output) in {os.path.abspath(p) for p in inputs}:
+            QMessageBox.warning(self, "Invalid Output", "The output file cannot be one of the inputs.")
+            return
+        if shutil.which("ffmpeg") is None:
+            QMessageBox.critical(self, "FFmpeg Not Found", "FFmpeg is required. Please install FFmpeg and ensure it is on your PATH.")
+            return
+        self.settings.setValue('joiner/output_path', output)
+
+        self.thread = QThread()
+        self.worker = _JoinWorker(inputs, output)
+        self.worker.moveToThread(self.thread)
+        self.thread.started.connect(self.worker.run)
+        self._job_id = self.worker.job_id
+        get_bus().subscribe(self._job_id, self._on_bus_progress)
+        self.worker.finished.connect(self._on_finished)
+        self.worker.error.connect(self._on_error)
+        self.worker.finished.connect(self.thread.quit)
+        self.worker.finished.connect(self.worker.deleteLater)
+        self.thread.finished.connect(self.thread.deleteLater)
+
+        self.join_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.progress.setValue(0)
+
+        # A pure concat is I/O; re-encoding the odd inputs also needs cores
+        demands = {DISK: 1}
+        if self._plan is None or any(not ok for _, _, ok in self._plan):
+            demands[CPU] = self.worker.engine.jobs
+        engine = self.worker.engine
+        started = submit_job(
+            self.main_window, self._job_id, demands, self.thread.start,
+            label=f"Join {os.path.basename(output)}",
+            pause=engine.pause, resume=engine.resume, renice=engine.renice,
+        )
+        self.progress.setFormat("%p%" if started else "Queued")
+
+    def cancel_join(self):
+        if hasattr(self, 'worker') and self.worker:
+            self.worker.cancel()
+            scheduler = getattr(self.main_window, 'scheduler', None)
+            if scheduler is not None and self._job_id and scheduler.is_queued(self._job_id):
+                # Never admitted: drop it and let the worker finish through the usual path
+                scheduler.finish(self._job_id)
+                self.thread.start()
+
+    def _on_bus_progress(self, _job_id, fields: dict):
+        self.progress.setFormat("%p%")
+        self.progress.setValue(fields.get('percent', 0))
+
+    def _stop_progress(self):
+        # Late bus updates must not overwrite the final state
+        if self._job_id:
+            get_bus().unsubscribe(self._job_id, self._on_bus_progress)
+            get_bus().discard(self._job_id)
+
+    def _on_finished(self):
+        self._stop_progress()
+        release_job(self.main_window, self._job_id)
+        self._job_id = None
+        self.progress.setFormat("%p%")
+        self.progress.setValue(100)
+        self.join_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+
+    def _on_error(self, msg: str):
+        self._stop_progress()
+        QMessageBox.critical(self, "Join Error", msg)
+        self.join_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+
+
+class _PlanWorker(QObject):
+    # Probes the inputs one by one, then reports [(input, probe, matches reference)]
+    finished = pyqtSignal()
+    error = pyqtSignal(str)
+    result = pyqtSignal(object)
+
+    def __init__(self, inputs):
+        super().__init__()
+        self.inputs = list(inputs)
+        self._cancel = False
+
+    def cancel(self):
+        self._cancel = True
+
+    def run(self):
+        try:
+            cache = get_probe_cache()
+            for path in self.inputs:
+                if self._cancel:
+                    break
+                cache.probe(path)
+            if not self._cancel:
+                _, entries = JoinEngine(self.inputs, '').plan()
+                self.result.emit(entries)
+        except Exception as e:
+            self.error.emit(str(e))
+        self.finished.emit()
+
+
+class _JoinWorker(QObject):
+    # Progress (percent, current file) is published on the progress bus under job_id
+    finished = pyqtSignal()
+    error = pyqtSignal(str)
+
+    def __init__(self, inputs, output_path: str, job_id: str = None):
+        super().__init__()
+        self.job_id = job_id or new_job_id('join')
+        self.engine = JoinEngine(
+            inputs,
+            output_path,
+            on_progress=lambda percent, name: get_bus().publish(self.job_id, percent=percent, title=name),
+        )
+
+    def cancel(self):
+        self.engine.cancel()
+
+    def run(self):
+        try:
+            self.engine.run()
+            self.finished.emit()
+        except Exception as e:
+            self.error.emit(str(e))
+            self.finished.emit()
@@ -20,6 +20,7 @@
 # SOFTWARE.
 import sys
 import os
+import signal
 from PyQt5 import QtCore, QtGui, QtWidgets
 from PyQt5.QtGui import QIcon, QPalette, QColor
 from PyQt5.QtCore import Qt
@@ -36,6 +37,13 @@ from PyQt5.QtWidgets import (
     QAction,
     QStyle,
     QColorDialog,
+    QDialog,
+    QDialogButtonBox,
+    QFormLayout,
+    QLabel,
+    QSpinBox,
+    QPlainTextEdit,
+    QMessageBox,
 )
 try:
     from PyQt5.QtSvg import QSvgRenderer
@@ -43,8 +51,13 @@ except Exception:  # QtSvg not always present
     QSvgRenderer = None
 from youtube_downloader import YouTubeDownloaderWindow
 from video_splitter import VideoSplitterWindow
+from video_joiner import VideoJoinerWindow
 from video_editor import VideoEditorWindow
 from youtube_uploader import YouTubeUploaderWindow
+from pipeline import PipelineWindow
+from progress_bus import ensure_qt_pump
+from job_scheduler import CPU, DISK, NETWORK, JobScheduler, default_budgets
+from bandwidth import DOWNLOAD, UPLOAD, get_limiter, parse_schedule
 
 
 # Resolve resource paths (works in source and PyInstaller one-file)
@@ -70,6 +83,18 @@ class MainWindow(QMainWindow):
         # Global style: Fusion for consistency
         QApplication.setStyle("Fusion")
 
+        # Deliver coalesced worker progress to the tools at a fixed frame rate
+        ensure_qt_pump()
+
+        # Tools submit their work here; admission follows the resource budgets
+        settings = QtCore.QSettings()
+        defaults = default_budgets()
+        budgets = {r: int(settings.value(f"scheduler/{r}", defaults[r])) for r in (CPU, DISK, NETWORK)}
+        self.scheduler = JobScheduler(budgets, on_change=self._update_jobs_status)
+        self.jobs_label = QLabel("")
+        self.statusBar().addPermanentWidget(self.jobs_label)
+        self._load_bandwidth(settings)
+
         # Central MDI area where tools open as subwindows
         self.mdi = QMdiArea()
         self.setCentralWidget(self.mdi)
@@ -171,6 +196,14 @@ class MainWindow(QMainWindow):
             )
         self._tool_buttons.append(b)
         tools_layout.addWidget(b)
+        b = make_button(
+                "Video Joiner",
+                lambda: self.open_tool("joiner"),
+                icon_name="insert-link",
+                sp=QStyle.SP_FileDialogListView,
+            )
+        self._tool_buttons.append(b)
+        tools_layout.addWidget(b)
         b = make_button(
                 "Basic Video Editor",
                 lambda: self.open_tool("editor"),
@@ -189,6 +222,14 @@ class MainWindow(QMainWindow):
             )
         self._tool_buttons.append(b)
         tools_layout.addWidget(b)
+        b = make_button(
+                "Pipeline",
+                lambda: self.open_tool("pipeline"),
+                icon_name="media-playlist-repeat",
+                sp=QStyle.SP_MediaPlay,
+            )
+        self._tool_buttons.append(b)
+        tools_layout.addWidget(b)
         tools_layout.addStretch(1)
 
         self.tools_dock.setWidget(tools_container)
@@ -260,6 +301,26 @@ class MainWindow(QMainWindow):
         self.density_compact_act.triggered.connect(lambda: self.apply_density("compact"))
         self.apply_density(settings.value("ui/density", "comfortable"))
 
+        # Jobs menu: budgets and knobs for encodes running next to transfers
+        jobs_menu = self.menuBar().addMenu("&Jobs")
+        self.renice_act = QAction("Lower Encoder Priority", self, checkable=True)
+        self.renice_act.toggled.connect(self.set_renice_encodes)
+        jobs_menu.addAction(self.renice_act)
+        self.pause_encodes_act = QAction("Pause Encodes", self, checkable=True)
+        self.pause_encodes_act.toggled.connect(lambda on: self.scheduler.set_paused(CPU, on))
+        # Stopping processes needs POSIX signals
+        self.pause_encodes_act.setEnabled(hasattr(signal, "SIGSTOP"))
+        jobs_menu.addAction(self.pause_encodes_act)
+        jobs_menu.addSeparator()
+        budgets_act = QAction("Resource Budgets…", self)
+        budgets_act.triggered.connect(self.edit_budgets)
+        jobs_menu.addAction(budgets_act)
+        bandwidth_act = QAction("Bandwidth Limits…", self)
+        bandwidth_act.triggered.connect(self.edit_bandwidth)
+        jobs_menu.addAction(bandwidth_act)
+        self.renice_act.setChecked(settings.value("scheduler/renice_encodes", "false") in (True, "true"))
+        self._update_jobs_status()
+
         # Open first tool by default
         self.open_tool("downloader")
 
@@ -282,6 +343,11 @@ class MainWindow(QMainWindow):
             title = "Video Splitter"
             icon_path = "icons/splitter.svg"
             theme = "edit-cut"; sp = QStyle.SP_TrashIcon
+        elif key == "joiner":
+            widget = VideoJoinerWindow(self)
+            title = "Video Joiner"
+            icon_path = None
+            theme = "insert-link"; sp = QStyle.SP_FileDialogListView
         elif key == "editor":
             widget = VideoEditorWindow(self)
             title = "Basic Video Editor"
@@ -292,6 +358,11 @@ class MainWindow(QMainWindow):
             title = "YouTube Uploader"
             icon_path = "icons/uploader.svg"
             theme = "document-send"; sp = QStyle.SP_ArrowUp
+        elif key == "pipeline":
+            widget = PipelineWindow(self)
+            title = "Pipeline"
+            icon_path = None
+            theme = "media-playlist-repeat"; sp = QStyle.SP_MediaPlay
         else:
             return
 
@@ -421,6 +492,87 @@ class MainWindow(QMainWindow):
         # Reapply theme to include density overrides
         self.apply_theme(QtCore.QSettings().value("ui/theme", "light"))
 
+    def set_renice_encodes(self, on: bool):
+        QtCore.QSettings().setValue("scheduler/renice_encodes", bool(on))
+        self.scheduler.set_niceness(CPU, 10 if on else 0)
+
+    def edit_budgets(self):
+        dlg = QDialog(self)
+        dlg.setWindowTitle("Resource Budgets")
+        form = QFormLayout(dlg)
+        spins = {}
+        for resource, label in ((CPU, "CPU slots:"), (DISK, "Disk slots:"), (NETWORK, "Network slots:")):
+            spin = QSpinBox()
+            spin.setRange(1, 64)
+            spin.setValue(self.scheduler.budgets[resource])
+            form.addRow(label, spin)
+            spins[resource] = spin
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(dlg.accept)
+        buttons.rejected.connect(dlg.reject)
+        form.addRow(buttons)
+        if dlg.exec_() != QDialog.Accepted:
+            return
+        s = QtCore.QSettings()
+        for resource, spin in spins.items():
+            s.setValue(f"scheduler/{resource}", spin.value())
+            self.scheduler.set_budget(resource, spin.value())
+
+    def edit_bandwidth(self):
+        # Applied to running transfers at once; no job needs restarting
+        s = QtCore.QSettings()
+        dlg = QDialog(self)
+        dlg.setWindowTitle("Bandwidth Limits")
+        form = QFormLayout(dlg)
+        spins = {}
+        for direction, label in ((DOWNLOAD, "Download (KB/s):"), (UPLOAD, "Upload (KB/s):")):
+            spin = QSpinBox()
+            spin.setRange(0, 10 ** 7)
+            spin.setSpecialValueText("Unlimited")
+            spin.setValue(int(s.value(f"bandwidth/{direction}_kbps", 0)))
+            form.addRow(label, spin)
+            spins[direction] = spin
+        schedule = QPlainTextEdit()
+        schedule.setPlaceholderText("09:00-18:00 2000 500\n# HH:MM-HH:MM DOWNLOAD UPLOAD in KB/s; 0 unlimited, - unchanged")
+        schedule.setPlainText(s.value("bandwidth/schedule", "") or "")
+        form.addRow("Schedule:", schedule)
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(dlg.accept)
+        buttons.rejected.connect(dlg.reject)
+        form.addRow(buttons)
+        while dlg.exec_() == QDialog.Accepted:
+            try:
+                parse_schedule(schedule.toPlainText())
+            except ValueError as e:
+                QMessageBox.warning(self, "Invalid Schedule", str(e))
+                continue
+            for direction, spin in spins.items():
+                s.setValue(f"bandwidth/{direction}_kbps", spin.value())
+            s.setValue("bandwidth/schedule", schedule.toPlainText())
+            self._load_bandwidth(s)
+            return
+
+    def _load_bandwidth(self, settings):
+        limiter = get_limiter()
+        for direction in (DOWNLOAD, UPLOAD):
+            limiter.set_limit(direction, int(settings.value(f"bandwidth/{direction}_kbps", 0)) * 1024)
+        try:
+            limiter.set_schedule(parse_schedule(settings.value("bandwidth/schedule", "") or ""))
+        except ValueError:
+            limiter.set_schedule([])
+
+    def _update_jobs_status(self):
+        snap = self.scheduler.snapshot()
+        running, queued = len(snap['running']), len(snap['queued'])
+        if not running and not queued:
+            self.jobs_label.setText("")
+            return
+        used = ", ".join(f"{r} {snap['used'][r]}/{snap['budgets'][r]}" for r in (CPU, DISK, NETWORK))
+        text = f"Jobs: {running} running, {queued} queued ({used})"
+        if snap['paused']:
+            text += " · encodes paused"
+        self.jobs_label.setText(text)
+
     # Hover elevation for tool buttons
     def eventFilter(self, obj, event):
         if hasattr(self, "_tool_buttons") and obj in self._tool_buttons:
@@ -0,0 +1,341 @@
+# MIT License
+# Copyright (c)  2024 Brahim El Hamdaoui
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# Console entry point. Subcommands run headless and must stay free of PyQt5
+# imports so that thousands of short jobs are not dominated by start-up time;
+# anything else launches the GUI from video_manager.
+import os
+import sys
+import json
+import time
+import threading
+
+
+COMMANDS = ('split', 'archive', 'fetch')
+MODES = ('copy', 'smart', 'accurate')
+POINTS = ('chapters', 'scenes', 'silence')
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] in COMMANDS:
+        sys.exit(run_command(argv[0], argv[1:]))
+    from video_manager import main as gui_main
+    gui_main()
+
+
+def run_command(name: str, args) -> int:
+    if name == 'split':
+        return _cmd_split(args)
+    if name == 'archive':
+        return _cmd_archive(args)
+    if name == 'fetch':
+        return _cmd_fetch(args)
+    return 2
+
+
+def _cmd_split(args) -> int:
+    import argparse
+    from concurrent.futures import ThreadPoolExecutor, wait
+
+    parser = argparse.ArgumentParser(
+        prog='video_manager split',
+        description='Split videos listed in a manifest without starting the GUI. '
+                    'Progress and results are printed as JSON lines.',
+    )
+    parser.add_argument('manifest', help='CSV (video,chapters,dest[,mode][,points]) or JSON list of job objects; '
+                                         'an empty chapters entry uses the .info.json sidecar or embedded chapters')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='number of videos split at once (default: 1)')
+    parser.add_argument('--ffmpeg-jobs', type=int, default=0,
+                        help='ffmpeg processes per video (default: cores divided by --jobs)')
+    parser.add_argument('--mode', choices=MODES, default='copy',
+                        help='cut mode for jobs that do not set one (default: copy)')
+    parser.add_argument('--points', choices=POINTS, default='chapters',
+                        help='where split points come from for jobs that do not set one (default: chapters)')
+    parser.add_argument('--scene-threshold', type=float, default=0.3,
+                        help='scene change score in [0, 1] that starts a new scene (default: 0.3)')
+    parser.add_argument('--min-gap', type=float, default=1.5,
+                        help='shortest pause in seconds that becomes a split point (default: 1.5)')
+    parser.add_argument('--no-single-pass', action='store_true',
+                        help='run one ffmpeg per chapter in copy mode')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='cut every segment again instead of reusing unchanged ones from the segment cache')
+    parser.add_argument('--progress-hz', type=float, default=10.0,
+                        help='maximum progress lines per second per job (default: 10)')
+    opts = parser.parse_args(args)
+
+    try:
+        jobs = _load_manifest(opts.manifest)
+    except Exception as e:
+        _emit({'event': 'error', 'message': f"Cannot read manifest: {e}"})
+        return 2
+
+    from split_engine import SplitEngine, ensure_final_segment, load_chapters
+    from split_points import SceneDetector, SilenceDetector
+    from probe_cache import get_probe_cache
+    from progress_bus import get_bus
+
+    bus = get_bus()
+    # Progress is coalesced per job and printed at a fixed rate from this thread
+    bus.subscribe(None, lambda job, fields: _emit(
+        {'event': 'progress', 'job': job, 'percent': fields.get('percent', 0), 'title': fields.get('title', '')},
+        unless_finished=job))
+
+    parallel = max(1, opts.jobs)
+    ffmpeg_jobs = opts.ffmpeg_jobs or max(1, (os.cpu_count() or 1) // parallel)
+    engines = {}
+    engines_lock = threading.Lock()
+    results = {'ok': 0, 'failed': 0}
+
+    def run_job(index, job):
+        started = time.monotonic()
+        _emit({'event': 'start', 'job': index, 'video': job['video']})
+        try:
+            points = job.get('points') or opts.points
+            if points != 'chapters':
+                if points == 'scenes':
+                    detector = SceneDetector(job['video'], threshold=opts.scene_threshold)
+                else:
+                    detector = SilenceDetector(job['video'], min_gap=opts.min_gap)
+                detector.on_progress = lambda pct: bus.publish(index, percent=pct, title='Analyzing')
+                with engines_lock:
+                    engines[index] = detector
+                chapters, source, malformed = detector.run(), points, []
+                _emit({'event': 'points', 'job': index, 'source': points,
+                       'chapters': [{'start': t, 'title': title} for t, title in chapters]})
+            else:
+                chapters, source, malformed = load_chapters(job['video'], job.get('chapters'))
+            if source is None:
+                raise ValueError('No chapters file given and no embedded chapters or .info.json found.')
+            if malformed:
+                _emit({'event': 'warning', 'job': index,
+                       'message': 'Skipped unreadable chapter lines',
+                       'lines': [{'line': n, 'text': text} for n, text in malformed]})
+            if source == 'file':
+                chapters = ensure_final_segment(chapters, get_probe_cache().duration(job['video']))
+            if len(chapters) < 2:
+                raise ValueError('Need at least two timestamps to form a segment.')
+            os.makedirs(job['dest'], exist_ok=True)
+            engine = SplitEngine(
+                job['video'],
+                chapters,
+                job['dest'],
+                mode=job.get('mode') or opts.mode,
+                jobs=ffmpeg_jobs,
+                single_pass=not opts.no_single_pass,
+                on_progress=lambda pct, title: bus.publish(index, percent=pct, title=title),
+                use_cache=not opts.no_cache,
+            )
+            with engines_lock:
+                engines[index] = engine
+            engine.run()
+            _emit({'event': 'done', 'job': index, 'outputs': engine.outputs, 'reused': engine.reused,
+                   'seconds': round(time.monotonic() - started, 3)}, finished=index)
+            ok = True
+        except Exception as e:
+            _emit({'event': 'error', 'job': index, 'message': str(e)}, finished=index)
+            ok = False
+        finally:
+            with engines_lock:
+                engines.pop(index, None)
+        with engines_lock:
+            results['ok' if ok else 'failed'] += 1
+
+    pool = ThreadPoolExecutor(max_workers=parallel)
+    try:
+        futures = [pool.submit(run_job, i, job) for i, job in enumerate(jobs)]
+        interval = 1.0 / max(0.1, opts.progress_hz)
+        while wait(futures, timeout=interval).not_done:
+            bus.pump()
+        bus.pump()
+    except KeyboardInterrupt:
+        # Tear down every running ffmpeg before leaving
+        with engines_lock:
+            running = list(engines.values())
+        for engine in running:
+            engine.cancel()
+        pool.shutdown(wait=True, cancel_futures=True)
+        _emit({'event': 'cancelled'})
+        return 130
+    pool.shutdown(wait=True)
+    _emit({'event': 'summary', 'ok': results['ok'], 'failed': results['failed']})
+    return 0 if results['failed'] == 0 else 1
+
+
+def _cmd_archive(args) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog='video_manager archive',
+        description='Query the download archive shared with the GUI. Results are printed as JSON lines.',
+    )
+    sub = parser.add_subparsers(dest='action', required=True)
+    p_list = sub.add_parser('list', help='list archived downloads')
+    p_list.add_argument('--search', default='', help='match title or path substring, video id or URL')
+    p_check = sub.add_parser('check', help='report whether URLs are already downloaded (no network access)')
+    p_check.add_argument('urls', nargs='+')
+    p_check.add_argument('--height', default=None, help='only count downloads made with this resolution cap')
+    p_forget = sub.add_parser('forget', help='drop URLs or EXTRACTOR:ID entries from the archive')
+    p_forget.add_argument('keys', nargs='+')
+    sub.add_parser('prune', help='drop entries whose file no longer exists')
+    opts = parser.parse_args(args)
+
+    from download_archive import get_download_archive
+    archive = get_download_archive()
+
+    if opts.action == 'list':
+        for entry in archive.entries(opts.search):
+            _emit(dict(entry, event='entry', exists=os.path.isfile(entry['path'])))
+        return 0
+    if opts.action == 'check':
+        missing = 0
+        for url in opts.urls:
+            key = archive.key_for_url(url)
+            found = []
+            if key:
+                found = archive.versions(*key)
+                if opts.height is not None:
+                    found = [e for e in found if e['max_height'] == str(opts.height)]
+            missing += not found
+            _emit({'event': 'hit' if found else 'miss', 'url': url,
+                   'paths': [e['path'] for e in found]})
+        return 0 if not missing else 1
+    if opts.action == 'forget':
+        removed = 0
+        for key in opts.keys:
+            if '://' in key:
+                parsed = archive.key_for_url(key)
+            else:
+                parsed = tuple(key.split(':', 1)) if ':' in key else None
+            if parsed:
+                removed += archive.forget(*parsed)
+        _emit({'event': 'forgotten', 'entries': removed})
+        return 0
+    _emit({'event': 'pruned', 'entries': archive.prune()})
+    return 0
+
+
+def _cmd_fetch(args) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog='video_manager fetch',
+        description='Download a file over several HTTP range connections. '
+                    'Progress and results are printed as JSON lines.',
+    )
+    parser.add_argument('url')
+    parser.add_argument('-o', '--output', default='',
+                        help='destination file (default: last part of the URL path in the current folder)')
+    parser.add_argument('-c', '--connections', type=int, default=4,
+                        help='most connections used at once (default: 4)')
+    parser.add_argument('--limit-rate', type=int, default=0, help='combined speed cap in KB/s (default: unlimited)')
+    parser.add_argument('-H', '--header', action='append', default=[], help="extra request header, 'Name: value'")
+    parser.add_argument('--progress-hz', type=float, default=2.0,
+                        help='maximum progress lines per second (default: 2)')
+    opts = parser.parse_args(args)
+
+    from urllib.parse import unquote, urlsplit
+    from range_downloader import RangeDownloader
+
+    output = opts.output or unquote(os.path.basename(urlsplit(opts.url).path)) or 'download'
+    headers = dict(h.split(':', 1) for h in opts.header if ':' in h)
+    headers = {k.strip(): v.strip() for k, v in headers.items()}
+    last = [0.0]
+
+    def progress(downloaded, total, speed, eta):
+        now = time.monotonic()
+        if now - last[0] >= 1.0 / max(0.1, opts.progress_hz) or downloaded == total:
+            last[0] = now
+            _emit({'event': 'progress', 'downloaded': downloaded, 'total': total,
+                   'percent': int(downloaded * 100 / total) if total else None,
+                   'speed': int(speed) if speed else None, 'eta': eta})
+
+    # A .part file and its range state let an interrupted fetch continue
+    part = output + '.part'
+    downloader = RangeDownloader(opts.url, part, connections=opts.connections, headers=headers,
+                                 on_progress=progress, rate=lambda: opts.limit_rate * 1024)
+    started = time.monotonic()
+    _emit({'event': 'start', 'url': opts.url, 'path': output})
+    try:
+        size = downloader.run()
+        os.replace(part, output)
+    except KeyboardInterrupt:
+        downloader.cancel()
+        _emit({'event': 'cancelled'})
+        return 130
+    except Exception as e:
+        _emit({'event': 'error', 'message': str(e)})
+        return 1
+    _emit({'event': 'done', 'path': output, 'bytes': size, 'connections': downloader.peak_connections,
+           'seconds': round(time.monotonic() - started, 3)})
+    return 0
+
+
+def _load_manifest(path: str):
+    # Returns a list of {'video', 'dest'[, 'chapters', 'mode', 'points']} with paths
+    # resolved relative to the manifest's folder.
+    import csv
+
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    if path.lower().endswith('.json') or text.lstrip().startswith(('[', '{')):
+        data = json.loads(text)
+        rows = data.get('jobs', []) if isinstance(data, dict) else data
+    else:
+        rows = list(csv.DictReader(text.splitlines()))
+    base = os.path.dirname(os.path.abspath(path))
+    jobs = []
+    for n, row in enumerate(rows, start=1):
+        row = {str(k).strip().lower(): (v.strip() if isinstance(v, str) else v) for k, v in row.items() if k}
+        missing = [k for k in ('video', 'dest') if not row.get(k)]
+        if missing:
+            raise ValueError(f"entry {n} is missing {', '.join(missing)}")
+        job = {k: os.path.join(base, os.path.expanduser(row[k])) for k in ('video', 'chapters', 'dest') if row.get(k)}
+        if row.get('mode'):
+            if row['mode'] not in MODES:
+                raise ValueError(f"entry {n} has unknown mode {row['mode']!r}")
+            job['mode'] = row['mode']
+        if row.get('points'):
+            if row['points'] not in POINTS:
+                raise ValueError(f"entry {n} has unknown points {row['points']!r}")
+            job['points'] = row['points']
+        jobs.append(job)
+    return jobs
+
+
+_print_lock = threading.Lock()
+_finished_jobs = set()
+
+
+def _emit(event: dict, finished=None, unless_finished=None):
+    # One JSON object per line; lines from concurrent jobs never interleave.
+    # Coalesced progress for a job that already reported its result is dropped.
+    line = json.dumps(event, ensure_ascii=False)
+    with _print_lock:
+        if unless_finished is not None and unless_finished in _finished_jobs:
+            return
+        if finished is not None:
+            _finished_jobs.add(finished)
+        sys.stdout.write(line + '\n')
+        sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -30,14 +30,26 @@ from PyQt5.QtWidgets import (
     QMessageBox,
     QCheckBox,
     QProgressBar,
+    QSpinBox,
+    QDoubleSpinBox,
+    QComboBox,
 )
 from PyQt5.QtGui import QFont
 from PyQt5.QtCore import Qt, QObject, pyqtSignal, QThread, QSettings
 from moviepy.video.io.ffmpeg_tools import ffmpeg_extract_subclip
 import os
-import subprocess
-import re
 import shutil
+from probe_cache import get_probe_cache
+from progress_bus import ensure_qt_pump, get_bus, new_job_id
+from job_scheduler import CPU, release_job, split_demands, submit_job
+from split_points import SceneDetector, SilenceDetector
+from split_engine import (
+    SplitEngine,
+    convert_time_to_seconds,
+    ensure_final_segment,
+    load_chapters,
+    safe_filename,
+)
 
 
 # Button styling is handled globally via the app theme (QSS)
@@ -84,6 +96,7 @@ class VideoSplitterWindow(QWidget):
         row_ch.setSpacing(8)
         self.chapters_path = QLineEdit(self)
         self.chapters_path.setFont(font)
+        self.chapters_path.setPlaceholderText('Optional: embedded chapters or .info.json are used when empty')
         row_ch.addWidget(self.chapters_path, 1)
         self.chapters_button = QPushButton('Browse', self)
         self.chapters_button.setFont(font)
@@ -91,6 +104,31 @@ class VideoSplitterWindow(QWidget):
         row_ch.addWidget(self.chapters_button)
         form.addRow(QLabel('Chapters file:'), row_ch)
 
+        # Where the cut points come from
+        self.points_combo = QComboBox(self)
+        self.points_combo.setFont(font)
+        self.points_combo.addItem('Chapters (file, .info.json or embedded)', 'chapters')
+        self.points_combo.addItem('Scene changes (detected)', 'scenes')
+        self.points_combo.addItem('Silence (detected pauses)', 'silence')
+        form.addRow(QLabel('Split points:'), self.points_combo)
+        self.scene_threshold_spin = QDoubleSpinBox(self)
+        self.scene_threshold_spin.setFont(font)
+        self.scene_threshold_spin.setRange(0.05, 0.95)
+        self.scene_threshold_spin.setSingleStep(0.05)
+        self.scene_threshold_spin.setValue(0.3)
+        self.scene_threshold_spin.setToolTip('Lower values find more scene changes')
+        self.scene_threshold_label = QLabel('Scene threshold:')
+        form.addRow(self.scene_threshold_label, self.scene_threshold_spin)
+        self.min_gap_spin = QDoubleSpinBox(self)
+        self.min_gap_spin.setFont(font)
+        self.min_gap_spin.setRange(0.2, 60.0)
+        self.min_gap_spin.setSingleStep(0.5)
+        self.min_gap_spin.setSuffix(' s')
+        self.min_gap_spin.setValue(1.5)
+        self.min_gap_spin.setToolTip('Pauses at least this long become split points')
+        self.min_gap_label = QLabel('Min. pause:')
+        form.addRow(self.min_gap_label, self.min_gap_spin)
+
         # Destination path row
         row_dest = QHBoxLayout()
         row_dest.setSpacing(8)
@@ -106,9 +144,27 @@ class VideoSplitterWindow(QWidget):
         form.addRow(QLabel('Destination:'), row_dest)
 
         # Options
-        self.accurate_checkbox = QCheckBox('Accurate cut (re-encode)')
-        self.accurate_checkbox.setFont(font)
-        form.addRow(QLabel(''), self.accurate_checkbox)
+        self.mode_combo = QComboBox(self)
+        self.mode_combo.setFont(font)
+        self.mode_combo.addItem('Copy (fast, cuts on keyframes)', 'copy')
+        self.mode_combo.addItem('Smart cut (re-encode GOP edges only)', 'smart')
+        self.mode_combo.addItem('Accurate cut (re-encode)', 'accurate')
+        form.addRow(QLabel('Cut mode:'), self.mode_combo)
+        self.single_pass_checkbox = QCheckBox('Single pass (read input once in copy mode)')
+        self.single_pass_checkbox.setFont(font)
+        form.addRow(QLabel(''), self.single_pass_checkbox)
+        self.reuse_checkbox = QCheckBox('Reuse unchanged segments (cache and resume)')
+        self.reuse_checkbox.setFont(font)
+        self.reuse_checkbox.setToolTip('Segments whose source, times and cut mode did not change are not cut again')
+        form.addRow(QLabel(''), self.reuse_checkbox)
+
+        # Number of ffmpeg processes extracting segments at once
+        self.jobs_spin = QSpinBox(self)
+        self.jobs_spin.setFont(font)
+        self.jobs_spin.setRange(1, 256)
+        self.jobs_spin.setValue(os.cpu_count() or 1)
+        self.jobs_spin.setToolTip('Number of segments extracted in parallel (one ffmpeg process each)')
+        form.addRow(QLabel('Parallel jobs:'), self.jobs_spin)
 
         # Place form at the top
         layout.addLayout(form)
@@ -136,6 +192,8 @@ class VideoSplitterWindow(QWidget):
 
         # Internal state
         self.destination_path = ""
+        self._job_id = None
+        ensure_qt_pump()
         self.settings = QSettings()
         # Restore saved values
         saved_video = self.settings.value('splitter/video_path', '')
@@ -148,9 +206,33 @@ class VideoSplitterWindow(QWidget):
         if saved_dest:
             self.destination_path = saved_dest
             self.destination_path_display.setText(self.destination_path)
+        # Older versions only stored the accurate checkbox
         saved_accurate = self.settings.value('splitter/accurate', False, type=bool)
-        self.accurate_checkbox.setChecked(bool(saved_accurate))
-        self.accurate_checkbox.stateChanged.connect(lambda _: self.settings.setValue('splitter/accurate', self.accurate_checkbox.isChecked()))
+        saved_mode = self.settings.value('splitter/mode', 'accurate' if saved_accurate else 'copy')
+        idx = self.mode_combo.findData(saved_mode)
+        if idx >= 0:
+            self.mode_combo.setCurrentIndex(idx)
+        self.mode_combo.currentIndexChanged.connect(self._on_mode_changed)
+        saved_single_pass = self.settings.value('splitter/single_pass', True, type=bool)
+        self.single_pass_checkbox.setChecked(bool(saved_single_pass))
+        self.single_pass_checkbox.stateChanged.connect(lambda _: self.settings.setValue('splitter/single_pass', self.single_pass_checkbox.isChecked()))
+        self.reuse_checkbox.setChecked(self.settings.value('splitter/reuse_segments', True, type=bool))
+        self.reuse_checkbox.stateChanged.connect(lambda _: self.settings.setValue('splitter/reuse_segments', self.reuse_checkbox.isChecked()))
+        # Single pass only applies to stream copy
+        self.single_pass_checkbox.setEnabled(self.mode_combo.currentData() == 'copy')
+        saved_jobs = self.settings.value('splitter/jobs', 0, type=int)
+        if saved_jobs:
+            self.jobs_spin.setValue(saved_jobs)
+        self.jobs_spin.valueChanged.connect(lambda v: self.settings.setValue('splitter/jobs', v))
+        idx = self.points_combo.findData(self.settings.value('splitter/points', 'chapters'))
+        if idx >= 0:
+            self.points_combo.setCurrentIndex(idx)
+        self.points_combo.currentIndexChanged.connect(self._on_points_changed)
+        self.scene_threshold_spin.setValue(self.settings.value('splitter/scene_threshold', 0.3, type=float))
+        self.scene_threshold_spin.valueChanged.connect(lambda v: self.settings.setValue('splitter/scene_threshold', v))
+        self.min_gap_spin.setValue(self.settings.value('splitter/min_gap', 1.5, type=float))
+        self.min_gap_spin.valueChanged.connect(lambda v: self.settings.setValue('splitter/min_gap', v))
+        self._on_points_changed(self.points_combo.currentIndex())
 
 
     def closeEvent(self, event):
@@ -184,9 +266,6 @@ class VideoSplitterWindow(QWidget):
         if not video_file:
             QMessageBox.warning(self, "Missing Video", "Please select an input video file.")
             return
-        if not chapters_file:
-            QMessageBox.warning(self, "Missing Chapters", "Please select a chapters text file.")
-            return
         if not self.destination_path:
             QMessageBox.warning(self, "Select Destination", "Please choose an output folder.")
             return
@@ -194,37 +273,63 @@ class VideoSplitterWindow(QWidget):
             QMessageBox.critical(self, "FFmpeg Not Found", "FFmpeg is required. Please install FFmpeg and ensure it is on your PATH.")
             return
 
-        # Read and parse chapters
-        with open(chapters_file, 'r', encoding='utf-8') as file:
-            raw_lines = [line.strip() for line in file if line.strip()]
-
-        chapters = []
-        for line in raw_lines:
-            m = re.match(r"^(\d{1,2}(:\d{2}){1,2})\s+(.+)$", line)
-            if not m:
-                continue
-            ts = m.group(1)
-            title = m.group(3)
-            chapters.append((self.convert_time_to_seconds(ts), title))
+        # Detected split points: analyse first, the split starts when it is done
+        points = self.points_combo.currentData()
+        if points == 'scenes':
+            self._start_analysis(video_file, SceneDetector(video_file, threshold=self.scene_threshold_spin.value()))
+            return
+        if points == 'silence':
+            self._start_analysis(video_file, SilenceDetector(video_file, min_gap=self.min_gap_spin.value()))
+            return
 
-        # Append end duration if needed
-        chapters = self._ensure_final_segment(video_file, chapters)
+        # Read chapters from the file, or from the .info.json sidecar / container
+        try:
+            chapters, source, malformed = load_chapters(video_file, chapters_file or None)
+        except OSError as e:
+            QMessageBox.critical(self, "Chapters Error", f"Cannot read chapters file: {e}")
+            return
+        if source is None:
+            QMessageBox.warning(
+                self, "Missing Chapters",
+                "Please select a chapters text file. The video has no embedded chapters and no .info.json next to it.")
+            return
+        if malformed:
+            lines = "\n".join(f"{n}: {text}" for n, text in malformed[:10])
+            more = f"\n… and {len(malformed) - 10} more" if len(malformed) > 10 else ""
+            answer = QMessageBox.question(
+                self, "Unreadable Chapter Lines",
+                f"{len(malformed)} line(s) are not \"HH:MM:SS Title\" or go back in time and will be skipped:\n\n"
+                f"{lines}{more}\n\nContinue anyway?")
+            if answer != QMessageBox.Yes:
+                return
+
+        # Append end duration if needed (metadata chapters carry their own end)
+        if source == 'file':
+            chapters = self._ensure_final_segment(video_file, chapters)
 
         if len(chapters) < 2:
             QMessageBox.warning(self, "Invalid Chapters", "Need at least two timestamps to form a segment.")
             return
 
+        self._start_split(video_file, chapters)
+
+    def _start_split(self, video_file: str, chapters):
         # Prepare and start worker
         self.thread = QThread()
         self.worker = _SplitWorker(
             video_file=video_file,
             chapters=chapters,
             dest_dir=self.destination_path,
-            accurate=self.accurate_checkbox.isChecked(),
+            mode=self.mode_combo.currentData(),
+            jobs=self.jobs_spin.value(),
+            single_pass=self.single_pass_checkbox.isChecked(),
+            use_cache=self.reuse_checkbox.isChecked(),
         )
         self.worker.moveToThread(self.thread)
         self.thread.started.connect(self.worker.run)
-        self.worker.progress.connect(self._on_progress)
+        # Progress arrives coalesced through the shared bus, not per ffmpeg line
+        self._job_id = self.worker.job_id
+        get_bus().subscribe(self._job_id, self._on_bus_progress)
         self.worker.finished.connect(self._on_finished)
         self.worker.error.connect(self._on_error)
         self.worker.finished.connect(self.thread.quit)
@@ -236,34 +341,123 @@ class VideoSplitterWindow(QWidget):
         self.cancel_button.setEnabled(True)
         self.progress.setValue(0)
 
-        self.thread.start()
+        engine = self.worker.engine
+        started = submit_job(
+            self.main_window, self._job_id, split_demands(engine.mode, engine.jobs), self.thread.start,
+            label=f"Split {os.path.basename(video_file)}",
+            pause=engine.pause, resume=engine.resume, renice=engine.renice,
+        )
+        self.progress.setFormat("%p%" if started else "Queued")
+
+    def _start_analysis(self, video_file: str, detector):
+        self._detected_chapters = None
+        self._analysis_video = video_file
+        # Kept apart from self.thread: the split starts before this thread has exited
+        self.points_thread = QThread()
+        self.points_worker = _SplitPointsWorker(detector)
+        self.points_worker.moveToThread(self.points_thread)
+        self.points_thread.started.connect(self.points_worker.run)
+        self._job_id = self.points_worker.job_id
+        get_bus().subscribe(self._job_id, self._on_bus_progress)
+        self.points_worker.result.connect(self._on_points_result)
+        self.points_worker.error.connect(self._on_error)
+        self.points_worker.finished.connect(self._on_points_finished)
+        self.points_worker.finished.connect(self.points_thread.quit)
+        self.points_worker.finished.connect(self.points_worker.deleteLater)
+        self.points_thread.finished.connect(self.points_thread.deleteLater)
+
+        self.split_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.progress.setValue(0)
+        # Decoding the analysis stream keeps about one core busy
+        started = submit_job(self.main_window, self._job_id, {CPU: 1}, self.points_thread.start,
+                             label=f"Analyze {os.path.basename(video_file)}")
+        self.progress.setFormat("Analyzing %p%" if started else "Queued")
+
+    def _on_points_result(self, chapters):
+        self._detected_chapters = chapters
+
+    def _on_points_finished(self):
+        self._stop_progress()
+        release_job(self.main_window, self._job_id)
+        self._job_id = None
+        video_file = self._analysis_video
+        chapters = self._detected_chapters
+        self._detected_chapters = None
+        self.progress.setFormat("%p%")
+        self.split_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+        if chapters is None:
+            return
+        if len(chapters) < 3:
+            QMessageBox.information(
+                self, "No Split Points",
+                "No split points were found; try a lower scene threshold or a shorter minimum pause.")
+            return
+        self._start_split(video_file, chapters)
+
+    def _on_points_changed(self, _index):
+        points = self.points_combo.currentData()
+        self.settings.setValue('splitter/points', points)
+        self.scene_threshold_label.setVisible(points == 'scenes')
+        self.scene_threshold_spin.setVisible(points == 'scenes')
+        self.min_gap_label.setVisible(points == 'silence')
+        self.min_gap_spin.setVisible(points == 'silence')
+
+    def _on_mode_changed(self, _index):
+        mode = self.mode_combo.currentData()
+        self.settings.setValue('splitter/mode', mode)
+        self.single_pass_checkbox.setEnabled(mode == 'copy')
 
     def cancel_split(self):
-        if hasattr(self, 'worker') and self.worker:
-            self.worker.cancel()
+        if self._analyzing():
+            worker, thread = self.points_worker, self.points_thread
+        elif hasattr(self, 'worker') and self.worker:
+            worker, thread = self.worker, self.thread
+        else:
+            return
+        worker.cancel()
+        scheduler = getattr(self.main_window, 'scheduler', None)
+        if scheduler is not None and self._job_id and scheduler.is_queued(self._job_id):
+            # Never admitted: drop it and let the worker finish through the usual path
+            scheduler.finish(self._job_id)
+            thread.start()
+
+    def _analyzing(self) -> bool:
+        worker = getattr(self, 'points_worker', None)
+        return worker is not None and self._job_id == worker.job_id
 
     def convert_time_to_seconds(self, time_str):
-        parts = time_str.split(':')
-        parts = [0] * (3 - len(parts)) + parts
-        h, m, s = map(int, parts)
-        return h * 3600 + m * 60 + s
+        return convert_time_to_seconds(time_str)
 
     def _safe_filename(self, name: str) -> str:
-        # Remove illegal filename characters and trim
-        name = re.sub(r"[\\/:*?\"<>|]", " ", name)
-        name = re.sub(r"\s+", " ", name).strip()
-        return name[:200]
+        return safe_filename(name)
+
+    def _on_bus_progress(self, _job_id, fields: dict):
+        self._on_progress(fields.get('percent', 0), fields.get('title', ''))
+
+    def _stop_progress(self):
+        # Late bus updates must not overwrite the final state
+        if self._job_id:
+            get_bus().unsubscribe(self._job_id, self._on_bus_progress)
+            get_bus().discard(self._job_id)
 
     def _on_progress(self, percent: int, current_title: str):
+        self.progress.setFormat("Analyzing %p%" if self._analyzing() else "%p%")
         self.progress.setValue(percent)
         # Optional: could update window title or label with current_title
 
     def _on_finished(self):
+        self._stop_progress()
+        release_job(self.main_window, self._job_id)
+        self._job_id = None
+        self.progress.setFormat("%p%")
         self.progress.setValue(100)
         self.split_button.setEnabled(True)
         self.cancel_button.setEnabled(False)
 
     def _on_error(self, msg: str):
+        self._stop_progress()
         QMessageBox.critical(self, "Split Error", msg)
         self.split_button.setEnabled(True)
         self.cancel_button.setEnabled(False)
@@ -272,140 +466,83 @@ class VideoSplitterWindow(QWidget):
         # chapters: list of (start_seconds, title)
         if len(chapters) < 1:
             return chapters
-        duration = self._get_video_duration(video_file)
-        if not duration:
-            return chapters
-        last_start, last_title = chapters[-1]
-        if last_start < int(duration) and (len(chapters) == 1 or chapters[-1][0] != int(duration)):
-            # Append synthetic end marker title
-            chapters = chapters + [(int(duration), f"End")]  # title not used for end
-        return chapters
+        return ensure_final_segment(chapters, self._get_video_duration(video_file))
 
     def _get_video_duration(self, video_file: str):
-        # Try ffprobe first
-        if shutil.which('ffprobe') is not None:
-            try:
-                out = subprocess.check_output([
-                    'ffprobe', '-v', 'error', '-show_entries', 'format=duration',
-                    '-of', 'default=noprint_wrappers=1:nokey=1', video_file
-                ])
-                return float(out.decode('utf-8').strip())
-            except Exception:
-                pass
-        # Fallback to moviepy
-        try:
-            from moviepy.editor import VideoFileClip
-            with VideoFileClip(video_file) as clip:
-                return float(clip.duration)
-        except Exception:
-            return None
+        # ffprobe (or moviepy as a fallback) through the persistent probe cache
+        return get_probe_cache().duration(video_file)
 
 
 class _SplitWorker(QObject):
-    progress = pyqtSignal(int, str)  # percent, current title
+    # Progress (percent, title) is published on the progress bus under job_id
     finished = pyqtSignal()
     error = pyqtSignal(str)
+    segment_ready = pyqtSignal(int, str)  # index, output path; emitted as each part lands
+    chapters_found = pyqtSignal(object)  # chapters read in run() when none were given
 
-    def __init__(self, video_file: str, chapters, dest_dir: str, accurate: bool):
+    def __init__(self, video_file: str, chapters, dest_dir: str, mode: str = 'copy', jobs: int = None,
+                 single_pass: bool = True, job_id: str = None, use_cache: bool = True):
         super().__init__()
-        self.video_file = video_file
-        self.chapters = chapters  # list of (start_seconds, title) plus final end marker
-        self.dest_dir = dest_dir
-        self.accurate = accurate
-        self._cancel = False
-        self._current_proc = None
+        self.job_id = job_id or new_job_id('split')
+        # The splitting itself lives in the Qt-free engine shared with the CLI;
+        # chapters=None reads the file's own chapters off the GUI thread
+        self.engine = SplitEngine(
+            video_file,
+            chapters,
+            dest_dir,
+            mode=mode,
+            jobs=jobs,
+            single_pass=single_pass,
+            on_progress=lambda percent, title: get_bus().publish(self.job_id, percent=percent, title=title),
+            use_cache=use_cache,
+            on_segment=self.segment_ready.emit,
+        )
 
     def cancel(self):
-        self._cancel = True
-        if self._current_proc and self._current_proc.poll() is None:
-            try:
-                self._current_proc.terminate()
-            except Exception:
-                pass
+        self.engine.cancel()
 
     def run(self):
         try:
-            total_segments = max(0, len(self.chapters) - 1)
-            for i in range(total_segments):
-                if self._cancel:
-                    raise Exception('Cancelled by user')
-                start_time, title = self.chapters[i]
-                end_time, _ = self.chapters[i + 1]
-                safe_title = self._safe_filename(title) or f"part_{i+1:02d}"
-                output_path = os.path.join(self.dest_dir, f"{safe_title}.mp4")
-
-                cmd = self._build_ffmpeg_cmd(start_time, end_time, output_path)
-                self.progress.emit(int(i * 100 / max(1, total_segments)), title)
-                self._current_proc = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    bufsize=1,
-                    universal_newlines=True,
-                )
-
-                seg_duration = max(1e-6, float(end_time - start_time))
-                current_percent = 0
-                # Parse progress lines
-                if self._current_proc.stdout:
-                    for line in self._current_proc.stdout:
-                        if self._cancel:
-                            self._current_proc.terminate()
-                            raise Exception('Cancelled by user')
-                        line = line.strip()
-                        if not line or '=' not in line:
-                            continue
-                        key, val = line.split('=', 1)
-                        if key == 'out_time_ms':
-                            try:
-                                out_s = float(val) / 1_000_000.0
-                            except Exception:
-                                continue
-                            seg_progress = min(1.0, out_s / seg_duration)
-                            overall = int(((i + seg_progress) * 100) / max(1, total_segments))
-                            if overall != current_percent:
-                                current_percent = overall
-                                self.progress.emit(current_percent, title)
-                        elif key == 'out_time':
-                            # Format HH:MM:SS.microseconds
-                            parts = val.split(':')
-                            try:
-                                h = float(parts[0]); m = float(parts[1]); s = float(parts[2])
-                                out_s = h*3600 + m*60 + s
-                                seg_progress = min(1.0, out_s / seg_duration)
-                                overall = int(((i + seg_progress) * 100) / max(1, total_segments))
-                                if overall != current_percent:
-                                    current_percent = overall
-                                    self.progress.emit(current_percent, title)
-                            except Exception:
-                                pass
-                _, err = self._current_proc.communicate()
-                if self._current_proc.returncode != 0:
-                    raise Exception(err.decode('utf-8', errors='ignore') or 'FFmpeg failed')
-            self.progress.emit(100, '')
+            if self.engine.chapters is None:
+                self.engine.chapters = self._read_chapters()
+                self.chapters_found.emit(self.engine.chapters)
+                if len(self.engine.chapters) < 2:
+                    self.finished.emit()
+                    return
+                os.makedirs(self.engine.dest_dir, exist_ok=True)
+            self.engine.run()
             self.finished.emit()
         except Exception as e:
             self.error.emit(str(e))
             self.finished.emit()
 
-    def _build_ffmpeg_cmd(self, start_time, end_time, output_path):
-        base = ['ffmpeg', '-y']
-        if self.accurate:
-            cmd = base + [
-                '-ss', str(start_time), '-to', str(end_time), '-i', self.video_file,
-                '-c:v', 'libx264', '-preset', 'faster', '-crf', '22', '-c:a', 'aac', '-movflags', '+faststart',
-            ]
-        else:
-            cmd = base + [
-                '-i', self.video_file,
-                '-ss', str(start_time), '-to', str(end_time),
-                '-c', 'copy',
-            ]
-        # Add progress reporting
-        cmd += ['-progress', 'pipe:1', '-nostats', output_path]
-        return cmd
+    def _read_chapters(self):
+        path = self.engine.video_file
+        chapters, source, _ = load_chapters(path)
+        if source == 'file':
+            chapters = ensure_final_segment(chapters, get_probe_cache().duration(path))
+        return chapters
 
-    def _safe_filename(self, name: str) -> str:
-        name = re.sub(r"[\\/:*?\"<>|]", " ", name)
-        name = re.sub(r"\s+", " ", name).strip()
-        return name[:200]
+
+class _SplitPointsWorker(QObject):
+    # Runs a split_points detector; progress goes to the bus under job_id
+    finished = pyqtSignal()
+    error = pyqtSignal(str)
+    result = pyqtSignal(object)  # chapters: [(start_seconds, title), ..., (end, 'End')]
+
+    def __init__(self, detector, job_id: str = None):
+        super().__init__()
+        self.job_id = job_id or new_job_id('points')
+        self.detector = detector
+        detector.on_progress = lambda percent: get_bus().publish(self.job_id, percent=percent, title='')
+
+    def cancel(self):
+        self.detector.cancel()
+
+    def run(self):
+        try:
+            self.result.emit(self.detector.run())
+            self.finished.emit()
+        except Exception as e:
+            self.error.emit(str(e))
+            self.finished.emit()
@@ -31,16 +31,49 @@ from PyQt5.QtWidgets import (
     QComboBox,
     QMessageBox,
     QApplication,
+    QSpinBox,
+    QCheckBox,
+    QTableView,
+    QHeaderView,
+    QAbstractItemView,
+    QDialog,
+    QDialogButtonBox,
+    QListWidget,
+    QListWidgetItem,
 )
 from PyQt5.QtGui import QFont
-from PyQt5.QtCore import Qt, QObject, pyqtSignal, QThread, QSettings
+from PyQt5.QtCore import Qt, QObject, pyqtSignal, QThread, QSettings, QAbstractTableModel, QModelIndex, QTimer
 import yt_dlp
 import os
-import re
+import copy
+import time
+import threading
+from progress_bus import ensure_qt_pump, get_bus, new_job_id
+from job_scheduler import NETWORK, release_job, split_demands, submit_job
+from extraction_cache import client_extractor, get_extraction_cache
+from download_archive import get_download_archive
+from bandwidth import DOWNLOAD, get_limiter
+from download_journal import get_download_journal, part_bytes
+from range_downloader import register as register_range_downloader
+from split_engine import SectionExtractor, chapters_from_info, safe_filename
+from video_splitter import _SplitWorker
+from download_queue import (DONE, FAILED, PAUSED, QUEUED, RUNNING, DownloadQueue, decode_sections, encode_sections,
+                            is_collection_url, parse_urls)
 
 # Button styling is handled globally via the app theme (QSS)
 
+# YouTube player clients tried in turn when a download fails
+PLAYER_CLIENTS = ('android', 'mweb', 'web', 'ios', 'tv')
+
+RESOLUTIONS = ("144", "240", "360", "480", "720", "1080")
+
+# Quiet time after the last keystroke before a URL's formats are looked up
+PREFETCH_DELAY_MS = 600
+
 class YouTubeDownloaderWindow(QWidget):
+    # Interrupted downloads are offered once per run, by the first window opened
+    _resume_offered = False
+
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
@@ -48,12 +81,11 @@ class YouTubeDownloaderWindow(QWidget):
 
     def initUI(self):
         self.setWindowTitle("YouTube Downloader")
-        self.setGeometry(100, 100, 500, 300)  # Set window size
+        self.setGeometry(100, 100, 720, 520)  # Set window size
 
         layout = QVBoxLayout()
         layout.setContentsMargins(16, 16, 16, 16)
         layout.setSpacing(8)
-        layout.setAlignment(Qt.AlignTop)
 
         # Custom font
         font = QFont("Arial", 11)
@@ -70,9 +102,10 @@ class YouTubeDownloaderWindow(QWidget):
         url_row = QHBoxLayout()
         url_row.setSpacing(8)
         self.url_input = QLineEdit(self)
-        self.url_input.setPlaceholderText("Enter YouTube video URL...")
+        self.url_input.setPlaceholderText("Enter or paste one or more video URLs...")
         self.url_input.setFont(font)
         self.url_input.textChanged.connect(self._on_url_changed)
+        self.url_input.returnPressed.connect(self.start_download)
         url_row.addWidget(self.url_input, 1)
         self.paste_button = QPushButton('Paste', self)
         self.paste_button.setFont(font)
@@ -83,8 +116,10 @@ class YouTubeDownloaderWindow(QWidget):
         # Resolution selection (label + combo)
         self.resolution_label = QLabel('Resolution:')
         self.resolution_label.setFont(font)
+        # Replaced by the video's real heights and sizes once its URL is looked up
         self.resolution_combo = QComboBox(self)
-        self.resolution_combo.addItems(["144", "240", "360", "480", "720", "1080"])
+        for height in RESOLUTIONS:
+            self.resolution_combo.addItem(height, height)
         self.resolution_combo.setFont(font)
         form.addRow(self.resolution_label, self.resolution_combo)
 
@@ -102,34 +137,120 @@ class YouTubeDownloaderWindow(QWidget):
         row_path.addWidget(self.path_button)
         form.addRow(QLabel('Download Path:'), row_path)
 
-        # Place form at top
-        layout.addLayout(form)
+        # Downloads running at once; the resource scheduler may still hold some back
+        self.parallel_spin = QSpinBox(self)
+        self.parallel_spin.setRange(1, 16)
+        self.parallel_spin.setFont(font)
+        form.addRow(QLabel('Parallel Downloads:'), self.parallel_spin)
 
-        # Progress Bar
-        self.progress = QProgressBar(self)
-        self.progress.setValue(0)
-        self.progress.setTextVisible(True)
-        layout.addWidget(self.progress)
+        # DASH/HLS fragments fetched at once within each download
+        self.fragments_spin = QSpinBox(self)
+        self.fragments_spin.setRange(1, 16)
+        self.fragments_spin.setFont(font)
+        form.addRow(QLabel('Fragments per Download:'), self.fragments_spin)
 
-        # Status label
-        self.status_label = QLabel('Waiting for URL...')
-        self.status_label.setFont(font)
-        layout.addWidget(self.status_label)
+        # Byte ranges of single-file formats fetched at once; 1 uses yt-dlp's own downloader
+        self.connections_spin = QSpinBox(self)
+        self.connections_spin.setRange(1, 16)
+        self.connections_spin.setFont(font)
+        form.addRow(QLabel('Connections per Download:'), self.connections_spin)
+
+        self.playlist_checkbox = QCheckBox('Expand playlists and channels into their videos', self)
+        self.playlist_checkbox.setFont(font)
+        form.addRow(QLabel(''), self.playlist_checkbox)
+
+        self.archive_checkbox = QCheckBox('Skip videos already in the download archive', self)
+        self.archive_checkbox.setFont(font)
+        form.addRow(QLabel(''), self.archive_checkbox)
+
+        # Chapters come with the download's own metadata, so no probe is needed
+        self.split_checkbox = QCheckBox('Split into chapters after download', self)
+        self.split_checkbox.setFont(font)
+        self.split_checkbox.setToolTip('Uses the Video Splitter\'s mode; the next download starts meanwhile')
+        form.addRow(QLabel(''), self.split_checkbox)
+
+        # Place form at top
+        layout.addLayout(form)
 
         # Download / Cancel controls
         controls = QHBoxLayout()
         self.download_button = QPushButton('⬇️ Download', self)
         self.download_button.setFont(font)
+        self.download_button.setToolTip('Add the URLs to the queue')
         self.download_button.clicked.connect(self.start_download)
         controls.addWidget(self.download_button)
 
+        self.chapters_button = QPushButton('Chapters…', self)
+        self.chapters_button.setFont(font)
+        self.chapters_button.setToolTip('Pick chapters of one video and download only those')
+        self.chapters_button.clicked.connect(self.choose_chapters)
+        controls.addWidget(self.chapters_button)
+
         self.cancel_button = QPushButton('✖ Cancel', self)
         self.cancel_button.setFont(font)
         self.cancel_button.setEnabled(False)
+        self.cancel_button.setToolTip('Pause every queued and running download')
         self.cancel_button.clicked.connect(self.cancel_download)
         controls.addWidget(self.cancel_button)
         layout.addLayout(controls)
 
+        # Queue view; fixed row heights and column widths keep thousands of rows cheap
+        self.queue = DownloadQueue()
+        self.model = _QueueModel(self.queue, self)
+        self.table = QTableView(self)
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.table.setEditTriggers(QAbstractItemView.DoubleClicked | QAbstractItemView.EditKeyPressed)
+        self.table.setWordWrap(False)
+        self.table.verticalHeader().hide()
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(self.table.fontMetrics().height() + 8)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.Interactive)
+        header.setSectionResizeMode(0, QHeaderView.Stretch)
+        for column, width in ((1, 110), (2, 230), (3, 70)):
+            self.table.setColumnWidth(column, width)
+        self.table.selectionModel().selectionChanged.connect(self._update_queue_buttons)
+        layout.addWidget(self.table, 1)
+
+        # Actions on the selected rows
+        queue_row = QHBoxLayout()
+        queue_row.setSpacing(8)
+        self.pause_button = QPushButton('Pause', self)
+        self.pause_button.clicked.connect(self.pause_selected)
+        self.resume_button = QPushButton('Resume', self)
+        self.resume_button.clicked.connect(self.resume_selected)
+        self.retry_button = QPushButton('Retry', self)
+        self.retry_button.clicked.connect(self.retry_selected)
+        self.priority_up_button = QPushButton('Priority +', self)
+        self.priority_up_button.clicked.connect(lambda: self.change_priority(1))
+        self.priority_down_button = QPushButton('Priority −', self)
+        self.priority_down_button.clicked.connect(lambda: self.change_priority(-1))
+        self.remove_button = QPushButton('Remove', self)
+        self.remove_button.clicked.connect(self.remove_selected)
+        self.clear_button = QPushButton('Clear Finished', self)
+        self.clear_button.clicked.connect(self.clear_finished)
+        for button in (self.pause_button, self.resume_button, self.retry_button, self.priority_up_button,
+                       self.priority_down_button, self.remove_button):
+            button.setFont(font)
+            queue_row.addWidget(button)
+        queue_row.addStretch(1)
+        self.clear_button.setFont(font)
+        queue_row.addWidget(self.clear_button)
+        layout.addLayout(queue_row)
+
+        # Progress Bar
+        self.progress = QProgressBar(self)
+        self.progress.setValue(0)
+        self.progress.setTextVisible(True)
+        layout.addWidget(self.progress)
+
+        # Status label
+        self.status_label = QLabel('Waiting for URL...')
+        self.status_label.setFont(font)
+        layout.addWidget(self.status_label)
+
         # Style cancel subtly as secondary (theme-aware)
         self._style_secondary_button()
 
@@ -137,24 +258,72 @@ class YouTubeDownloaderWindow(QWidget):
 
         # Internal state and settings
         self.download_path = ""
+        self._workers = {}  # item id -> (worker, thread, bus job id)
+        self._by_job = {}  # bus job id -> item id
+        self._errors = {}  # item id -> last error of the running attempt
+        self._pausing = set()
+        self._chapters = {}  # item id -> chapters reported by its download
+        self._splits = {}  # item id -> (split worker, thread, bus job id)
+        self._threads = set()
+        self._closing = False
+        self._listers = []  # (worker, thread) of playlist listings in progress
+        self._chapter_lookup = None  # (worker, thread) while a video's chapters are fetched
+        self._prefetches = []  # (worker, thread) of URL lookups; only the last one counts
+        self._prefetched = None  # metadata of the URL in the field, once looked up
+        self._prefetch_timer = QTimer(self)
+        self._prefetch_timer.setSingleShot(True)
+        self._prefetch_timer.setInterval(PREFETCH_DELAY_MS)
+        self._prefetch_timer.timeout.connect(self._prefetch)
+        self._listed = 0
+        self._session_bytes = 0
+        self._counts = self.queue.counts()
+        ensure_qt_pump()
         self.settings = QSettings()
         # Restore settings
         saved_dir = self.settings.value('downloader/download_path', '')
         if saved_dir:
             self.download_path = saved_dir
             self.path_display.setText(self.download_path)
-        saved_res = self.settings.value('downloader/resolution', '')
-        if saved_res:
-            idx = self.resolution_combo.findText(str(saved_res))
-            if idx >= 0:
-                self.resolution_combo.setCurrentIndex(idx)
-        self.resolution_combo.currentTextChanged.connect(self._save_resolution)
+        self._preferred_height = str(self.settings.value('downloader/resolution', '') or RESOLUTIONS[0])
+        idx = self.resolution_combo.findData(self._preferred_height)
+        if idx >= 0:
+            self.resolution_combo.setCurrentIndex(idx)
+        # Only a choice by the user is remembered, not the fallback picked when a video lacks that height
+        self.resolution_combo.activated.connect(self._save_resolution)
+        self.parallel_spin.setValue(int(self.settings.value('downloader/parallel', 3)))
+        self.parallel_spin.valueChanged.connect(self._on_parallel_changed)
+        self.fragments_spin.setValue(int(self.settings.value('downloader/fragments', 4)))
+        self.fragments_spin.valueChanged.connect(lambda v: self.settings.setValue('downloader/fragments', v))
+        self.connections_spin.setValue(int(self.settings.value('downloader/connections', 4)))
+        self.connections_spin.valueChanged.connect(lambda v: self.settings.setValue('downloader/connections', v))
+        self.playlist_checkbox.setChecked(str(self.settings.value('downloader/playlists', 'true')).lower() == 'true')
+        self.playlist_checkbox.toggled.connect(lambda on: self.settings.setValue('downloader/playlists', on))
+        self.archive_checkbox.setChecked(str(self.settings.value('downloader/use_archive', 'true')).lower() == 'true')
+        self.archive_checkbox.toggled.connect(lambda on: self.settings.setValue('downloader/use_archive', on))
+        self.split_checkbox.setChecked(self.settings.value('downloader/auto_split', False, type=bool))
+        self.split_checkbox.toggled.connect(lambda on: self.settings.setValue('downloader/auto_split', on))
         # initial button state based on current fields
         self._on_url_changed(self.url_input.text())
+        self._update_queue_buttons()
+        # Pick up whatever was left in the queue last time
+        self._dispatch()
+        if not YouTubeDownloaderWindow._resume_offered:
+            YouTubeDownloaderWindow._resume_offered = True
+            QTimer.singleShot(0, self._offer_resume)
 
         
     def closeEvent(self, event):
         #self.main_window.show()  # Show the main window again when this window is closed
+        if self._workers or self._listers or self._splits:
+            answer = QMessageBox.question(
+                self, "Downloads Running",
+                "Stop the running downloads and splits and close? Downloads stay in the queue and continue next time.",
+            )
+            if answer != QMessageBox.Yes:
+                event.ignore()
+                return
+        self._shutdown()
+        self.queue.close()
         event.accept()  # Accept the close event
         
     def select_path(self):
@@ -168,76 +337,634 @@ class YouTubeDownloaderWindow(QWidget):
         self._on_url_changed(self.url_input.text())
 
     def start_download(self):
-        url = self.url_input.text().strip()
-        resolution = self.resolution_combo.currentText()
-        if not url:
+        text = self.url_input.text().strip()
+        resolution = self._resolution()
+        if not text:
             QMessageBox.warning(self, "Missing URL", "Please enter a YouTube URL.")
             return
         if not self.download_path:
             QMessageBox.warning(self, "Select Folder", "Please choose a download folder.")
             return
-        if not re.match(r"^https?://", url):
+        urls = parse_urls(text)
+        if not urls:
             QMessageBox.warning(self, "Invalid URL", "Please enter a valid http(s) URL.")
             return
-        self.status_label.setText("Downloading...")
+        collections = [u for u in urls if is_collection_url(u)] if self.playlist_checkbox.isChecked() else []
+        videos = [u for u in urls if u not in collections]
+        added = self.model.add(videos, self.download_path, resolution)
+        self.url_input.clear()
+        self._set_progress_color(None)
+        for url in collections:
+            self._start_listing(url, self.download_path, resolution)
+        self._dispatch()
+        if len(added) < len(videos):
+            self.status_label.setText(
+                f"{len(videos) - len(added)} URL(s) already in the queue. " + self.status_label.text())
+
+    def choose_chapters(self):
+        # Chapters come from the same extraction the download then starts from
+        urls = parse_urls(self.url_input.text())
+        if len(urls) != 1 or not self.download_path or self._chapter_lookup is not None:
+            return
+        url, resolution = urls[0], self._resolution()
+        if self._prefetched and self._prefetched['url'] == url:
+            self._on_chapters(url, resolution, self._prefetched)
+            return
+        thread = QThread()
+        worker = _MetadataWorker(url)
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.result.connect(lambda info, u=url, r=resolution: self._on_chapters(u, r, info))
+        worker.error.connect(self._on_chapters_error)
+        worker.finished.connect(self._on_chapter_lookup_finished)
+        worker.finished.connect(thread.quit, Qt.DirectConnection)
+        worker.finished.connect(worker.deleteLater)
+        thread.finished.connect(lambda th=thread: self._threads.discard(th))
+        thread.finished.connect(thread.deleteLater)
+        self._threads.add(thread)
+        self._chapter_lookup = (worker, thread)
+        self.chapters_button.setEnabled(False)
+        self.status_label.setText("Reading chapters…")
+        thread.start()
+
+    def _on_chapters(self, url, resolution, info):
+        if self._closing:
+            return
+        if not info['chapters']:
+            self._update_summary()
+            QMessageBox.information(self, "No Chapters",
+                                    "This video has no chapters. Use Download to fetch the whole video.")
+            return
+        picked = self._pick_chapters(info)
+        if picked is None or self._closing:
+            self._update_summary()
+            return
+        chapters, exact = picked
+        added = self.model.add([url], self.download_path, resolution, titles={url: info['title']},
+                               sections=encode_sections(chapters, exact))
+        self.url_input.clear()
         self._set_progress_color(None)
-        self.start_worker(url, resolution)
+        self._dispatch()
+        if not added:
+            self.status_label.setText("These chapters are already in the queue. " + self.status_label.text())
+
+    def _on_chapters_error(self, msg):
+        if self._closing:
+            return
+        self._update_summary()
+        QMessageBox.warning(self, "Chapters", f"Could not read the video's chapters:\n{msg}")
+
+    def _on_chapter_lookup_finished(self):
+        self._chapter_lookup = None
+        if not self._closing:
+            self._on_url_changed(self.url_input.text())
+
+    def _pick_chapters(self, info):
+        # Returns ([(start, end, title), ...], exact) for the ticked chapters, or None
+        chapters, duration = info['chapters'], info['duration']
+        dlg = QDialog(self)
+        dlg.setWindowTitle("Download Chapters")
+        layout = QVBoxLayout(dlg)
+        layout.addWidget(QLabel(info['title']))
+        listing = QListWidget(dlg)
+        for start, end, title in chapters:
+            entry = QListWidgetItem(f"{_fmt_eta(start)} – {_fmt_eta(end)}    {title}")
+            entry.setFlags(entry.flags() | Qt.ItemIsUserCheckable)
+            entry.setCheckState(Qt.Unchecked)
+            listing.addItem(entry)
+        layout.addWidget(listing, 1)
+        summary = QLabel()
+        layout.addWidget(summary)
+        exact = QCheckBox('Cut exactly at chapter edges (re-encodes each chapter)', dlg)
+        layout.addWidget(exact)
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(dlg.accept)
+        buttons.rejected.connect(dlg.reject)
+        layout.addWidget(buttons)
+
+        def ticked():
+            return [chapters[row] for row in range(listing.count()) if listing.item(row).checkState() == Qt.Checked]
+
+        def update(*_):
+            picked = ticked()
+            seconds = sum(end - start for start, end, _title in picked)
+            share = f" ({seconds * 100 / duration:.0f}% of the video)" if duration else ''
+            summary.setText(f"{len(picked)} of {len(chapters)} chapters, {_fmt_eta(seconds)}{share}")
+            buttons.button(QDialogButtonBox.Ok).setEnabled(bool(picked))
+
+        listing.itemChanged.connect(update)
+        update()
+        dlg.resize(560, 440)
+        if dlg.exec_() != QDialog.Accepted:
+            return None
+        return ticked(), exact.isChecked()
+
+    def cancel_download(self):
+        # Pause everything still to do; Resume or Retry picks it up again
+        for worker, _thread in self._listers:
+            worker.cancel()
+        items = [item for item in self.queue.items if item.state in (QUEUED, RUNNING)]
+        self._pause(items)
+        self._cancel_splits(list(self._splits))
+        self.status_label.setText("Cancelling…" if self._workers or self._splits else self.status_label.text())
+
+    def pause_selected(self):
+        self._pause([item for item in self._selected() if item.state in (QUEUED, RUNNING)])
+
+    def resume_selected(self):
+        for item in self._selected():
+            if item.state == PAUSED:
+                self.queue.update(item, state=QUEUED)
+                self.model.refresh(item)
+        self._dispatch()
+
+    def retry_selected(self):
+        for item in self._selected():
+            if item.state in (FAILED, PAUSED) or (item.state == DONE and not os.path.exists(item.filepath or '')):
+                self.queue.update(item, state=QUEUED, error='', attempts=0, percent=0)
+                self.model.refresh(item)
+        self._dispatch()
+
+    def change_priority(self, step: int):
+        for item in self._selected():
+            self.queue.update(item, priority=item.priority + step)
+            self.model.refresh(item)
 
-    def start_worker(self, url, resolution):
+    def remove_selected(self):
+        items = self._selected()
+        self._pause([item for item in items if item.state == RUNNING])
+        self._cancel_splits([item.id for item in items if item.id in self._splits])
+        journal = get_download_journal()
+        for item in items:
+            if item.state != DONE:
+                journal.discard(item.url, item.out_dir, item.max_height)
+        self.model.remove(items)
+        self._update_summary()
+
+    def clear_finished(self):
+        self.model.remove([item for item in self.queue.items if item.state == DONE])
+        self._update_summary()
+
+    def _selected(self):
+        rows = sorted({index.row() for index in self.table.selectionModel().selectedRows()})
+        return [self.queue.items[row] for row in rows if row < len(self.queue.items)]
+
+    def _pause(self, items):
+        scheduler = getattr(self.main_window, 'scheduler', None)
+        for item in items:
+            if item.state == QUEUED:
+                self.queue.update(item, state=PAUSED)
+                self.model.refresh(item)
+                continue
+            entry = self._workers.get(item.id)
+            if entry is None:
+                continue
+            worker, thread, job_id = entry
+            self._pausing.add(item.id)
+            try:
+                worker.cancel()
+            except RuntimeError:
+                # Already finished; its pending callback applies the pause
+                continue
+            if scheduler is not None and scheduler.is_queued(job_id):
+                # Never admitted: drop it and let the worker finish through the usual path
+                scheduler.finish(job_id)
+                thread.start()
+        self._update_summary()
+
+    def _offer_resume(self):
+        # Downloads cut short by a crash or quit: the queue's own items, plus
+        # journal entries from elsewhere (e.g. the pipeline)
+        journal = get_download_journal()
+        entries = journal.interrupted()
+        items = [item for item in self.queue.interrupted if item.state == PAUSED]
+        known = {(item.url, os.path.abspath(item.out_dir), str(item.max_height)) for item in items}
+        others = [e for e in entries if (e['url'], os.path.abspath(e['out_dir']), e['max_height']) not in known]
+        self.queue.interrupted = []
+        if not items and not others:
+            journal.clear_interrupted()
+            return
+        count = len(items) + len(others)
+        on_disk = sum(part_bytes(e) for e in entries)
+        answer = QMessageBox.question(
+            self, "Resume Downloads",
+            f"{count} download(s) were interrupted when the app last closed "
+            f"({_fmt_size(on_disk)} already on disk). Resume them now?",
+        )
+        journal.clear_interrupted()
+        if answer != QMessageBox.Yes:
+            return
+        for item in items:
+            self.queue.update(item, state=QUEUED)
+            self.model.refresh(item)
+        for entry in others:
+            self.model.add([entry['url']], entry['out_dir'], entry['max_height'])
+        self._dispatch()
+
+    def _start_listing(self, url, out_dir, resolution):
+        # Entries are queued batch by batch while the listing is still running
+        thread = QThread()
+        worker = _PlaylistWorker(url)
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.entries.connect(lambda entries, o=out_dir, r=resolution: self._on_entries(entries, o, r))
+        worker.error.connect(lambda msg, u=url: self.status_label.setText(f"Could not list {u}: {msg}"))
+        worker.finished.connect(lambda w=worker: self._on_listing_finished(w))
+        worker.finished.connect(thread.quit, Qt.DirectConnection)
+        worker.finished.connect(worker.deleteLater)
+        thread.finished.connect(lambda th=thread: self._threads.discard(th))
+        thread.finished.connect(thread.deleteLater)
+        self._threads.add(thread)
+        self._listers.append((worker, thread))
+        thread.start()
+
+    def _on_entries(self, entries, out_dir, resolution):
+        if self._closing:
+            return
+        self._listed += len(entries)
+        self.model.add([url for url, _ in entries], out_dir, resolution, titles=dict(entries))
+        self._dispatch()
+
+    def _on_listing_finished(self, worker):
+        self._listers = [(w, t) for w, t in self._listers if w is not worker]
+        if not self._listers:
+            self._listed = 0
+        if not self._closing:
+            self._update_summary()
+
+    def _dispatch(self):
+        # Fill free slots with the highest-priority queued items
+        while len(self._workers) < self.parallel_spin.value():
+            item = self.queue.next_ready()
+            if item is None:
+                break
+            if self._archived(item):
+                continue
+            self._start_item(item)
+        self._update_summary()
+
+    def _archived(self, item) -> bool:
+        # Known videos resolve to the file on disk without starting a worker
+        if not self.archive_checkbox.isChecked() or item.sections:
+            return False
+        entry = get_download_archive().lookup_url(item.url, item.max_height)
+        if entry is None:
+            return False
+        self.queue.update(item, state=DONE, percent=100, error='', filepath=entry['path'],
+                          title=entry.get('title') or os.path.splitext(os.path.basename(entry['path']))[0])
+        self.model.refresh(item)
+        return True
+
+    def _start_item(self, item):
         # Prepare worker and thread
-        self.thread = QThread()
-        self.worker = _YTDLPWorker(
-            url=url,
-            out_dir=self.download_path,
-            max_height=resolution,
+        thread = QThread()
+        worker = _YTDLPWorker(
+            url=item.url,
+            out_dir=item.out_dir,
+            max_height=item.max_height,
+            fragments=self.fragments_spin.value(),
+            connections=self.connections_spin.value(),
+            sections=decode_sections(item.sections),
+            use_archive=self.archive_checkbox.isChecked(),
+            # Higher priority also means a larger share of a capped download budget
+            weight=max(1, 1 + item.priority),
         )
-        self.worker.moveToThread(self.thread)
-        self.thread.started.connect(self.worker.run)
-        self.worker.progress.connect(self.progress.setValue)
-        self.worker.stats.connect(self._on_stats)
-        self.worker.finished.connect(self._on_finished)
-        self.worker.error.connect(self._on_error)
-        self.worker.finished.connect(self.thread.quit)
-        self.worker.finished.connect(self.worker.deleteLater)
-        self.thread.finished.connect(self.thread.deleteLater)
-
-        # Toggle buttons
-        self.download_button.setEnabled(False)
-        self.cancel_button.setEnabled(True)
-        self.progress.setValue(0)
-        self.progress.setFormat("%p%")
-        self.status_label.setText("Downloading...")
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        # Progress and stats arrive coalesced through the shared bus
+        self._workers[item.id] = (worker, thread, worker.job_id)
+        self._by_job[worker.job_id] = item.id
+        get_bus().subscribe(worker.job_id, self._on_bus_progress)
+        worker.result.connect(lambda path, i=item: self.queue.update(
+            i, filepath=path, title=os.path.splitext(os.path.basename(path))[0]))
+        worker.error.connect(lambda msg, i=item: self._errors.__setitem__(i.id, msg))
+        worker.chapters_found.connect(lambda chapters, i=item: self._chapters.__setitem__(i.id, chapters))
+        worker.finished.connect(lambda i=item, j=worker.job_id: self._on_finished(i, j))
+        worker.finished.connect(thread.quit, Qt.DirectConnection)
+        worker.finished.connect(worker.deleteLater)
+        thread.finished.connect(lambda th=thread: self._threads.discard(th))
+        thread.finished.connect(thread.deleteLater)
+        self._threads.add(thread)
 
-        self.thread.start()
+        self.queue.update(item, state=RUNNING, attempts=item.attempts + 1, error='', percent=0,
+                          downloaded=0, total=0, speed=None, eta=None, split='', split_note='')
+        item.waiting = not submit_job(self.main_window, worker.job_id, {NETWORK: 1}, thread.start,
+                                      label=f"Download {item.url}")
+        self.model.refresh(item)
 
-    def cancel_download(self):
-        if hasattr(self, 'worker') and self.worker:
-            self.worker.cancel()
-            self.status_label.setText("Cancelling…")
+    def _on_bus_progress(self, job_id, fields: dict):
+        item = self.queue.get(self._by_job.get(job_id))
+        if item is None or item.state != RUNNING:
+            return
+        item.waiting = False
+        for name in ('percent', 'downloaded', 'total', 'speed', 'eta'):
+            if name in fields:
+                setattr(item, name, fields[name])
+        self.model.refresh(item)
+        self._update_progress()
 
-    def _on_finished(self):
-        self.progress.setValue(100)
-        self.download_button.setEnabled(True)
-        self.cancel_button.setEnabled(False)
-        self._set_progress_color('success')
-        self.status_label.setText("Download complete")
+    def _on_finished(self, item, job_id):
+        if self._closing:
+            return
+        # Late bus updates must not overwrite the final state
+        get_bus().unsubscribe(job_id, self._on_bus_progress)
+        get_bus().discard(job_id)
+        release_job(self.main_window, job_id)
+        self._workers.pop(item.id, None)
+        self._by_job.pop(job_id, None)
+        error = self._errors.pop(item.id, None)
+        chapters = self._chapters.pop(item.id, None)
+        if item.id in self._pausing:
+            self._pausing.discard(item.id)
+            self.queue.update(item, state=PAUSED, speed=None, eta=None)
+        elif error:
+            self.queue.update(item, state=FAILED, error=error, speed=None, eta=None)
+        else:
+            self._session_bytes += item.total or item.downloaded or 0
+            self.queue.update(item, state=DONE, percent=100, speed=None, eta=None)
+            if chapters and self.split_checkbox.isChecked():
+                self._start_split(item, chapters)
+        self.model.refresh(item)
+        # The download slot is free again even while its split runs
+        self._dispatch()
 
-    def _on_error(self, msg: str):
-        QMessageBox.critical(self, "Download Error", msg)
-        self.download_button.setEnabled(True)
-        self.cancel_button.setEnabled(False)
-        self._set_progress_color('error')
-        self.status_label.setText("Error")
+    def _start_split(self, item, chapters):
+        # Chapters and duration come from the info dict the download already
+        # held, so the engine starts at once without probing the file
+        path = item.filepath
+        if len(chapters) < 2 or not path or not os.path.isfile(path) or item.id in self._splits:
+            return
+        dest = os.path.join(os.path.dirname(path), safe_filename(os.path.splitext(os.path.basename(path))[0]))
+        try:
+            os.makedirs(dest, exist_ok=True)
+        except OSError as e:
+            item.split, item.split_note = 'failed', str(e)
+            return
+        # Cut the way the Video Splitter is set up to
+        jobs = self.settings.value('splitter/jobs', 0, type=int) or None
+        thread = QThread()
+        worker = _SplitWorker(
+            path, chapters, dest,
+            mode=str(self.settings.value('splitter/mode', 'copy')),
+            jobs=jobs,
+            single_pass=self.settings.value('splitter/single_pass', True, type=bool),
+            use_cache=self.settings.value('splitter/reuse_segments', True, type=bool),
+        )
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        self._splits[item.id] = (worker, thread, worker.job_id)
+        get_bus().subscribe(worker.job_id, self._on_split_progress)
+        worker.error.connect(lambda msg, i=item: setattr(i, 'split_note', msg))
+        worker.finished.connect(lambda i=item, w=worker, n=len(chapters) - 1: self._on_split_finished(i, w, n))
+        worker.finished.connect(thread.quit, Qt.DirectConnection)
+        worker.finished.connect(worker.deleteLater)
+        thread.finished.connect(lambda th=thread: self._threads.discard(th))
+        thread.finished.connect(thread.deleteLater)
+        self._threads.add(thread)
+
+        item.split, item.split_percent, item.split_note = 'waiting', 0, ''
+        engine = worker.engine
+        if submit_job(self.main_window, worker.job_id, split_demands(engine.mode, engine.jobs), thread.start,
+                      label=f"Split {os.path.basename(path)}",
+                      pause=engine.pause, resume=engine.resume, renice=engine.renice):
+            item.split = 'running'
+
+    def _on_split_progress(self, job_id, fields: dict):
+        for item_id, (_worker, _thread, split_job) in self._splits.items():
+            if split_job == job_id:
+                item = self.queue.get(item_id)
+                if item is not None and 'percent' in fields:
+                    item.split, item.split_percent = 'running', int(fields['percent'])
+                    self.model.refresh(item)
+                return
+
+    def _on_split_finished(self, item, worker, count):
+        if self._closing:
+            return
+        entry = self._splits.get(item.id)
+        if entry is None or entry[0] is not worker:
+            return
+        del self._splits[item.id]
+        get_bus().unsubscribe(entry[2], self._on_split_progress)
+        get_bus().discard(entry[2])
+        release_job(self.main_window, entry[2])
+        if item.split_note:
+            item.split = 'failed'
+        else:
+            item.split, item.split_percent = 'done', 100
+            item.split_note = f"{count} part{'s' if count != 1 else ''}"
+        self.model.refresh(item)
+        self._update_summary()
+
+    def _cancel_splits(self, item_ids):
+        scheduler = getattr(self.main_window, 'scheduler', None)
+        for item_id in item_ids:
+            worker, thread, job_id = self._splits[item_id]
+            try:
+                worker.cancel()
+            except RuntimeError:
+                continue
+            if scheduler is not None and scheduler.is_queued(job_id):
+                # Never admitted: run it so it stops through the usual path
+                scheduler.finish(job_id)
+                thread.start()
+
+    def _shutdown(self):
+        # Stop every worker for good; their items go back in line for next time.
+        # Threads quit from the worker side, so each wait ends with its worker.
+        self._closing = True
+        self._prefetch_timer.stop()
+        lookups = self._listers + self._prefetches + ([self._chapter_lookup] if self._chapter_lookup else [])
+        for worker, thread in lookups:
+            try:
+                worker.cancel()
+                thread.wait(10000)
+            except RuntimeError:
+                pass
+        scheduler = getattr(self.main_window, 'scheduler', None)
+        for item_id, (worker, thread, job_id) in list(self._workers.items()):
+            get_bus().unsubscribe(job_id, self._on_bus_progress)
+            get_bus().discard(job_id)
+            if scheduler is not None and scheduler.is_queued(job_id):
+                scheduler.finish(job_id)
+            else:
+                release_job(self.main_window, job_id)
+            item = self.queue.get(item_id)
+            if item is not None:
+                self.queue.update(item, state=PAUSED if item_id in self._pausing else QUEUED)
+            try:
+                worker.cancel()
+                thread.wait(10000)
+            except RuntimeError:
+                # Already finished and deleted; its callback is ignored now
+                pass
+        self._workers.clear()
+        for worker, thread, job_id in self._splits.values():
+            get_bus().unsubscribe(job_id, self._on_split_progress)
+            get_bus().discard(job_id)
+            if scheduler is not None and scheduler.is_queued(job_id):
+                scheduler.finish(job_id)
+            else:
+                release_job(self.main_window, job_id)
+            try:
+                worker.cancel()
+                thread.wait(10000)
+            except RuntimeError:
+                pass
+        self._splits.clear()
+
+    def _update_summary(self):
+        counts = self.queue.counts()
+        active = counts[QUEUED] + counts[RUNNING]
+        parts = [f"{counts[RUNNING]} downloading", f"{counts[QUEUED]} queued"]
+        for state, label in ((PAUSED, 'paused'), (DONE, 'done'), (FAILED, 'failed')):
+            if counts[state]:
+                parts.append(f"{counts[state]} {label}")
+        if self._splits:
+            parts.append(f"{len(self._splits)} splitting")
+        if self._listers:
+            self.status_label.setText(f"Listing playlists ({self._listed} videos found), " + ', '.join(parts))
+        elif not self.queue.items:
+            self.status_label.setText("Waiting for URL...")
+        elif active or self._splits:
+            self.status_label.setText(', '.join(parts if active else parts[2:]))
+        elif counts[FAILED]:
+            self.status_label.setText("Finished with errors: " + ', '.join(parts[2:]))
+        else:
+            self.status_label.setText("Download complete" if counts[DONE] else ', '.join(parts[2:]))
+        if not active and self.queue.items:
+            self._set_progress_color('error' if counts[FAILED] else 'success' if counts[DONE] else None)
+        self.cancel_button.setEnabled(active > 0 or bool(self._listers) or bool(self._splits))
+        self._counts = counts
+        self._update_progress()
+        self._update_queue_buttons()
+
+    def _update_progress(self):
+        # Done items count in full, running ones by their own percentage;
+        # only running items are visited so a long queue stays cheap to refresh
+        counts = self._counts
+        running = [self.queue.get(item_id) for item_id in self._workers]
+        running = [item for item in running if item is not None]
+        total = counts[DONE] + counts[RUNNING] + counts[QUEUED]
+        done = counts[DONE] * 100 + sum(item.percent or 0 for item in running)
+        self.progress.setValue(int(done / total) if total else 0)
+        # Aggregate throughput across every running download
+        speed = sum(item.speed or 0 for item in running)
+        received = self._session_bytes + sum(item.downloaded or 0 for item in running)
+        text = f"{len(running)} running  |  {_fmt_speed(speed)}  |  {_fmt_size(received)} this session"
+        self.progress.setToolTip(text if running or received else '')
+
+    def _update_queue_buttons(self, *_):
+        states = {item.state for item in self._selected()}
+        self.pause_button.setEnabled(bool(states & {QUEUED, RUNNING}))
+        self.resume_button.setEnabled(PAUSED in states)
+        self.retry_button.setEnabled(bool(states & {FAILED, PAUSED, DONE}))
+        for button in (self.priority_up_button, self.priority_down_button, self.remove_button):
+            button.setEnabled(bool(states))
+        self.clear_button.setEnabled(bool(self._counts[DONE]))
 
-    def _save_resolution(self, value: str):
-        self.settings.setValue('downloader/resolution', value)
+    def _on_parallel_changed(self, value: int):
+        self.settings.setValue('downloader/parallel', value)
+        self._dispatch()
+
+    def _save_resolution(self, _index: int):
+        self._preferred_height = self._resolution()
+        self.settings.setValue('downloader/resolution', self._preferred_height)
+
+    def _resolution(self) -> str:
+        return str(self.resolution_combo.currentData() or self.resolution_combo.currentText())
 
     def _on_url_changed(self, text: str):
-        # Enable Download only with a valid http(s) URL and selected path
-        is_valid = bool(re.match(r"^https?://", (text or '').strip()))
+        # Enable Download only with at least one http(s) URL and a selected path
+        urls = parse_urls(text)
+        is_valid = bool(urls)
         self.download_button.setEnabled(is_valid and bool(self.download_path))
-        if not (text or '').strip():
+        self.chapters_button.setEnabled(len(urls) == 1 and bool(self.download_path)
+                                        and self._chapter_lookup is None and not is_collection_url(urls[0]))
+        if not (text or '').strip() and not self.queue.items:
             self.status_label.setText("Waiting for URL...")
+        # A single video is looked up once typing pauses; anything else shows the usual heights
+        url = urls[0] if len(urls) == 1 and not is_collection_url(urls[0]) else None
+        if self._prefetched and self._prefetched['url'] != url:
+            self._prefetched = None
+            self._fill_resolutions(None)
+        if url and not self._prefetched:
+            self._prefetch_timer.start()
+        else:
+            self._prefetch_timer.stop()
+            self._cancel_prefetches()
+
+    def _prefetch(self):
+        # Warms the extraction cache, so Download starts transferring at once,
+        # and fills the resolution list with the video's real formats
+        urls = parse_urls(self.url_input.text())
+        if len(urls) != 1 or self._closing:
+            return
+        url = urls[0]
+        if self._prefetches and self._prefetches[-1][0].url == url:
+            return
+        # yt-dlp cannot be interrupted mid-request; superseded lookups finish
+        # in the background and their results are dropped
+        self._cancel_prefetches()
+        thread = QThread()
+        worker = _MetadataWorker(url)
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.result.connect(lambda info, w=worker: self._on_prefetched(w, info))
+        worker.finished.connect(lambda w=worker: self._on_prefetch_finished(w))
+        worker.finished.connect(thread.quit, Qt.DirectConnection)
+        worker.finished.connect(worker.deleteLater)
+        thread.finished.connect(lambda th=thread: self._threads.discard(th))
+        thread.finished.connect(thread.deleteLater)
+        self._threads.add(thread)
+        self._prefetches.append((worker, thread))
+        self.resolution_combo.setToolTip('Reading available formats…')
+        thread.start()
+
+    def _cancel_prefetches(self):
+        for worker, _thread in self._prefetches:
+            try:
+                worker.cancel()
+            except RuntimeError:
+                pass
+
+    def _on_prefetched(self, worker, info):
+        if self._closing or not self._prefetches or self._prefetches[-1][0] is not worker or worker.cancelled:
+            return
+        urls = parse_urls(self.url_input.text())
+        if urls != [info['url']]:
+            return
+        self._prefetched = info
+        self._fill_resolutions(info)
+
+    def _on_prefetch_finished(self, worker):
+        self._prefetches = [(w, t) for w, t in self._prefetches if w is not worker]
+        if not self._closing and not self._prefetched:
+            self.resolution_combo.setToolTip('')
+
+    def _fill_resolutions(self, info):
+        # The video's own heights with their expected sizes, or the usual list;
+        # the closest height at or below the preferred one is selected
+        heights = (info or {}).get('heights') or []
+        combo = self.resolution_combo
+        combo.blockSignals(True)
+        combo.clear()
+        if heights:
+            for height, size in heights:
+                combo.addItem(f"{height}  (~{_fmt_size(size)})" if size else str(height), str(height))
+            values = [height for height, _size in heights]
+        else:
+            for height in RESOLUTIONS:
+                combo.addItem(height, height)
+            values = [int(height) for height in RESOLUTIONS]
+        try:
+            preferred = int(self._preferred_height)
+        except ValueError:
+            preferred = values[-1]
+        below = [h for h in values if h <= preferred]
+        combo.setCurrentIndex(values.index(max(below) if below else min(values)))
+        combo.blockSignals(False)
+        combo.setToolTip(f"Formats of {info['title']}" if heights else '')
 
     def _paste_from_clipboard(self):
         cb = QApplication.clipboard()
@@ -245,7 +972,13 @@ class YouTubeDownloaderWindow(QWidget):
             return
         txt = cb.text() or ''
         if txt:
-            self.url_input.setText(txt)
+            # A pasted list becomes one line; Download queues every URL in it
+            urls = parse_urls(txt)
+            self.url_input.setText(' '.join(urls) if len(urls) > 1 else txt.strip())
+            # A paste is complete, so there is nothing to wait for
+            if self._prefetch_timer.isActive():
+                self._prefetch_timer.stop()
+                self._prefetch()
 
     def _style_secondary_button(self):
         # Light/dark aware neutral look for cancel button
@@ -269,94 +1002,331 @@ class YouTubeDownloaderWindow(QWidget):
             return
         self.progress.setStyleSheet(f"QProgressBar::chunk {{ background-color: {color}; border-radius: 8px; }}")
 
-    def _on_stats(self, stats: dict):
-        # Human-readable figures
-        def _fmt_size(b):
-            if not b:
-                return '0B'
-            for unit in ['B', 'KB', 'MB', 'GB']:
-                if b < 1024.0:
-                    return f"{b:.1f}{unit}"
-                b /= 1024.0
-            return f"{b:.1f}TB"
-
-        def _fmt_speed(bps):
-            if not bps:
-                return '--'
-            for unit in ['B/s', 'KB/s', 'MB/s', 'GB/s']:
-                if bps < 1024.0:
-                    return f"{bps:.1f} {unit}"
-                bps /= 1024.0
-            return f"{bps:.1f} TB/s"
-
-        def _fmt_eta(sec):
-            if not isinstance(sec, (int, float)):
-                return '--'
-            m, s = divmod(int(sec), 60)
-            h, m = divmod(m, 60)
-            if h:
-                return f"{h:d}h {m:02d}m {s:02d}s"
-            if m:
-                return f"{m:d}m {s:02d}s"
-            return f"{s:d}s"
-
-        downloaded = stats.get('downloaded') or 0
-        total = stats.get('total') or 0
-        speed = stats.get('speed')
-        eta = stats.get('eta')
-        pct = int(downloaded * 100 / max(1, total)) if total else 0
-        self.progress.setFormat(f"{pct}%")
-        # Keep detailed info as tooltip
-        text = f"{_fmt_size(downloaded)} / { _fmt_size(total) }  |  {_fmt_speed(speed)}  |  ETA: {_fmt_eta(eta)}"
-        self.progress.setToolTip(text)
+
+_STATE_LABELS = {
+    QUEUED: 'Queued',
+    RUNNING: 'Downloading',
+    PAUSED: 'Paused',
+    DONE: 'Done',
+    FAILED: 'Failed',
+}
+
+_SPLIT_LABELS = {
+    'waiting': 'Waiting to split',
+    'running': 'Splitting',
+    'done': 'Split',
+    'failed': 'Split failed',
+}
+
+
+class _QueueModel(QAbstractTableModel):
+    # Rows are the queue's items in insertion order; updates touch single rows
+    COLUMNS = ('Video', 'Status', 'Progress', 'Priority')
+
+    def __init__(self, queue, parent=None):
+        super().__init__(parent)
+        self.queue = queue
+        self._rows = {}
+        self._reindex()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.queue.items)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        item = self.queue.items[index.row()]
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == 0:
+                if item.sections:
+                    count = len((decode_sections(item.sections) or {}).get('chapters', ()))
+                    return f"{item.title or item.url}  ({count} chapter{'s' if count != 1 else ''})"
+                return item.title or item.url
+            if column == 1:
+                if item.state == RUNNING and item.waiting:
+                    return 'Waiting'
+                if item.state == DONE and item.split:
+                    return _SPLIT_LABELS[item.split]
+                return _STATE_LABELS.get(item.state, item.state)
+            if column == 2:
+                return _progress_text(item)
+            return item.priority
+        if role == Qt.EditRole and column == 3:
+            return item.priority
+        if role == Qt.ToolTipRole:
+            if column == 1 and item.split == 'failed':
+                return item.split_note
+            if column == 1 and item.error:
+                return item.error
+            if column == 0:
+                return item.filepath or item.url
+        if role == Qt.TextAlignmentRole and column == 3:
+            return Qt.AlignCenter
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid() and index.column() == 3:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or index.column() != 3:
+            return False
+        try:
+            priority = int(value)
+        except (TypeError, ValueError):
+            return False
+        self.queue.update(self.queue.items[index.row()], priority=priority)
+        self.dataChanged.emit(index, index)
+        return True
+
+    def add(self, urls, out_dir, max_height, titles=None, sections=''):
+        urls = self.queue.fresh(urls, sections)
+        if not urls:
+            return []
+        first = len(self.queue.items)
+        self.beginInsertRows(QModelIndex(), first, first + len(urls) - 1)
+        added = self.queue.add(urls, out_dir, max_height, titles=titles, sections=sections)
+        self._reindex()
+        self.endInsertRows()
+        return added
+
+    def remove(self, items):
+        if not items:
+            return
+        # One reset is far cheaper than thousands of scattered row removals
+        self.beginResetModel()
+        self.queue.remove(items)
+        self._reindex()
+        self.endResetModel()
+
+    def refresh(self, item):
+        row = self._rows.get(item.id)
+        if row is not None:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.COLUMNS) - 1))
+
+    def _reindex(self):
+        self._rows = {item.id: row for row, item in enumerate(self.queue.items)}
+
+
+def _progress_text(item) -> str:
+    if item.state == DONE:
+        if item.split == 'running':
+            return f"{item.split_percent}%"
+        return item.split_note if item.split == 'done' else '100%'
+    if item.state != RUNNING or not item.total:
+        return f"{item.percent}%" if item.percent else ''
+    text = f"{item.percent}%  {_fmt_size(item.downloaded)} / {_fmt_size(item.total)}"
+    if item.speed:
+        text += f"  {_fmt_speed(item.speed)}  ETA {_fmt_eta(item.eta)}"
+    return text
+
+
+# Human-readable figures
+def _fmt_size(b):
+    if not b:
+        return '0B'
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if b < 1024.0:
+            return f"{b:.1f}{unit}"
+        b /= 1024.0
+    return f"{b:.1f}TB"
+
+
+def _fmt_speed(bps):
+    if not bps:
+        return '--'
+    for unit in ['B/s', 'KB/s', 'MB/s', 'GB/s']:
+        if bps < 1024.0:
+            return f"{bps:.1f} {unit}"
+        bps /= 1024.0
+    return f"{bps:.1f} TB/s"
+
+
+def _fmt_eta(sec):
+    if not isinstance(sec, (int, float)):
+        return '--'
+    m, s = divmod(int(sec), 60)
+    h, m = divmod(m, 60)
+    if h:
+        return f"{h:d}h {m:02d}m {s:02d}s"
+    if m:
+        return f"{m:d}m {s:02d}s"
+    return f"{s:d}s"
 
 
 class _YTDLPWorker(QObject):
-    progress = pyqtSignal(int)
-    stats = pyqtSignal(object)  # dict with speed, eta, size
+    # Progress (percent) and stats (downloaded, total, speed, eta) are
+    # published on the progress bus under job_id
     finished = pyqtSignal()
     error = pyqtSignal(str)
+    result = pyqtSignal(str)  # path of the finished file, emitted before finished
+    chapters_found = pyqtSignal(list)  # [(start_seconds, title), ..., (end, 'End')], emitted before result
 
-    def __init__(self, url: str, out_dir: str, max_height: str):
+    def __init__(self, url: str, out_dir: str, max_height: str, job_id: str = None, fragments: int = 4,
+                 use_archive: bool = True, weight: float = 1.0, connections: int = 4, sections: dict = None):
         super().__init__()
+        self.job_id = job_id or new_job_id('download')
         self.url = url
         self.out_dir = out_dir
         self.max_height = max_height
+        self.fragments = max(1, int(fragments))
+        self.connections = max(1, int(connections))
+        # {'chapters': [(start, end, title)], 'exact': bool} to fetch only those time ranges
+        self.sections = sections
+        # A chapter selection is not the whole video, so it neither uses nor feeds the archive
+        self.archive = get_download_archive() if use_archive and not sections else None
+        self.filepath = None
+        self.reused = False  # True when the archive already had the file
+        self._downloaded = {}  # extractor, id, title and height of what was fetched
+        self.chapters = []  # from the downloaded video's info dict
+        self.weight = weight  # share of the download bandwidth budget relative to other jobs
+        self._lease = None
+        self._params = {}  # live options of the running YoutubeDL
+        self._paced = (None, 0)  # file and byte count already paid for
+        self._pace_lock = threading.Lock()
+        self._resume = None  # journal entry left by an earlier attempt
+        self._client = None
+        self._succeeded = False
+        self._cutter = None
         self._cancel = False
 
     def cancel(self):
         self._cancel = True
+        cutter = self._cutter
+        if cutter is not None:
+            cutter.cancel()
+
+    def _post_hook(self, filepath):
+        # Final path after merging and other post-processing
+        self.filepath = filepath
+
+    def _done(self):
+        self._succeeded = True
+        if self.filepath and self.archive is not None and not self.reused:
+            d = self._downloaded
+            self.archive.record(d.get('extractor_key'), d.get('id'), self.max_height, self.filepath,
+                                url=self.url, title=d.get('title') or '', height=d.get('height'))
+        if self.filepath:
+            if self.chapters and not self.sections:
+                self.chapters_found.emit(self.chapters)
+            self.result.emit(self.filepath)
+        self.finished.emit()
+
+    def _reuse(self, entry) -> bool:
+        # Resolve to the archived file instead of downloading it again
+        if not entry:
+            return False
+        self.filepath = entry['path']
+        self.reused = True
+        get_bus().publish(self.job_id, percent=100)
+        self._done()
+        return True
+
+    def _throttle(self, d):
+        # Fragment threads report concurrently and out of order; only the growth
+        # past the highest count seen for the file is paid for, so each byte once
+        filename, downloaded = d.get('filename'), d.get('downloaded_bytes') or 0
+        with self._pace_lock:
+            last_file, last_bytes = self._paced
+            if filename != last_file:
+                self._paced = (filename, downloaded)
+                owed = 0
+            else:
+                owed = max(0, downloaded - last_bytes)
+                self._paced = (filename, max(last_bytes, downloaded))
+        if owed:
+            self._lease.consume(owed, lambda: self._cancel)
+        _apply_rate(self._params, self._lease.rate())
 
     def _hook(self, d):
         if self._cancel:
             raise Exception("Cancelled by user")
         if d.get('status') == 'downloading':
+            if self._lease is not None:
+                self._throttle(d)
             downloaded = d.get('downloaded_bytes', 0)
             total = d.get('total_bytes') or d.get('total_bytes_estimate', 0)
-            if total and total > 0:
-                self.progress.emit(int(downloaded * 100 / total))
-            # Emit stats
-            speed = d.get('speed')  # bytes/s
-            eta = d.get('eta')  # seconds
-            self.stats.emit({
+            self._journal_progress(d, downloaded, total)
+            fields = {
                 'downloaded': downloaded,
                 'total': total,
-                'speed': speed,
-                'eta': eta,
-            })
+                'speed': d.get('speed'),  # bytes/s
+                'eta': d.get('eta'),  # seconds
+            }
+            if total and total > 0:
+                fields['percent'] = int(downloaded * 100 / total)
+            get_bus().publish(self.job_id, **fields)
         elif d.get('status') == 'finished':
-            self.progress.emit(100)
+            self.filepath = self.filepath or d.get('filename')
+            info = d.get('info_dict') or {}
+            self._downloaded = {k: info.get(k) for k in ('extractor_key', 'id', 'title', 'height')}
+            self.chapters = chapters_from_info(info)
+            get_bus().publish(self.job_id, percent=100)
+
+    def _journal_progress(self, d, downloaded, total):
+        # Enough to pick the same formats, and so the same .part files, after a crash
+        info = d.get('info_dict') or {}
+        requested = info.get('requested_formats')
+        format_id = '+'.join(f['format_id'] for f in requested) if requested else info.get('format_id')
+        get_download_journal().update(
+            self.url, self.out_dir, self.max_height, part=d.get('tmpfilename'),
+            client=self._client, format_id=format_id, downloaded=downloaded, total=total,
+            fragment_index=d.get('fragment_index'), fragment_count=d.get('fragment_count'),
+        )
 
     def run(self):
+        # The lease ties this download to the shared download budget
+        self._lease = get_limiter().acquire(DOWNLOAD, self.job_id, self.weight)
+        # Chapter ranges are cut by ffmpeg and cannot be continued, so they are not journaled
+        journal = get_download_journal() if not self.sections else None
+        if journal is not None:
+            self._resume = journal.get(self.url, self.out_dir, self.max_height)
+            journal.begin(self.url, self.out_dir, self.max_height)
+        try:
+            self._run()
+        finally:
+            self._lease.release()
+            if journal is not None:
+                journal.end(self.url, self.out_dir, self.max_height, done=self._succeeded)
+
+    def _run(self):
+        if self._cancel:
+            self.error.emit('Cancelled by user')
+            self.finished.emit()
+            return
+        # The archive is consulted before any request
+        if self.archive is not None and self._reuse(self.archive.lookup_url(self.url, self.max_height)):
+            return
         base_opts = {
-            'outtmpl': os.path.join(self.out_dir, '%(title)s.%(ext)s'),
+            # The id keeps same-titled videos apart and makes re-runs land on the same name
+            'outtmpl': os.path.join(self.out_dir, '%(title)s [%(id)s].%(ext)s'),
             'progress_hooks': [self._hook],
+            'post_hooks': [self._post_hook],
             'noplaylist': True,
             'noprogress': False,
             # Prefer mp4 merge when possible
             'merge_output_format': 'mp4',
+            # Sidecar metadata (chapters, duration) lets the splitter run without a chapters file
+            'writeinfojson': True,
             'retries': 3,
+            # DASH/HLS formats are fetched several fragments at a time
+            'concurrent_fragment_downloads': self.fragments,
         }
+        if self.connections > 1:
+            # Single-file formats are fetched as byte ranges over several connections
+            base_opts['external_downloader'] = {'http': register_range_downloader()}
+            base_opts['range_connections'] = self.connections
         # Tolerant format selector with fallbacks by height, then best
         fmt_pref = (
             f"bestvideo*[height<={self.max_height}][ext=mp4]+bestaudio[ext=m4a]/"
@@ -365,41 +1335,311 @@ class _YTDLPWorker(QObject):
             f"best[height<={self.max_height}]/best"
         )
 
+        cache = get_extraction_cache()
+        extractor = client_extractor(self.url)
+        # Several player clients only help extractors that take one; the one
+        # that worked last for this extractor is tried first
+        clients = cache.client_order(extractor, PLAYER_CLIENTS) if extractor else [None]
+        resume = self._resume or {}
+        if resume.get('client') and resume['client'] in clients:
+            # Same client and formats as the interrupted attempt, so its .part files are continued
+            clients.remove(resume['client'])
+            clients.insert(0, resume['client'])
         attempted_msgs = []
-        # Try multiple player clients; yt-dlp expects a list value
-        for client in ['android', 'mweb', 'web', 'ios', 'tv']:
-            try:
-                opts = dict(base_opts)
-                opts['format'] = fmt_pref
-                opts['extractor_args'] = {'youtube': {'player_client': [client]}}
-                with yt_dlp.YoutubeDL(opts) as ydl:
-                    ydl.download([self.url])
-                self.finished.emit()
-                return
-            except Exception as e1:
+        known_info = None
+        for client in clients:
+            if self._cancel:
+                break
+            # A cached result that fails may hold expired stream URLs: extract once more
+            for _attempt in range(2):
                 try:
-                    opts = dict(base_opts)
-                    opts['format'] = 'best'
-                    opts['extractor_args'] = {'youtube': {'player_client': [client]}}
-                    with yt_dlp.YoutubeDL(opts) as ydl:
-                        ydl.download([self.url])
-                    self.finished.emit()
-                    return
-                except Exception as e2:
-                    attempted_msgs.append(f"{client}: {str(e2) or str(e1)}")
-
-        # If all failed, try to provide helpful info about available formats
+                    info, cached = self._extract(cache, client)
+                except Exception as e:
+                    attempted_msgs.append(f"{client or 'default'}: {e}")
+                    break
+                known_info = known_info or info
+                # Sites without ids in their URLs are matched after this one metadata request
+                if self.archive is not None and info.get('id'):
+                    self.archive.remember_url(self.url, info.get('extractor_key'), info['id'])
+                    if self._reuse(self.archive.lookup(info.get('extractor_key'), info['id'], self.max_height)):
+                        return
+                error = None
+                self._client = client
+                selectors = [fmt_pref, 'best']
+                if resume.get('format_id') and resume.get('client') == client:
+                    selectors.insert(0, resume['format_id'])
+                for fmt in selectors:
+                    try:
+                        opts = _with_client(dict(base_opts, format=fmt), client)
+                        _apply_rate(opts, self._lease.rate())
+                        with yt_dlp.YoutubeDL(opts) as ydl:
+                            self._params = ydl.params
+                            if self.sections:
+                                self._cut_sections(ydl, info)
+                            else:
+                                # Download from the extracted info; no second page fetch
+                                ydl.process_ie_result(copy.deepcopy(info), download=True)
+                        cache.remember_client(extractor, client)
+                        self._done()
+                        return
+                    except Exception as e:
+                        error = error or e
+                        if self._cancel:
+                            break
+                if self._cancel or not cached:
+                    attempted_msgs.append(f"{client or 'default'}: {error}")
+                    break
+                cache.invalidate(self.url, client)
+            if self._cancel:
+                break
+
+        if self._cancel:
+            self.error.emit('Cancelled by user')
+            self.finished.emit()
+            return
+
+        # If all failed, describe the formats seen during extraction
         msg = "Requested format is not available.\n" + "\n".join(attempted_msgs)
-        try:
-            with yt_dlp.YoutubeDL({'quiet': True, 'skip_download': True, 'extractor_args': {'youtube': {'player_client': ['android']}}}) as ydl:
-                info = ydl.extract_info(self.url, download=False)
-            formats = info.get('formats') or []
-            heights = sorted({f.get('height') for f in formats if f.get('url') and (f.get('vcodec') or '') != 'none'})
+        if known_info is not None:
+            formats = known_info.get('formats') or []
+            heights = sorted({f.get('height') for f in formats
+                              if f.get('height') and f.get('url') and (f.get('vcodec') or '') != 'none'})
             if heights:
-                msg += f"\nAvailable heights: {', '.join(str(h) for h in heights if h)}"
+                msg += f"\nAvailable heights: {', '.join(str(h) for h in heights)}"
             else:
                 msg += "\nNo downloadable video streams were found (YouTube may be restricting this content for this client)."
-        except Exception:
-            pass
         self.error.emit(msg)
         self.finished.emit()
+
+    def _cut_sections(self, ydl, info):
+        # Formats are chosen as usual; ffmpeg then reads only the chosen time
+        # ranges from their URLs into one file per chapter, in a folder named
+        # after the video
+        info = ydl.process_ie_result(copy.deepcopy(info), download=False)
+        formats = info.get('requested_formats') or [info]
+        headers = dict(formats[0].get('http_headers') or info.get('http_headers') or {})
+        cookies = ydl.cookiejar.get_cookie_header(formats[0]['url'])
+        if cookies:
+            headers['Cookie'] = cookies
+        folder = os.path.join(self.out_dir, safe_filename(f"{info.get('title') or info.get('id')} [{info.get('id')}]"))
+        self._cutter = SectionExtractor(
+            [f['url'] for f in formats], self.sections['chapters'], folder, exact=self.sections['exact'],
+            headers=headers, on_progress=lambda percent, _title: get_bus().publish(self.job_id, percent=percent),
+        )
+        if self._cancel:
+            raise Exception('Cancelled by user')
+        self._cutter.run()
+        self.filepath = folder
+
+    def _extract(self, cache, client):
+        return _extract_info(cache, self.url, client)
+
+
+def _extract_info(cache, url: str, client):
+    # Returns (info, cached); the unprocessed result is cached so any
+    # format can still be selected from it later
+    info = cache.get(url, client)
+    if info is not None:
+        return info, True
+    with yt_dlp.YoutubeDL(_with_client({'quiet': True, 'noplaylist': True}, client)) as ydl:
+        info = ydl.extract_info(url, download=False, process=False)
+    if not info:
+        raise Exception('No video information could be extracted.')
+    cache.put(url, client, info)
+    return info, False
+
+
+def _expected_sizes(info: dict):
+    # [(height, bytes or None)] ascending. Mirrors the download's selector:
+    # the best video at each height, mp4 first, plus the best audio (m4a first)
+    # when the video has none of its own
+    duration = info.get('duration')
+    formats = [f for f in info.get('formats') or [info] if f.get('url')]
+
+    def size(f):
+        if f.get('filesize') or f.get('filesize_approx'):
+            return f.get('filesize') or f.get('filesize_approx')
+        if f.get('tbr') and duration:
+            return int(f['tbr'] * 125 * duration)  # kbit/s over the whole video
+        return None
+
+    videos = [f for f in formats if f.get('height') and (f.get('vcodec') or '') != 'none']
+    audios = [f for f in formats if f.get('vcodec') == 'none' and (f.get('acodec') or 'none') != 'none']
+    audio = max(audios, key=lambda f: (f.get('ext') == 'm4a', f.get('abr') or f.get('tbr') or 0), default=None)
+    sizes = []
+    for height in sorted({f['height'] for f in videos}):
+        video = max((f for f in videos if f['height'] == height),
+                    key=lambda f: (f.get('ext') == 'mp4', f.get('tbr') or 0))
+        total = size(video)
+        if total and audio is not None and (video.get('acodec') or 'none') == 'none':
+            total = total + size(audio) if size(audio) else None
+        sizes.append((height, total))
+    return sizes
+
+
+def _apply_rate(params: dict, rate: float):
+    # yt-dlp enforces ratelimit per connection; concurrent fragments are held
+    # to the job's total by the pacing in the progress hook. throttledratelimit
+    # is dropped while capped, or the cap would look like server throttling.
+    if rate:
+        params['ratelimit'] = max(1024, int(rate))
+        params.pop('throttledratelimit', None)
+    else:
+        params.pop('ratelimit', None)
+
+
+def _with_client(opts: dict, client) -> dict:
+    # yt-dlp expects a list value
+    if client:
+        opts['extractor_args'] = {'youtube': {'player_client': [client]}}
+    return opts
+
+
+class _MetadataWorker(QObject):
+    # One video's title, duration, chapters [(start, end, title)] and heights
+    # [(height, expected bytes or None)]. The extraction is cached, so a
+    # download queued from them starts at once.
+    finished = pyqtSignal()
+    error = pyqtSignal(str)
+    result = pyqtSignal(dict)
+
+    def __init__(self, url: str):
+        super().__init__()
+        self.url = url
+        self._cancel = False
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel
+
+    def cancel(self):
+        self._cancel = True
+
+    def run(self):
+        try:
+            cache = get_extraction_cache()
+            extractor = client_extractor(self.url)
+            clients = cache.client_order(extractor, PLAYER_CLIENTS) if extractor else [None]
+            info, errors = None, []
+            for client in clients:
+                if self._cancel:
+                    break
+                try:
+                    info, _cached = _extract_info(cache, self.url, client)
+                    break
+                except Exception as e:
+                    errors.append(f"{client or 'default'}: {e}")
+            if info is not None:
+                duration = info.get('duration') or 0
+                chapters = []
+                for chapter in info.get('chapters') or []:
+                    start = chapter.get('start_time') or 0
+                    end = chapter.get('end_time') or duration
+                    if end > start:
+                        chapters.append((float(start), float(end), chapter.get('title') or f"Chapter {len(chapters) + 1}"))
+                self.result.emit({'url': self.url, 'title': info.get('title') or self.url, 'duration': duration,
+                                  'chapters': chapters, 'heights': _expected_sizes(info)})
+            elif not self._cancel:
+                self.error.emit("\n".join(errors))
+        except Exception as e:
+            self.error.emit(str(e))
+        self.finished.emit()
+
+
+class _PlaylistWorker(QObject):
+    # Lists a playlist or channel with flat extraction, so no video page is
+    # fetched; entries are emitted in batches as the pages come in
+    finished = pyqtSignal()
+    error = pyqtSignal(str)
+    entries = pyqtSignal(list)  # [(url, title), ...]
+
+    BATCH = 50
+    FLUSH_SECONDS = 0.5
+    MAX_DEPTH = 3  # channel -> tab -> playlist
+
+    def __init__(self, url: str):
+        super().__init__()
+        self.url = url
+        self.count = 0
+        self._cancel = False
+
+    def cancel(self):
+        self._cancel = True
+
+    def run(self):
+        opts = {
+            'quiet': True,
+            'skip_download': True,
+            'extract_flat': 'in_playlist',
+            'lazy_playlist': True,
+            'noplaylist': False,
+        }
+        batch = []
+        flushed = time.monotonic()
+        try:
+            with yt_dlp.YoutubeDL(opts) as ydl:
+                for entry in self._walk(ydl, self.url, 0, set()):
+                    if self._cancel:
+                        break
+                    batch.append(entry)
+                    if len(batch) >= self.BATCH or time.monotonic() - flushed > self.FLUSH_SECONDS:
+                        self._flush(batch)
+                        batch = []
+                        flushed = time.monotonic()
+        except Exception as e:
+            if not self._cancel:
+                self.error.emit(str(e))
+        self._flush(batch)
+        self.finished.emit()
+
+    def _flush(self, batch):
+        if batch:
+            self.count += len(batch)
+            self.entries.emit(batch)
+
+    def _walk(self, ydl, url, depth, seen):
+        # process=False keeps the entries a lazy generator of unresolved references
+        if url in seen:
+            return
+        seen.add(url)
+        info = ydl.extract_info(url, download=False, process=False)
+        if not info:
+            return
+        kind = info.get('_type', 'video')
+        if kind in ('url', 'url_transparent'):
+            target = _entry_url(info)
+            if target and depth < self.MAX_DEPTH and _is_collection(info):
+                yield from self._walk(ydl, target, depth + 1, seen)
+            elif target:
+                yield target, info.get('title') or ''
+            return
+        if kind not in ('playlist', 'multi_video'):
+            yield info.get('webpage_url') or url, info.get('title') or ''
+            return
+        for entry in info.get('entries') or []:
+            if self._cancel:
+                return
+            if not entry:
+                continue
+            target = _entry_url(entry)
+            if not target:
+                continue
+            if depth < self.MAX_DEPTH and _is_collection(entry):
+                yield from self._walk(ydl, target, depth + 1, seen)
+            else:
+                yield target, entry.get('title') or ''
+
+
+def _entry_url(entry: dict) -> str:
+    url = entry.get('url') or entry.get('webpage_url') or ''
+    if url.startswith(('http://', 'https://')):
+        return url
+    if entry.get('ie_key') == 'Youtube' and (entry.get('id') or url):
+        return f"https://www.youtube.com/watch?v={entry.get('id') or url}"
+    return ''
+
+
+def _is_collection(entry: dict) -> bool:
+    if entry.get('_type') == 'playlist' or entry.get('ie_key') == 'YoutubeTab':
+        return True
+    return entry.get('ie_key') != 'Youtube' and is_collection_url(_entry_url(entry))
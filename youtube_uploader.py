@@ -1,10 +1,12 @@
 import os
 import sys
+import json
 import time
 from typing import Optional, List
 import mimetypes
+import threading
 
-from PyQt5.QtCore import QObject, pyqtSignal, QThread, QSettings, Qt
+from PyQt5.QtCore import QObject, pyqtSignal, QThread, QSettings, Qt, QAbstractTableModel, QModelIndex, QTimer
 from PyQt5.QtWidgets import (
     QWidget,
     QVBoxLayout,
@@ -17,20 +19,47 @@ from PyQt5.QtWidgets import (
     QComboBox,
     QProgressBar,
     QMessageBox,
+    QSpinBox,
+    QTableView,
+    QHeaderView,
+    QAbstractItemView,
 )
 
 # Google API imports (runtime deps)
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
 from googleapiclient.errors import HttpError
-from googleapiclient.http import MediaFileUpload
+from googleapiclient.http import MediaFileUpload, MediaUploadProgress
+from google.auth.credentials import AnonymousCredentials
+from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 
+from probe_cache import get_probe_cache, format_summary
+from progress_bus import ensure_qt_pump, get_bus, new_job_id
+from job_scheduler import NETWORK, release_job, submit_job
+from bandwidth import UPLOAD, get_limiter, upload_chunk_size
+from download_queue import DONE, FAILED, PAUSED, QUEUED, RUNNING
+from upload_queue import (DAILY_QUOTA, QUOTA_COSTS, UploadQueue, batch_entries, get_quota_ledger, next_reset,
+                          playlist_id, upload_cost)
+
 
 # Button styling is handled globally via the app theme (QSS)
 
 
 SCOPES = ["https://www.googleapis.com/auth/youtube.upload"]
+# Adding videos to a playlist needs the broader scope
+PLAYLIST_SCOPES = SCOPES + ["https://www.googleapis.com/auth/youtube"]
+
+# Base URL of a local stand-in for the YouTube Data API (e.g.
+# http://127.0.0.1:8090/); every call goes there instead, without signing in
+API_ENDPOINT = os.environ.get('VIDEO_MANAGER_YOUTUBE_API', '')
+
+# Retries of a chunk after a dropped connection or a 5xx response
+_CHUNK_RETRIES = 3
+_QUOTA_REASONS = ('quotaExceeded', 'dailyLimitExceeded')
+
+_credentials_lock = threading.Lock()
 
 
 class YouTubeUploaderWindow(QWidget):
@@ -38,11 +67,28 @@ class YouTubeUploaderWindow(QWidget):
         super().__init__()
         self.main_window = main_window
         self.settings = QSettings()
+        self._job_id = None
+        self._workers = {}  # item id -> (worker, thread, bus job id)
+        self._by_job = {}  # bus job id -> item id
+        self._errors = {}  # item id -> last error of the running attempt
+        self._pausing = set()
+        self._threads = set()
+        self._closing = False
+        self._probes = set()  # (worker, thread) probing the selected video
+        self._video_info = None  # (path, probe or None) of the selected video
+        self._pending_upload = None  # path whose upload starts once its probe is in
+        self.queue = UploadQueue()
         self._init_ui()
+        ensure_qt_pump()
+        # Wakes the queue when the quota day rolls over
+        self._quota_timer = QTimer(self)
+        self._quota_timer.setSingleShot(True)
+        self._quota_timer.timeout.connect(self._dispatch)
+        self._dispatch()
 
     def _init_ui(self):
         self.setWindowTitle("YouTube Uploader")
-        self.setGeometry(100, 100, 640, 600)
+        self.setGeometry(100, 100, 720, 860)
 
         layout = QVBoxLayout()
 
@@ -56,10 +102,13 @@ class YouTubeUploaderWindow(QWidget):
         row1.addWidget(self.video_path)
         row1.addWidget(btn_browse_video)
         layout.addLayout(row1)
+        self.video_info_label = QLabel("")
+        layout.addWidget(self.video_info_label)
 
         # Title
         self.title_label = QLabel("Title:")
         self.title_input = QLineEdit()
+        self.title_input.setToolTip("For queued files, {name}, {folder}, {index} and {count} are filled in per file")
         layout.addWidget(self.title_label)
         layout.addWidget(self.title_input)
 
@@ -76,6 +125,12 @@ class YouTubeUploaderWindow(QWidget):
         layout.addWidget(self.tags_label)
         layout.addWidget(self.tags_input)
 
+        # Playlist
+        self.playlist_label = QLabel("Playlist (optional ID or URL):")
+        self.playlist_input = QLineEdit()
+        layout.addWidget(self.playlist_label)
+        layout.addWidget(self.playlist_input)
+
         # Category and Privacy
         row2 = QHBoxLayout()
         self.category_label = QLabel("Category:")
@@ -140,6 +195,64 @@ class YouTubeUploaderWindow(QWidget):
         controls.addWidget(self.cancel_button)
 
         layout.addLayout(controls)
+
+        # Batch queue: the form above is the template for every file added
+        queue_controls = QHBoxLayout()
+        self.add_files_button = QPushButton("Add Files to Queue…")
+        self.add_files_button.setToolTip("Queue many files with the title, description, tags and playlist above")
+        self.add_files_button.clicked.connect(self._add_files)
+        queue_controls.addWidget(self.add_files_button)
+        queue_controls.addStretch(1)
+        queue_controls.addWidget(QLabel("Parallel uploads:"))
+        self.parallel_spin = QSpinBox()
+        self.parallel_spin.setRange(1, 6)
+        queue_controls.addWidget(self.parallel_spin)
+        queue_controls.addWidget(QLabel("Daily quota:"))
+        self.quota_spin = QSpinBox()
+        self.quota_spin.setRange(1600, 10000000)
+        self.quota_spin.setSingleStep(1000)
+        self.quota_spin.setSuffix(" units")
+        self.quota_spin.setToolTip("API quota of your Google Cloud project; an upload costs 1600 units")
+        queue_controls.addWidget(self.quota_spin)
+        layout.addLayout(queue_controls)
+
+        self.model = _UploadModel(self.queue, self)
+        self.table = QTableView(self)
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.table.setEditTriggers(QAbstractItemView.DoubleClicked | QAbstractItemView.EditKeyPressed)
+        self.table.setWordWrap(False)
+        self.table.verticalHeader().hide()
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.Interactive)
+        header.setSectionResizeMode(1, QHeaderView.Stretch)
+        for column, width in ((0, 180), (2, 110), (3, 70)):
+            self.table.setColumnWidth(column, width)
+        self.table.setMinimumHeight(160)
+        self.table.selectionModel().selectionChanged.connect(self._update_queue_buttons)
+        layout.addWidget(self.table, 1)
+
+        queue_row = QHBoxLayout()
+        self.pause_button = QPushButton("Pause")
+        self.pause_button.clicked.connect(self._pause_selected)
+        self.resume_button = QPushButton("Resume")
+        self.resume_button.clicked.connect(self._resume_selected)
+        self.retry_button = QPushButton("Retry")
+        self.retry_button.clicked.connect(self._retry_selected)
+        self.remove_button = QPushButton("Remove")
+        self.remove_button.clicked.connect(self._remove_selected)
+        self.clear_button = QPushButton("Clear Finished")
+        self.clear_button.clicked.connect(self._clear_finished)
+        for button in (self.pause_button, self.resume_button, self.retry_button, self.remove_button):
+            queue_row.addWidget(button)
+        queue_row.addStretch(1)
+        queue_row.addWidget(self.clear_button)
+        layout.addLayout(queue_row)
+
+        self.queue_status = QLabel("")
+        self.queue_status.setWordWrap(True)
+        layout.addWidget(self.queue_status)
         self.setLayout(layout)
 
         # Restore settings
@@ -149,6 +262,7 @@ class YouTubeUploaderWindow(QWidget):
         vp = self.settings.value('uploader/video_path', '')
         if vp:
             self.video_path.setText(vp)
+            self._show_video_info(vp)
         tp = self.settings.value('uploader/title', '')
         if tp:
             self.title_input.setText(tp)
@@ -164,18 +278,71 @@ class YouTubeUploaderWindow(QWidget):
             if self.category_combo.itemData(i) == cat_id:
                 self.category_combo.setCurrentIndex(i)
                 break
+        self.playlist_input.setText(self.settings.value('uploader/playlist', ''))
+        self.parallel_spin.setValue(int(self.settings.value('uploader/parallel', 2)))
+        self.parallel_spin.valueChanged.connect(self._on_parallel_changed)
+        self.quota_spin.setValue(int(self.settings.value('uploader/daily_quota', DAILY_QUOTA)))
+        get_quota_ledger().daily = self.quota_spin.value()
+        self.quota_spin.valueChanged.connect(self._on_quota_changed)
+        self._update_queue_buttons()
+
+    def closeEvent(self, event):
+        if self._workers:
+            answer = QMessageBox.question(
+                self, "Uploads Running",
+                "Stop the running uploads and close? They stay in the queue and continue where they stopped next time.",
+            )
+            if answer != QMessageBox.Yes:
+                event.ignore()
+                return
+        self._shutdown()
+        self.queue.close()
+        event.accept()
 
     def _choose_video(self):
         file_path, _ = QFileDialog.getOpenFileName(self, 'Select Video File')
         if file_path:
             self.video_path.setText(file_path)
             self.settings.setValue('uploader/video_path', file_path)
+            self._show_video_info(file_path)
+
+    def _show_video_info(self, path: str):
+        # ffprobe can take a while on a large or remote file; the label fills in when it is done
+        self._video_info = None
+        self.video_info_label.setText('Reading media information…')
+        thread = QThread()
+        worker = _ProbeWorker(path)
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.result.connect(self._on_video_info)
+        worker.finished.connect(thread.quit, Qt.DirectConnection)
+        worker.finished.connect(worker.deleteLater)
+        thread.finished.connect(lambda pair=(worker, thread): self._probes.discard(pair))
+        thread.finished.connect(thread.deleteLater)
+        self._probes.add((worker, thread))
+        thread.start()
+
+    def _on_video_info(self, path: str, info):
+        if self._closing:
+            return
+        start = False
+        if self._pending_upload == path:
+            self._pending_upload = None
+            self.upload_button.setEnabled(True)
+            start = True
+        if path != self.video_path.text().strip():
+            return
+        self._video_info = (path, info)
+        self.video_info_label.setText(format_summary(info))
+        if start:
+            self._start_upload()
 
     def _choose_creds(self):
         file_path, _ = QFileDialog.getOpenFileName(self, 'Select credentials.json', filter="JSON files (*.json)")
         if file_path:
             self.creds_path.setText(file_path)
             self.settings.setValue('uploader/creds_path', file_path)
+            self._dispatch()
 
     def _choose_thumbnail(self):
         file_path, _ = QFileDialog.getOpenFileName(self, 'Select Thumbnail Image', filter="Images (*.jpg *.jpeg *.png *.gif)")
@@ -197,14 +364,33 @@ class YouTubeUploaderWindow(QWidget):
         if not title:
             QMessageBox.warning(self, "Missing Title", "Please enter a title.")
             return
-        if not os.path.isfile(creds_file):
+        # Catch non-video files before spending quota; the check waits for the probe
+        if self._video_info is None or self._video_info[0] != video:
+            self._pending_upload = video
+            self.upload_button.setEnabled(False)
+            self._show_video_info(video)
+            return
+        info = self._video_info[1]
+        if info and info.get('complete') and not any(s.get('codec_type') == 'video' for s in info.get('streams') or []):
+            QMessageBox.warning(self, "Invalid Video", "The selected file has no video stream.")
+            return
+        if not API_ENDPOINT and not os.path.isfile(creds_file):
             QMessageBox.warning(self, "Missing Credentials", "Please provide a valid Google API credentials.json file.")
             return
 
+        playlist = playlist_id(self.playlist_input.text())
+        thumbnail = self.thumb_path.text().strip() or None
+        cost = upload_cost(playlist=bool(playlist), thumbnail=bool(thumbnail))
+        if not get_quota_ledger().reserve(cost):
+            QMessageBox.warning(
+                self, "Quota Used Up",
+                f"Today's YouTube API quota cannot cover another upload ({self._quota_text()}). "
+                "Add the file to the queue and it is uploaded after the reset.",
+            )
+            return
+
         # Persist fields
-        self.settings.setValue('uploader/title', title)
-        self.settings.setValue('uploader/privacy', privacy)
-        self.settings.setValue('uploader/category', category_id)
+        self._save_fields()
 
         # Start worker thread
         self.thread = QThread()
@@ -216,11 +402,15 @@ class YouTubeUploaderWindow(QWidget):
             category_id=category_id,
             privacy_status=privacy,
             creds_file=creds_file,
-            thumbnail_path=self.thumb_path.text().strip() or None,
+            thumbnail_path=thumbnail,
+            playlist_id=playlist or None,
+            reserved=cost,
         )
         self.worker.moveToThread(self.thread)
         self.thread.started.connect(self.worker.run)
-        self.worker.progress.connect(self._on_progress)
+        # Progress arrives coalesced through the shared bus
+        self._job_id = self.worker.job_id
+        get_bus().subscribe(self._job_id, self._on_bus_progress)
         self.worker.finished.connect(self._on_finished)
         self.worker.error.connect(self._on_error)
         self.worker.finished.connect(self.thread.quit)
@@ -231,31 +421,417 @@ class YouTubeUploaderWindow(QWidget):
         self.cancel_button.setEnabled(True)
         self.progress.setValue(0)
 
-        self.thread.start()
+        started = submit_job(self.main_window, self._job_id, {NETWORK: 1}, self.thread.start,
+                             label=f"Upload {os.path.basename(video)}")
+        self.progress.setFormat("%p%" if started else "Queued")
 
     def _cancel_upload(self):
         if hasattr(self, 'worker') and self.worker:
             self.worker.cancel()
+            scheduler = getattr(self.main_window, 'scheduler', None)
+            if scheduler is not None and self._job_id and scheduler.is_queued(self._job_id):
+                # Never admitted: drop it and let the worker finish through the usual path
+                scheduler.finish(self._job_id)
+                self.thread.start()
 
     def _on_progress(self, percent: int):
+        self.progress.setFormat("%p%")
         self.progress.setValue(percent)
 
+    def _on_bus_progress(self, _job_id, fields: dict):
+        if 'percent' in fields:
+            self._on_progress(fields['percent'])
+
+    def _stop_progress(self):
+        # Late bus updates must not overwrite the final state
+        if self._job_id:
+            get_bus().unsubscribe(self._job_id, self._on_bus_progress)
+            get_bus().discard(self._job_id)
+
     def _on_finished(self):
+        self._stop_progress()
+        release_job(self.main_window, self._job_id)
+        self._job_id = None
+        # Whatever the calls made did not use of the reservation goes back
+        get_quota_ledger().release(self.worker.reserved)
+        self._update_summary()
+        self.progress.setFormat("%p%")
         self.progress.setValue(100)
         self.upload_button.setEnabled(True)
         self.cancel_button.setEnabled(False)
         QMessageBox.information(self, "Upload", "Upload completed.")
 
     def _on_error(self, msg: str):
+        self._stop_progress()
         self.upload_button.setEnabled(True)
         self.cancel_button.setEnabled(False)
         QMessageBox.critical(self, "Upload Error", msg)
 
+    def _save_fields(self):
+        self.settings.setValue('uploader/title', self.title_input.text().strip())
+        self.settings.setValue('uploader/privacy', self.privacy_combo.currentText())
+        self.settings.setValue('uploader/category', int(self.category_combo.currentData()))
+        self.settings.setValue('uploader/playlist', self.playlist_input.text().strip())
+
+    # Batch queue
+
+    def _add_files(self):
+        paths, _ = QFileDialog.getOpenFileNames(self, 'Select Video Files', filter="Videos (*.mp4 *.mkv *.mov *.webm *.avi);;All files (*)")
+        if not paths:
+            return
+        title = self.title_input.text().strip() or '{name}'
+        entries = batch_entries(
+            paths, title, self.desc_input.toPlainText(), self.tags_input.text(), self.playlist_input.text(),
+            self.privacy_combo.currentText(), int(self.category_combo.currentData()),
+        )
+        self._save_fields()
+        self.model.add(entries)
+        self._dispatch()
+
+    def _selected(self):
+        rows = sorted({index.row() for index in self.table.selectionModel().selectedRows()})
+        return [self.queue.items[row] for row in rows if row < len(self.queue.items)]
+
+    def _pause_selected(self):
+        self._pause([item for item in self._selected() if item.state in (QUEUED, RUNNING)])
+
+    def _resume_selected(self):
+        for item in self._selected():
+            if item.state == PAUSED:
+                self.queue.update(item, state=QUEUED)
+                self.model.refresh(item)
+        self._dispatch()
+
+    def _retry_selected(self):
+        # The session of a failed attempt is kept, so the upload continues where it stopped
+        for item in self._selected():
+            if item.state in (FAILED, PAUSED):
+                self.queue.update(item, state=QUEUED, error='', attempts=0)
+                self.model.refresh(item)
+        self._dispatch()
+
+    def _remove_selected(self):
+        items = self._selected()
+        self._pause([item for item in items if item.state == RUNNING])
+        self.model.remove(items)
+        self._update_summary()
+
+    def _clear_finished(self):
+        self.model.remove([item for item in self.queue.items if item.state == DONE])
+        self._update_summary()
+
+    def _pause(self, items):
+        scheduler = getattr(self.main_window, 'scheduler', None)
+        for item in items:
+            if item.state == QUEUED:
+                self.queue.update(item, state=PAUSED)
+                self.model.refresh(item)
+                continue
+            entry = self._workers.get(item.id)
+            if entry is None:
+                continue
+            worker, thread, job_id = entry
+            self._pausing.add(item.id)
+            try:
+                worker.cancel()
+            except RuntimeError:
+                continue
+            if scheduler is not None and scheduler.is_queued(job_id):
+                # Never admitted: drop it and let the worker finish through the usual path
+                scheduler.finish(job_id)
+                thread.start()
+        self._update_summary()
+
+    def _dispatch(self):
+        # Start queued files while upload slots are free and today's quota
+        # covers them; otherwise wait for the reset instead of failing mid-batch
+        if self._closing:
+            return
+        creds_file = self.creds_path.text().strip()
+        ledger = get_quota_ledger()
+        self._quota_timer.stop()
+        while len(self._workers) < self.parallel_spin.value():
+            item = self.queue.next_ready()
+            if item is None:
+                break
+            if not API_ENDPOINT and not os.path.isfile(creds_file):
+                break
+            if not os.path.isfile(item.path):
+                self.queue.update(item, state=FAILED, error='File not found')
+                self.model.refresh(item)
+                continue
+            units = item.cost
+            if not ledger.reserve(units):
+                # Units held by running uploads come back when they finish;
+                # only a day that is spent waits for the reset
+                if ledger.used() + units > ledger.daily:
+                    self._quota_timer.start(int(max(1.0, next_reset() - time.time() + 5) * 1000))
+                break
+            self._start_item(item, creds_file, units)
+        self._update_summary()
+
+    def _start_item(self, item, creds_file, units):
+        thread = QThread()
+        worker = _YouTubeUploadWorker(
+            item.path, item.title, item.description, [t.strip() for t in item.tags.split(',') if t.strip()],
+            item.category, item.privacy, creds_file,
+            playlist_id=item.playlist or None,
+            resume_uri=item.session or None,
+            reserved=units,
+        )
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        self._workers[item.id] = (worker, thread, worker.job_id)
+        self._by_job[worker.job_id] = item.id
+        get_bus().subscribe(worker.job_id, self._on_queue_progress)
+        worker.result.connect(lambda video_id, i=item: self.queue.update(i, video_id=video_id))
+        worker.session.connect(lambda uri, i=item: self.queue.update(i, session=uri))
+        worker.error.connect(lambda msg, i=item: self._errors.__setitem__(i.id, msg))
+        worker.finished.connect(lambda i=item, w=worker: self._on_item_finished(i, w))
+        worker.finished.connect(thread.quit, Qt.DirectConnection)
+        worker.finished.connect(worker.deleteLater)
+        thread.finished.connect(lambda th=thread: self._threads.discard(th))
+        thread.finished.connect(thread.deleteLater)
+        self._threads.add(thread)
+
+        self.queue.update(item, state=RUNNING, attempts=item.attempts + 1, error='', percent=0)
+        item.waiting = not submit_job(self.main_window, worker.job_id, {NETWORK: 1}, thread.start,
+                                      label=f"Upload {os.path.basename(item.path)}")
+        self.model.refresh(item)
+
+    def _on_queue_progress(self, job_id, fields: dict):
+        item = self.queue.get(self._by_job.get(job_id))
+        if item is None or item.state != RUNNING or 'percent' not in fields:
+            return
+        item.waiting = False
+        item.percent = fields['percent']
+        self.model.refresh(item)
+
+    def _on_item_finished(self, item, worker):
+        if self._closing:
+            return
+        entry = self._workers.pop(item.id, None)
+        if entry is None:
+            return
+        job_id = entry[2]
+        # Late bus updates must not overwrite the final state
+        get_bus().unsubscribe(job_id, self._on_queue_progress)
+        get_bus().discard(job_id)
+        release_job(self.main_window, job_id)
+        get_quota_ledger().release(worker.reserved)
+        self._by_job.pop(job_id, None)
+        error = self._errors.pop(item.id, None)
+        if item.video_id:
+            # Uploaded; a playlist failure is kept as a note
+            self.queue.update(item, state=DONE, percent=100, session='', error=error or '')
+        elif item.id in self._pausing:
+            self.queue.update(item, state=PAUSED)
+        elif worker.quota_exceeded:
+            # Back in line for the next quota day, keeping its session
+            self.queue.update(item, state=QUEUED, error=error or '')
+        else:
+            self.queue.update(item, state=FAILED, error=error or 'No video id was returned')
+        self._pausing.discard(item.id)
+        self.model.refresh(item)
+        self._dispatch()
+
+    def _shutdown(self):
+        # Stop every upload; their sessions are kept so they continue next time
+        self._closing = True
+        self._quota_timer.stop()
+        scheduler = getattr(self.main_window, 'scheduler', None)
+        for item_id, (worker, thread, job_id) in list(self._workers.items()):
+            get_bus().unsubscribe(job_id, self._on_queue_progress)
+            get_bus().discard(job_id)
+            if scheduler is not None and scheduler.is_queued(job_id):
+                scheduler.finish(job_id)
+            else:
+                release_job(self.main_window, job_id)
+            try:
+                worker.cancel()
+                thread.wait(10000)
+            except RuntimeError:
+                pass
+            get_quota_ledger().release(worker.reserved)
+            # Signals are no longer delivered, so the outcome is read off the worker
+            item = self.queue.get(item_id)
+            if item is None:
+                continue
+            if worker.video_id:
+                self.queue.update(item, state=DONE, video_id=worker.video_id, session='')
+            else:
+                self.queue.update(item, state=PAUSED if item_id in self._pausing else QUEUED,
+                                  session=worker.resume_uri or '')
+        self._workers.clear()
+        for _worker, thread in list(self._probes):
+            try:
+                thread.wait()
+            except RuntimeError:
+                pass
+
+    def _on_parallel_changed(self, value: int):
+        self.settings.setValue('uploader/parallel', value)
+        self._dispatch()
+
+    def _on_quota_changed(self, value: int):
+        self.settings.setValue('uploader/daily_quota', value)
+        get_quota_ledger().daily = value
+        self._dispatch()
+
+    def _quota_text(self) -> str:
+        ledger = get_quota_ledger()
+        wait = _fmt_wait(next_reset() - time.time())
+        return f"{ledger.used():,} of {ledger.daily:,} quota units used today, resets in {wait}"
+
+    def _update_summary(self):
+        counts = self.queue.counts()
+        parts = [f"{counts[state]} {label}" for state, label in
+                 ((RUNNING, 'uploading'), (QUEUED, 'queued'), (PAUSED, 'paused'), (DONE, 'done'), (FAILED, 'failed'))
+                 if counts[state]]
+        text = self._quota_text()
+        if counts[QUEUED] and self._quota_timer.isActive() and len(self._workers) < self.parallel_spin.value():
+            reset = time.strftime('%H:%M', time.localtime(next_reset()))
+            text = f"Waiting for the quota reset at {reset}; " + text
+        elif counts[QUEUED] and not API_ENDPOINT and not os.path.isfile(self.creds_path.text().strip()):
+            text = "Choose credentials.json to start the queue; " + text
+        self.queue_status.setText(', '.join(parts + [text]) if parts else text)
+        self._update_queue_buttons()
+
+    def _update_queue_buttons(self, *_):
+        states = {item.state for item in self._selected()}
+        self.pause_button.setEnabled(bool(states & {QUEUED, RUNNING}))
+        self.resume_button.setEnabled(PAUSED in states)
+        self.retry_button.setEnabled(bool(states & {FAILED, PAUSED}))
+        self.remove_button.setEnabled(bool(states))
+        self.clear_button.setEnabled(any(item.state == DONE for item in self.queue.items))
+
+
+_STATE_LABELS = {
+    QUEUED: 'Queued',
+    RUNNING: 'Uploading',
+    PAUSED: 'Paused',
+    DONE: 'Uploaded',
+    FAILED: 'Failed',
+}
+
+
+class _UploadModel(QAbstractTableModel):
+    # Rows are the queue's items in order; titles can be edited until the upload starts
+    COLUMNS = ('File', 'Title', 'Status', 'Progress')
+
+    def __init__(self, queue, parent=None):
+        super().__init__(parent)
+        self.queue = queue
+        self._rows = {}
+        self._reindex()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.queue.items)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        item = self.queue.items[index.row()]
+        column = index.column()
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            if column == 0:
+                return os.path.basename(item.path)
+            if column == 1:
+                return item.title
+            if column == 2:
+                if item.state == RUNNING and item.waiting:
+                    return 'Waiting'
+                return _STATE_LABELS.get(item.state, item.state)
+            return f"{item.percent}%" if item.percent or item.state == RUNNING else ''
+        if role == Qt.ToolTipRole:
+            if column == 0:
+                return item.path
+            if column == 2 and item.video_id:
+                note = f"\n{item.error}" if item.error else ''
+                return f"https://youtu.be/{item.video_id}{note}"
+            if column == 2 and item.error:
+                return item.error
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid() and index.column() == 1 and self.queue.items[index.row()].state in (QUEUED, PAUSED, FAILED):
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or index.column() != 1 or not str(value).strip():
+            return False
+        self.queue.update(self.queue.items[index.row()], title=str(value).strip()[:100])
+        self.dataChanged.emit(index, index)
+        return True
+
+    def add(self, entries):
+        first = len(self.queue.items)
+        entries = list(entries)
+        if not entries:
+            return []
+        self.beginInsertRows(QModelIndex(), first, first + len(entries) - 1)
+        added = self.queue.add(entries)
+        self._reindex()
+        self.endInsertRows()
+        return added
+
+    def remove(self, items):
+        if not items:
+            return
+        self.beginResetModel()
+        self.queue.remove(items)
+        self._reindex()
+        self.endResetModel()
+
+    def refresh(self, item):
+        row = self._rows.get(item.id)
+        if row is not None:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.COLUMNS) - 1))
+
+    def _reindex(self):
+        self._rows = {item.id: row for row, item in enumerate(self.queue.items)}
+
+
+def _fmt_wait(sec: float) -> str:
+    m = max(0, int(sec)) // 60
+    h, m = divmod(m, 60)
+    return f"{h}h {m:02d}m" if h else f"{m}m"
+
+
+class _ProbeWorker(QObject):
+    # Probes one file; reports (path, probe or None)
+    finished = pyqtSignal()
+    result = pyqtSignal(str, object)
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+
+    def run(self):
+        try:
+            info = get_probe_cache().probe(self.path) if os.path.isfile(self.path) else None
+        except Exception:
+            info = None
+        self.result.emit(self.path, info)
+        self.finished.emit()
+
 
 class _YouTubeUploadWorker(QObject):
-    progress = pyqtSignal(int)
+    # Progress (percent) is published on the progress bus under job_id
     finished = pyqtSignal()
     error = pyqtSignal(str)
+    result = pyqtSignal(str)  # id of the uploaded video, emitted before finished
+    session = pyqtSignal(str)  # resumable upload URI once opened; empty when it expired
 
     def __init__(
         self,
@@ -267,8 +843,14 @@ class _YouTubeUploadWorker(QObject):
         privacy_status: str,
         creds_file: str,
         thumbnail_path: Optional[str] = None,
+        job_id: Optional[str] = None,
+        weight: float = 1.0,
+        playlist_id: Optional[str] = None,
+        resume_uri: Optional[str] = None,
+        reserved: int = 0,
     ):
         super().__init__()
+        self.job_id = job_id or new_job_id('upload')
         self.video_path = video_path
         self.title = title
         self.description = description
@@ -277,29 +859,43 @@ class _YouTubeUploadWorker(QObject):
         self.privacy_status = privacy_status
         self.creds_file = creds_file
         self.thumbnail_path = thumbnail_path
+        self.weight = weight  # share of the upload bandwidth budget relative to other jobs
+        self.playlist_id = playlist_id
+        self.resume_uri = resume_uri  # session of an earlier attempt, continued where the server stopped
+        self.reserved = reserved  # quota units still held for this upload; its calls are paid from them
+        self.quota_exceeded = False  # set when the API refused a call for quota
+        self.video_id = None
         self._cancel = False
 
     def cancel(self):
         self._cancel = True
 
-    def _get_credentials(self) -> Credentials:
+    def _get_credentials(self, scopes: List[str]) -> Credentials:
+        # Concurrent uploads share one token; only one may run the consent flow
+        with _credentials_lock:
+            return self._load_credentials(scopes)
+
+    def _load_credentials(self, scopes: List[str]) -> Credentials:
         token_path = os.path.join(os.path.expanduser("~"), ".video_manager", "youtube_token.json")
         os.makedirs(os.path.dirname(token_path), exist_ok=True)
 
         creds: Optional[Credentials] = None
         if os.path.exists(token_path):
             try:
-                creds = Credentials.from_authorized_user_file(token_path, SCOPES)
+                # Loaded with the scopes it was granted; a narrower token asks for consent again
+                creds = Credentials.from_authorized_user_file(token_path)
+                if not set(scopes) <= set(creds.scopes or ()):
+                    creds = None
             except Exception:
                 creds = None
         if not creds or not creds.valid:
             if creds and creds.expired and creds.refresh_token:
                 try:
-                    creds.refresh(Request())  # type: ignore[name-defined]
+                    creds.refresh(Request())
                 except Exception:
                     creds = None
             if not creds or not creds.valid:
-                flow = InstalledAppFlow.from_client_secrets_file(self.creds_file, SCOPES)
+                flow = InstalledAppFlow.from_client_secrets_file(self.creds_file, scopes)
                 creds = flow.run_local_server(port=0)
             # Save the credentials
             with open(token_path, 'w') as token:
@@ -307,9 +903,28 @@ class _YouTubeUploadWorker(QObject):
         return creds
 
     def run(self):
+        # The lease ties this upload to the shared upload budget
+        lease = get_limiter().acquire(UPLOAD, self.job_id, self.weight)
         try:
-            creds = self._get_credentials()
-            youtube = build('youtube', 'v3', credentials=creds)
+            self._run(lease)
+        finally:
+            lease.release()
+
+    def _client(self):
+        if API_ENDPOINT:
+            # The bundled API description with its root moved, so uploads go there too
+            service = json.loads(get_static_doc('youtube', 'v3'))
+            service['rootUrl'] = API_ENDPOINT.rstrip('/') + '/'
+            return build_from_document(service, credentials=AnonymousCredentials())
+        creds = self._get_credentials(PLAYLIST_SCOPES if self.playlist_id else SCOPES)
+        return build('youtube', 'v3', credentials=creds)
+
+    def _run(self, lease):
+        ledger = get_quota_ledger()
+        try:
+            if self._cancel:
+                raise Exception('Cancelled by user')
+            youtube = self._client()
 
             body = {
                 'snippet': {
@@ -323,39 +938,137 @@ class _YouTubeUploadWorker(QObject):
                 },
             }
 
-            media = MediaFileUpload(self.video_path, chunksize=5 * 1024 * 1024, resumable=True)
+            # Smaller chunks under a cap keep the pacing smooth
+            chunk_size = upload_chunk_size(lease.rate())
+            media = MediaFileUpload(self.video_path, chunksize=chunk_size, resumable=True)
             request = youtube.videos().insert(part=','.join(body.keys()), body=body, media_body=media)
+            # An earlier session continues where the server stopped
+            request.resumable_uri = self.resume_uri or None
+            resync = bool(self.resume_uri)
 
             response = None
-            last_percent = -1
+            sent = 0
+            retries = 0
             while response is None:
                 if self._cancel:
                     raise Exception('Cancelled by user')
-                status, response = request.next_chunk()
+                opening = request.resumable_uri is None
+                try:
+                    if resync:
+                        # Nothing is re-sent: the bytes the server holds were paid for before
+                        resync = False
+                        status, response = self._resync(request)
+                        sent = request.resumable_progress
+                    else:
+                        status, response = request.next_chunk(num_retries=_CHUNK_RETRIES)
+                    retries = 0
+                except HttpError as e:
+                    if self.resume_uri and request.resumable_uri == self.resume_uri and e.resp.status in (404, 410):
+                        # The earlier session expired: open a new one, which costs a
+                        # full insert that a resumed upload had not reserved. Dropping
+                        # the dead session also prices a later try as a new insert
+                        request.resumable_uri, request.resumable_progress = None, 0
+                        resync = False
+                        self.resume_uri = None
+                        self.session.emit('')
+                        if not ledger.reserve(QUOTA_COSTS['videos.insert']):
+                            self.quota_exceeded = True
+                            reset = time.strftime('%H:%M', time.localtime(next_reset()))
+                            raise Exception(f"The upload session expired and today's quota cannot cover a new one; "
+                                            f"it starts again after the reset at {reset}")
+                        self.reserved += QUOTA_COSTS['videos.insert']
+                        continue
+                    raise
+                except OSError:
+                    # Dropped connection: the client asks for the server's offset on the next call
+                    retries += 1
+                    if retries > _CHUNK_RETRIES or request.resumable_uri is None:
+                        raise
+                    time.sleep(2 ** retries)
+                    continue
+                finally:
+                    # Opening the session is the call that costs quota
+                    if opening:
+                        self._charge(ledger, 'videos.insert')
+                    if request.resumable_uri and request.resumable_uri != self.resume_uri:
+                        self.resume_uri = request.resumable_uri
+                        self.session.emit(self.resume_uri)
                 if status:
-                    pct = int(status.progress() * 100)
-                    if pct != last_percent:
-                        last_percent = pct
-                        self.progress.emit(pct)
-                time.sleep(0.05)
+                    get_bus().publish(self.job_id, percent=int(status.progress() * 100))
+                    # Wait out this job's share before sending the next chunk; a
+                    # resumed session's first report includes what was sent before
+                    lease.consume(min(chunk_size, status.resumable_progress - sent), lambda: self._cancel)
+                    sent = status.resumable_progress
+
+            video_id = response.get('id') if isinstance(response, dict) else None
+            self.video_id = video_id
 
             # Optionally set thumbnail
             try:
-                if self.thumbnail_path and os.path.isfile(self.thumbnail_path):
-                    video_id = response.get('id') if isinstance(response, dict) else None
-                    if video_id:
-                        mime, _ = mimetypes.guess_type(self.thumbnail_path)
-                        thumb_media = MediaFileUpload(self.thumbnail_path, mimetype=mime, resumable=False)
-                        youtube.thumbnails().set(videoId=video_id, media_body=thumb_media).execute()
+                if self.thumbnail_path and os.path.isfile(self.thumbnail_path) and video_id:
+                    mime, _ = mimetypes.guess_type(self.thumbnail_path)
+                    thumb_media = MediaFileUpload(self.thumbnail_path, mimetype=mime, resumable=False)
+                    self._charge(ledger, 'thumbnails.set')
+                    youtube.thumbnails().set(videoId=video_id, media_body=thumb_media).execute()
             except Exception:
                 # Non-fatal: continue even if thumbnail set fails
                 pass
 
-            self.progress.emit(100)
+            get_bus().publish(self.job_id, percent=100)
+            if video_id:
+                self.result.emit(video_id)
+            if video_id and self.playlist_id:
+                self._add_to_playlist(youtube, ledger, video_id)
             self.finished.emit()
         except HttpError as e:
-            self.error.emit(f"YouTube API error: {e}")
+            if _is_quota_error(e):
+                self.quota_exceeded = True
+                ledger.exhaust()
+                reset = time.strftime('%H:%M', time.localtime(next_reset()))
+                self.error.emit(f"YouTube API quota exhausted; uploads continue after the reset at {reset}")
+            else:
+                self.error.emit(f"YouTube API error: {e}")
             self.finished.emit()
         except Exception as e:
             self.error.emit(str(e))
             self.finished.emit()
+
+    def _resync(self, request):
+        # Asks the server how much of an earlier session it holds: an empty PUT
+        # with "Content-Range: bytes */<size>" is answered with 308 and the range
+        # received so far, or with the video if the upload had already completed
+        size = os.path.getsize(self.video_path)
+        headers = {'Content-Range': f'bytes */{size}', 'Content-Length': '0'}
+        resp, content = request.http.request(request.resumable_uri, method='PUT', headers=headers)
+        if resp.status in (200, 201):
+            return None, request.postproc(resp, content)
+        if resp.status != 308:
+            raise HttpError(resp, content, uri=request.resumable_uri)
+        received = resp.get('range')
+        request.resumable_progress = int(received.rsplit('-', 1)[1]) + 1 if received else 0
+        return MediaUploadProgress(request.resumable_progress, size), None
+
+    def _charge(self, ledger, call: str):
+        self.reserved -= ledger.charge(call, reserved=self.reserved)
+
+    def _add_to_playlist(self, youtube, ledger, video_id: str):
+        # The video is up either way; a failure here is reported, not retried
+        body = {'snippet': {'playlistId': self.playlist_id,
+                            'resourceId': {'kind': 'youtube#video', 'videoId': video_id}}}
+        try:
+            self._charge(ledger, 'playlistItems.insert')
+            youtube.playlistItems().insert(part='snippet', body=body).execute()
+        except Exception as e:
+            if isinstance(e, HttpError) and _is_quota_error(e):
+                ledger.exhaust()
+            self.error.emit(f"Uploaded as https://youtu.be/{video_id}, but adding it to the playlist failed: {e}")
+
+
+def _is_quota_error(error: HttpError) -> bool:
+    if error.resp.status != 403:
+        return False
+    try:
+        errors = json.loads(error.content).get('error', {}).get('errors') or []
+    except (ValueError, AttributeError, TypeError):
+        return False
+    return any(e.get('reason') in _QUOTA_REASONS for e in errors)